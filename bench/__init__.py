@@ -0,0 +1,33 @@
+"""오프라인 벤치마크: 가짜 넥슨/라이엇 서버와 가짜 디스코드 객체로 조회 명령과 음악 재생을 부하 시험한다."""
+import os
+
+
+def isolate_env(workdir: str, **overrides: str):
+    """bot을 불러오기 전에 호출. 상태/DB 파일을 workdir로 돌리고 쿨다운·로그성 기능을 끈다.
+
+    overrides는 항상 덮어쓰고, 기본값은 같은 이름의 환경 변수가 없을 때만 쓴다.
+    """
+    os.environ.update(
+        {
+            "LOL_HISTORY_DB": os.path.join(workdir, "lol_history.sqlite3"),
+            "WATCH_DB": os.path.join(workdir, "watchlist.sqlite3"),
+            "BOT_STATE_FILE": os.path.join(workdir, "bot_state.json"),
+            "STATE_DB": os.path.join(workdir, "bot_state.sqlite3"),
+            **overrides,
+        }
+    )
+    defaults = {
+        "GUILD_CMD_PER_MIN": "0",
+        "GUILD_HEAVY_PER_MIN": "0",
+        "TRACE_SLOW_MS": "0",
+        "LOOP_STALL_THRESHOLD": "0",
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    """정렬된 목록의 q 분위 값(nearest-rank)."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))]
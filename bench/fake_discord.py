@@ -0,0 +1,193 @@
+"""벤치마크용 가짜 디스코드 객체.
+
+명령 콜백, CommandCore 어댑터, 재생 경로(start_playback/handle_after/패널)가 쓰는 만큼만 흉내 낸다.
+ctx.author/guild/channel/command, ctx.send()가 돌려주는 메시지의 edit()/delete(), 음성 채널 멤버,
+그리고 실제 discord.py AudioPlayer 스레드가 Opus 프레임을 실시간(20ms)으로 넘기는 음성 클라이언트.
+보낸 메시지는 채널에 쌓이고 send_latency만큼 REST 지연을 흉내 낸다.
+"""
+import asyncio
+import itertools
+import threading
+import time
+from types import SimpleNamespace
+
+import discord
+from discord.player import AudioPlayer
+
+FRAME_SECONDS = AudioPlayer.DELAY
+OPUS_SILENCE = b"\xf8\xff\xfe"
+
+_ids = itertools.count(1_000_000)
+
+
+class FakeMessage:
+    def __init__(self, channel: "FakeChannel", content: str | None, embed=None):
+        self.id = next(_ids)
+        self.channel = channel
+        self.content = content
+        self.embed = embed
+        self.sent_at = time.perf_counter()
+        self.edits = 0
+
+    async def edit(self, *, content=..., embed=..., **_):
+        await self.channel.delay()
+        if content is not ...:
+            self.content = content
+        if embed is not ...:
+            self.embed = embed
+        self.edits += 1
+        return self
+
+    async def delete(self, **_):
+        await self.channel.delay()
+
+
+class FakeChannel:
+    def __init__(self, guild: "FakeGuild", send_latency: float = 0.0):
+        self.id = next(_ids)
+        self.guild = guild
+        self.send_latency = send_latency
+        self.sent: list[FakeMessage] = []
+
+    async def delay(self):
+        if self.send_latency:
+            await asyncio.sleep(self.send_latency)
+
+    async def send(self, content: str | None = None, *, embed=None, **_) -> FakeMessage:
+        await self.delay()
+        msg = FakeMessage(self, content, embed)
+        self.sent.append(msg)
+        return msg
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int | None = None, name: str = "bench"):
+        self.id = guild_id if guild_id is not None else next(_ids)
+        self.name = name
+        self.voice_client: "StubVoiceClient | None" = None
+        self.system_channel: FakeChannel | None = None
+
+
+class FakeVoiceChannel:
+    def __init__(self, guild: FakeGuild, listeners: int = 1):
+        self.id = next(_ids)
+        self.guild = guild
+        self.name = f"{guild.name}-voice"
+        # 청취자가 없으면 handle_after가 연결을 끊으므로 사람 멤버를 넣어 둔다
+        self.members = [SimpleNamespace(id=next(_ids), bot=False) for _ in range(listeners)]
+
+
+class StubVoiceClient:
+    """discord.VoiceClient 대용. 재생은 discord.py의 AudioPlayer 스레드가 그대로 맡고,
+    보내는 Opus 패킷은 네트워크 대신 여기서 받아 프레임 지연(지터)과 곡 전환 공백을 잰다."""
+
+    timeout = 1.0
+
+    def __init__(self, guild: FakeGuild, channel: FakeVoiceChannel, loop: asyncio.AbstractEventLoop):
+        self.guild = guild
+        self.channel = channel
+        self.client = SimpleNamespace(loop=loop)
+        self.ws = SimpleNamespace(speak=self._speak)
+        self._player: AudioPlayer | None = None
+        self._connected = True
+        self._last_frame: float | None = None
+        self._track_started = True
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.bytes = 0
+        self.plays = 0
+        self._origin = 0.0  # 현재 곡 첫 프레임 시각
+        self._sent = 0  # 현재 곡에서 보낸 프레임 수
+        self.lateness: list[float] = []  # 예정 시각(첫 프레임 + n × 20ms)보다 늦게 보낸 시간(초)
+        self.gaps: list[float] = []  # 이전 곡 마지막 프레임부터 다음 곡 첫 프레임까지(초)
+        guild.voice_client = self
+
+    async def _speak(self, state):
+        pass
+
+    # ---- VoiceClient 흉내 ----
+    def is_connected(self) -> bool:
+        return self._connected
+
+    def wait_until_connected(self, timeout: float | None = None) -> bool:
+        return self._connected
+
+    def is_playing(self) -> bool:
+        return self._player is not None and self._player.is_playing()
+
+    def is_paused(self) -> bool:
+        return self._player is not None and self._player.is_paused()
+
+    def play(self, source: discord.AudioSource, *, after=None):
+        if not self._connected:
+            raise discord.ClientException("Not connected to voice.")
+        if self.is_playing():
+            raise discord.ClientException("Already playing audio.")
+        if not source.is_opus():
+            raise TypeError("StubVoiceClient는 Opus 소스만 받습니다(FFmpegOpusAudio).")
+        with self._lock:
+            self._track_started = True
+        self.plays += 1
+        self._player = AudioPlayer(source, self, after=after)
+        self._player.start()
+
+    def stop(self):
+        if self._player:
+            self._player.stop()
+            self._player = None
+
+    def pause(self):
+        if self._player:
+            self._player.pause()
+
+    def resume(self):
+        if self._player:
+            self._player.resume()
+
+    async def disconnect(self, *, force: bool = False):
+        self._connected = False
+        player = self._player
+        self.stop()
+        self.guild.voice_client = None
+        if player is not None:
+            await asyncio.get_running_loop().run_in_executor(None, player.join, 5)
+
+    def send_audio_packet(self, data: bytes, *, encode: bool = True):
+        # AudioPlayer 스레드에서 호출된다
+        now = time.perf_counter()
+        if data == OPUS_SILENCE:
+            # 곡 끝/일시정지 때 몰아 보내는 무음은 간격 측정에서 뺀다
+            return
+        with self._lock:
+            last, new_track = self._last_frame, self._track_started
+            self._last_frame = now
+            self._track_started = False
+        self.frames += 1
+        self.bytes += len(data)
+        if new_track:
+            if last is not None:
+                self.gaps.append(now - last)
+            self._origin, self._sent = now, 0
+            return
+        # AudioPlayer는 늦으면 다음 프레임을 바로 보내 따라잡으므로 간격이 아니라 예정 시각과 비교한다
+        self._sent += 1
+        self.lateness.append(max(0.0, now - self._origin - self._sent * FRAME_SECONDS))
+
+
+class FakeContext:
+    """commands.Context 대용. 요청 하나마다 새로 만든다(사용자별 쿨다운이 서로 겹치지 않게)."""
+
+    def __init__(self, command, guild: FakeGuild, send_latency: float = 0.0):
+        self.author = SimpleNamespace(id=next(_ids), display_name="bench", mention="@bench", bot=False)
+        self.guild = guild
+        self.channel = FakeChannel(guild, send_latency)
+        self.command = command
+        self.message = SimpleNamespace(id=next(_ids), author=self.author, channel=self.channel, guild=guild)
+        self.started_at = time.perf_counter()
+
+    async def send(self, content: str | None = None, **kwargs) -> FakeMessage:
+        return await self.channel.send(content, **kwargs)
+
+    @property
+    def first_reply(self) -> FakeMessage | None:
+        return self.channel.sent[0] if self.channel.sent else None
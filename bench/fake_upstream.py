@@ -0,0 +1,198 @@
+"""넥슨/라이엇 API 대체 서버(aiohttp.web).
+
+실제 API와 같은 경로에 정해진 형태의 JSON을 돌려준다. 응답마다 지연(latency ± jitter)을 넣고,
+rate_429 확률로 Retry-After가 붙은 429를 돌려준다. 경로 템플릿(식별자를 뺀 경로)별 호출 수를 센다.
+
+라이엇은 호스트 이름(kr, asia 등)을 경로 앞에 붙여 받는다: RIOT_API_BASE=http://127.0.0.1:<port>/riot/{host}
+"""
+import asyncio
+import random
+import zlib
+from collections import Counter
+
+from aiohttp import web
+
+BASE_TIME_MS = 1_760_000_000_000  # 가짜 경기 시작 시각 기준(ms)
+MATCHES_PER_PLAYER = 200
+CHAMPIONS = ["Ahri", "Lux", "Zed", "Yasuo", "Jinx", "Thresh", "LeeSin", "Ezreal"]
+QUEUES = [420, 440, 450, 400]
+
+
+def _seed(text: str) -> int:
+    return zlib.crc32(text.encode("utf-8"))
+
+
+class FakeUpstream:
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, rate_429: float = 0.0, retry_after: float = 1.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.calls: Counter = Counter()  # 경로 템플릿 -> 호출 수
+        self.throttled: Counter = Counter()  # 경로 템플릿 -> 429 수
+        self.inflight = 0
+        self.peak_inflight = 0
+        self._runner: web.AppRunner | None = None
+        self.port = 0
+
+    # ---- 서버 ----
+    def app(self) -> web.Application:
+        app = web.Application()
+        r = app.router
+        # 넥슨(메이플/FC)
+        r.add_get("/maplestory/v1/id", self._wrap("maple/id", self.maple_id))
+        r.add_get("/maplestory/v1/character/{endpoint}", self._wrap("maple/character", self.maple_character))
+        r.add_get("/fconline/v1/id", self._wrap("fc/id", self.fc_id))
+        r.add_get("/fconline/v1/user/basic", self._wrap("fc/basic", self.fc_basic))
+        r.add_get("/fconline/v1/user/maxdivision", self._wrap("fc/maxdivision", self.fc_maxdivision))
+        r.add_get("/fconline/v1/user/match", self._wrap("fc/match", self.fc_match))
+        r.add_get("/fconline/v1/match-detail", self._wrap("fc/match-detail", self.fc_match_detail))
+        # 라이엇
+        r.add_get("/riot/{host}/riot/account/v1/accounts/by-riot-id/{name}/{tag}", self._wrap("riot/account", self.riot_account))
+        r.add_get("/riot/{host}/lol/summoner/v4/summoners/by-puuid/{puuid}", self._wrap("riot/summoner", self.riot_summoner))
+        r.add_get("/riot/{host}/lol/summoner/v4/summoners/by-name/{name}", self._wrap("riot/summoner-by-name", self.riot_summoner_by_name))
+        r.add_get("/riot/{host}/lol/league/v4/entries/by-summoner/{sid}", self._wrap("riot/league", self.riot_league))
+        r.add_get("/riot/{host}/lol/match/v5/matches/by-puuid/{puuid}/ids", self._wrap("riot/match-ids", self.riot_match_ids))
+        r.add_get("/riot/{host}/lol/match/v5/matches/{match_id}", self._wrap("riot/match", self.riot_match))
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def reset(self):
+        self.calls.clear()
+        self.throttled.clear()
+        self.peak_inflight = 0
+
+    def _wrap(self, route: str, handler):
+        async def wrapped(request: web.Request):
+            self.calls[route] += 1
+            self.inflight += 1
+            self.peak_inflight = max(self.peak_inflight, self.inflight)
+            try:
+                delay = max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+                if delay:
+                    await asyncio.sleep(delay)
+                if self.rate_429 and random.random() < self.rate_429:
+                    self.throttled[route] += 1
+                    return web.json_response(
+                        {"status": {"status_code": 429, "message": "Rate limit exceeded"}},
+                        status=429,
+                        headers={"Retry-After": f"{self.retry_after:g}"},
+                    )
+                return web.json_response(handler(request))
+            finally:
+                self.inflight -= 1
+
+        return wrapped
+
+    # ---- 메이플 ----
+    def maple_id(self, request):
+        return {"ocid": f"ocid-{_seed(request.query['character_name']):08x}"}
+
+    def maple_character(self, request):
+        ocid = request.query.get("ocid", "")
+        return {
+            "character_name": f"캐릭터{ocid[-4:]}",
+            "world_name": "스카니아",
+            "character_level": 200 + _seed(ocid) % 90,
+            "character_class": "아크메이지(불,독)",
+            "character_gender": "남",
+            "character_guild_name": "벤치",
+            "character_date_create": "2020-01-01T00:00+09:00",
+        }
+
+    # ---- FC ----
+    def fc_id(self, request):
+        return {"ouid": f"ouid-{_seed(request.query['nickname']):08x}"}
+
+    def fc_basic(self, request):
+        ouid = request.query["ouid"]
+        return {"ouid": ouid, "nickname": f"닉{ouid[-4:]}", "level": 100 + _seed(ouid) % 900, "access_id": ouid}
+
+    def fc_maxdivision(self, request):
+        return {"maxdivision": [{"seasonId": 1, "matchType": 50, "division": 800, "achievementDate": "2025-01-01T00:00:00"}]}
+
+    def fc_match(self, request):
+        ouid = request.query["ouid"]
+        offset = int(request.query.get("offset", 0))
+        limit = int(request.query.get("limit", 20))
+        return [f"{ouid}-m{n}" for n in range(offset, offset + limit)]
+
+    def fc_match_detail(self, request):
+        match_id = request.query["matchid"]
+        ouid = match_id.rsplit("-m", 1)[0]
+        seed = _seed(match_id)
+        return {
+            "matchId": match_id,
+            "matchInfo": [
+                {"ouid": ouid, "nickname": f"닉{ouid[-4:]}", "shoot": {"goalTotal": seed % 5}},
+                {"ouid": "opp", "nickname": f"상대{seed % 97}", "shoot": {"goalTotal": (seed >> 3) % 5}},
+            ],
+        }
+
+    # ---- 라이엇 ----
+    def riot_account(self, request):
+        name, tag = request.match_info["name"], request.match_info["tag"]
+        return {"puuid": f"puuid-{_seed(name + '#' + tag):08x}", "gameName": name, "tagLine": tag}
+
+    def riot_summoner(self, request):
+        puuid = request.match_info["puuid"]
+        return {"id": f"sid-{puuid}", "puuid": puuid, "name": puuid[-6:], "summonerLevel": 100 + _seed(puuid) % 400}
+
+    def riot_summoner_by_name(self, request):
+        puuid = f"puuid-{_seed(request.match_info['name']):08x}"
+        return {"id": f"sid-{puuid}", "puuid": puuid, "name": request.match_info["name"], "summonerLevel": 321}
+
+    def riot_league(self, request):
+        seed = _seed(request.match_info["sid"])
+        return [
+            {"queueType": "RANKED_SOLO_5x5", "tier": "GOLD", "rank": "II", "leaguePoints": seed % 100, "wins": 40 + seed % 50, "losses": 45},
+            {"queueType": "RANKED_FLEX_SR", "tier": "SILVER", "rank": "I", "leaguePoints": 12, "wins": 10, "losses": 9},
+        ]
+
+    def riot_match_ids(self, request):
+        puuid = request.match_info["puuid"]
+        q = request.query
+        start, count = int(q.get("start", 0)), int(q.get("count", 20))
+        start_time = int(q["startTime"]) * 1000 if "startTime" in q else None
+        end_time = int(q["endTime"]) * 1000 if "endTime" in q else None
+        ids = []
+        for n in range(MATCHES_PER_PLAYER):  # n=0이 가장 최근
+            at = BASE_TIME_MS - n * 3_600_000
+            if (start_time is not None and at < start_time) or (end_time is not None and at > end_time):
+                continue
+            ids.append(f"KR_{n}_{puuid}")
+        return ids[start : start + count]
+
+    def riot_match(self, request):
+        match_id = request.match_info["match_id"]
+        _, n, puuid = match_id.split("_", 2)
+        seed = _seed(match_id)
+        return {
+            "metadata": {"matchId": match_id},
+            "info": {
+                "gameStartTimestamp": BASE_TIME_MS - int(n) * 3_600_000,
+                "gameDuration": 1200 + seed % 900,
+                "queueId": QUEUES[seed % len(QUEUES)],
+                "participants": [
+                    {
+                        "puuid": puuid,
+                        "championName": CHAMPIONS[seed % len(CHAMPIONS)],
+                        "kills": seed % 12,
+                        "deaths": (seed >> 4) % 9,
+                        "assists": (seed >> 8) % 15,
+                        "win": bool(seed & 1),
+                    }
+                ],
+            },
+        }
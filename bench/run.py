@@ -0,0 +1,184 @@
+"""조회 명령 부하 시험.
+
+    python -m bench.run                       # 모든 시나리오
+    python -m bench.run lol -n 100 -k 10      # !lol 100건 동시, 소환사 10명
+    python -m bench.run fcmatch --latency 0.1 --rate-429 0.05 --json out.json
+    CACHE_DB=/tmp/c.sqlite3 python -m bench.run --port 18080   # 두 번 실행하면 두 번째는 공유 캐시에서 응답
+
+가짜 넥슨/라이엇 서버를 로컬에 띄우고 NEXON_API_BASE/RIOT_API_BASE를 그쪽으로 돌린 뒤 bot 모듈을 불러와
+명령 콜백을 가짜 컨텍스트로 동시에 호출한다. 라운드마다(1라운드는 캐시가 빈 상태) 첫 응답까지의
+p50/p99/최대 지연, 오류 수, 가짜 서버가 받은 경로별 호출 수를 보여준다.
+쿨다운은 끄고 외부 API 한도는 넉넉히 잡지만, 같은 이름의 환경 변수를 주면 그 값을 쓴다.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+
+from bench import isolate_env, percentile
+from bench.fake_discord import FakeContext, FakeGuild
+from bench.fake_upstream import FakeUpstream
+
+# 시나리오: (명령 이름, 이름 -> 명령 인자)
+SCENARIOS = {
+    "lol": ("lol", lambda name: {"summoner_name": f"{name}#KR1"}),
+    "lolstats": ("lolstats", lambda name: {"args": f"{name}#KR1 50"}),
+    "fcmatch": ("fcmatch", lambda name: {"nickname": name, "matchtype": "50"}),
+    "maple": ("msbasic", lambda name: {"character_name": name}),
+}
+
+
+@dataclass
+class RoundResult:
+    scenario: str
+    round: int
+    requests: int
+    errors: int
+    p50_ms: float
+    p99_ms: float
+    max_ms: float
+    wall_ms: float
+    upstream_calls: int
+    upstream_429: int
+    peak_inflight: int
+    calls_by_route: dict = field(default_factory=dict)
+    sample_error: str | None = None
+
+
+def prepare_env(port: int, workdir: str):
+    """외부 주소와 키는 항상 덮어써서 실제 서비스로 나가지 않게 한다. 한도는 넉넉히(환경 변수가 있으면 그 값)."""
+    base = f"http://127.0.0.1:{port}"
+    isolate_env(
+        workdir,
+        NEXON_API_BASE=base,
+        RIOT_API_BASE=f"{base}/riot/{{host}}",
+        NEXON_API_KEY="bench",
+        FIFA_API_KEY="bench",
+        RIOT_API_KEY="bench",
+    )
+    for key, value in {
+        "NEXON_RATE_PER_SEC": "1000",
+        "NEXON_BURST": "1000",
+        "RIOT_RATE_PER_SEC": "1000",
+        "RIOT_BURST": "1000",
+        "QUOTA_MAX_WAIT": "30",
+    }.items():
+        os.environ.setdefault(key, value)
+
+
+async def run_round(botmod, upstream: FakeUpstream, scenario: str, round_no: int, names: list[str], args) -> RoundResult:
+    command_name, make_args = SCENARIOS[scenario]
+    command = botmod.bot.get_command(command_name)
+    guilds = [FakeGuild(name=f"bench-{i}") for i in range(args.guilds)]
+    upstream.reset()
+
+    async def one(i: int, name: str):
+        ctx = FakeContext(command, guilds[i % len(guilds)], args.send_latency)
+        started = time.perf_counter()
+        try:
+            await command.callback(ctx, **make_args(name))
+        except Exception as exc:
+            return time.perf_counter() - started, f"{type(exc).__name__}: {exc}"
+        reply = ctx.first_reply
+        elapsed = (reply.sent_at if reply else time.perf_counter()) - started
+        # 조회 결과는 임베드로 온다. 글자만 왔으면 오류/안내 문구
+        if reply is None or reply.embed is None:
+            return elapsed, reply.content if reply else "응답 없음"
+        return elapsed, None
+
+    wall = time.perf_counter()
+    results = await asyncio.gather(*(one(i, name) for i, name in enumerate(names)))
+    wall = time.perf_counter() - wall
+
+    latencies = sorted(r[0] for r in results)
+    errors = [r[1] for r in results if r[1]]
+    return RoundResult(
+        scenario=scenario,
+        round=round_no,
+        requests=len(names),
+        errors=len(errors),
+        p50_ms=percentile(latencies, 0.5) * 1000,
+        p99_ms=percentile(latencies, 0.99) * 1000,
+        max_ms=latencies[-1] * 1000 if latencies else 0.0,
+        wall_ms=wall * 1000,
+        upstream_calls=sum(upstream.calls.values()),
+        upstream_429=sum(upstream.throttled.values()),
+        peak_inflight=upstream.peak_inflight,
+        calls_by_route=dict(sorted(upstream.calls.items())),
+        sample_error=errors[0] if errors else None,
+    )
+
+
+def print_result(r: RoundResult):
+    print(
+        f"{r.scenario:<9} 라운드 {r.round}: {r.requests}건 오류 {r.errors} | "
+        f"p50 {r.p50_ms:.1f}ms p99 {r.p99_ms:.1f}ms 최대 {r.max_ms:.1f}ms 전체 {r.wall_ms:.0f}ms | "
+        f"업스트림 {r.upstream_calls}회(429 {r.upstream_429}, 최대 동시 {r.peak_inflight})"
+    )
+    for route, n in r.calls_by_route.items():
+        print(f"    {route:<22} {n}")
+    if r.sample_error:
+        print(f"    오류 예: {r.sample_error[:200]}")
+
+
+async def main(args) -> list[RoundResult]:
+    upstream = FakeUpstream(latency=args.latency, jitter=args.jitter, rate_429=args.rate_429, retry_after=args.retry_after)
+    port = await upstream.start(port=args.port)
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    prepare_env(port, workdir)
+    import bot as botmod  # 환경 변수를 먼저 정해야 하므로 여기서 불러온다
+
+    results = []
+    try:
+        for scenario in args.scenarios:
+            # 시나리오마다 다른 이름을 써서 앞 시나리오의 캐시가 섞이지 않게 한다
+            names = [f"{scenario}{i % args.players}" for i in range(args.requests)]
+            for round_no in range(1, args.rounds + 1):
+                result = await run_round(botmod, upstream, scenario, round_no, names, args)
+                print_result(result)
+                results.append(result)
+    finally:
+        await upstream.stop()
+        if botmod.match_store is not None:
+            botmod.match_store.close()
+        botmod.watch_store.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.run", description="조회 명령 오프라인 부하 시험")
+    parser.add_argument("scenarios", nargs="*", help=f"{' / '.join(SCENARIOS)} (기본: 전부)")
+    parser.add_argument("-n", "--requests", type=int, default=100, help="라운드당 동시 요청 수")
+    parser.add_argument("-k", "--players", type=int, default=10, help="요청이 나눠 쓰는 서로 다른 플레이어 수")
+    parser.add_argument("-g", "--guilds", type=int, default=5, help="요청을 나눠 보낼 길드 수(길드별 할당량 분배 확인)")
+    parser.add_argument("-r", "--rounds", type=int, default=2, help="같은 요청을 반복할 라운드 수(2라운드부터 캐시 적중)")
+    parser.add_argument("--latency", type=float, default=0.05, help="가짜 API 응답 지연(초)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="응답 지연 흔들림(±초)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="429를 돌려줄 확률(0~1)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="429 응답의 Retry-After(초)")
+    parser.add_argument("--send-latency", type=float, default=0.0, help="디스코드 메시지 전송 지연(초)")
+    parser.add_argument("--port", type=int, default=0, help="가짜 API 서버 포트(기본: 빈 포트). 실행끼리 CACHE_DB를 나눠 쓸 때 같은 값을 준다")
+    parser.add_argument("--json", help="결과를 JSON으로 저장할 경로")
+    args = parser.parse_args(argv)
+    unknown = [s for s in args.scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"알 수 없는 시나리오: {', '.join(unknown)}")
+    args.scenarios = list(dict.fromkeys(args.scenarios)) or list(SCENARIOS)
+    return args
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.ERROR, format="%(levelname)s %(name)s: %(message)s")
+    args = parse_args()
+    results = asyncio.run(main(args))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([asdict(r) for r in results], f, ensure_ascii=False, indent=2)
+    sys.exit(1 if any(r.errors for r in results) else 0)
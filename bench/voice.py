@@ -0,0 +1,330 @@
+"""음악 재생 부하 시험: 한 호스트가 동시 음성 세션을 몇 개까지 감당하는지 본다.
+
+    python -m bench.voice -g 20 --seconds 60                  # 20개 길드, 대기열 반복(all)
+    python -m bench.voice -g 50 --mode shuffle --audio a.mp3 b.opus --json out.json
+
+길드마다 가짜 음성 클라이언트를 붙이고 실제 start_playback/handle_after 경로로 곡을 재생한다.
+FFmpeg가 로컬 HTTP로 제공되는 테스트 음원(--audio가 없으면 만들어 둔 사인파 WAV)을 Opus로 인코딩하고,
+discord.py의 AudioPlayer 스레드가 20ms마다 프레임을 넘긴다. 네트워크 전송만 빠진다.
+결과: 스트림당 CPU(봇 프로세스/FFmpeg), FFmpeg 프로세스 수, 프레임 간격 지터, 곡 전환 공백,
+메모리 증가, 반복/셔플 모드별 대기열 연산 처리량.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import shutil
+import struct
+import tempfile
+import time
+import wave
+from dataclasses import asdict, dataclass, field
+
+from aiohttp import web
+
+from bench import isolate_env, percentile
+from bench.fake_discord import FakeChannel, FakeGuild, FakeVoiceChannel, StubVoiceClient
+
+MODES = ("off", "one", "all", "shuffle")  # 반복 끔 / 한 곡 반복 / 대기열 반복 / 셔플(+대기열 반복)
+
+
+@dataclass
+class VoiceResult:
+    guilds: int
+    mode: str
+    seconds: float
+    tracks_started: int
+    frames: int
+    expected_frames: int
+    cpu_bot_pct: float  # 한 코어 기준 %
+    cpu_bot_per_stream_pct: float
+    cpu_ffmpeg_per_stream_pct: float
+    ffmpeg_procs_max: int
+    ffmpeg_procs_avg: float
+    ffmpeg_rss_mb_avg: float
+    jitter_p50_ms: float
+    jitter_p99_ms: float
+    jitter_max_ms: float
+    late_frames: int  # 예정 시각보다 20ms 넘게 늦은 프레임(한 프레임 이상 밀림)
+    gap_p50_ms: float
+    gap_max_ms: float
+    rss_start_mb: float
+    rss_end_mb: float
+    rss_peak_mb: float
+    tasks_end: int
+    queue_ops_per_sec: dict = field(default_factory=dict)
+
+
+# ---- /proc 읽기(리눅스) ----
+def _clock_ticks() -> int:
+    try:
+        return os.sysconf("SC_CLK_TCK")
+    except (ValueError, OSError, AttributeError):
+        return 100
+
+
+def rss_mb(pid: int | str = "self") -> float:
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if pid == "self":
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return 0.0
+
+
+def ffmpeg_children() -> dict[int, float]:
+    """이 프로세스가 띄운 ffmpeg의 {pid: 지금까지 쓴 CPU 초}. /proc이 없으면 빈 dict."""
+    me = os.getpid()
+    ticks = _clock_ticks()
+    out = {}
+    try:
+        pids = [p for p in os.listdir("/proc") if p.isdigit()]
+    except OSError:
+        return out
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", encoding="ascii", errors="replace") as f:
+                raw = f.read()
+        except OSError:
+            continue
+        # comm은 괄호로 감싸여 있고 공백이 들어갈 수 있다
+        comm = raw[raw.index("(") + 1 : raw.rindex(")")]
+        rest = raw[raw.rindex(")") + 2 :].split()
+        if comm != "ffmpeg" or int(rest[1]) != me:
+            continue
+        out[int(pid)] = (int(rest[11]) + int(rest[12])) / ticks
+    return out
+
+
+# ---- 테스트 음원 ----
+def make_tone(path: str, seconds: float, freq: float, rate: int = 48000):
+    """스테레오 16비트 사인파 WAV."""
+    frames = int(seconds * rate)
+    step = 2 * math.pi * freq / rate
+    with wave.open(path, "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        chunk = []
+        for i in range(frames):
+            v = int(12000 * math.sin(step * i))
+            chunk.append(struct.pack("<hh", v, v))
+            if len(chunk) >= rate:
+                w.writeframes(b"".join(chunk))
+                chunk.clear()
+        w.writeframes(b"".join(chunk))
+
+
+async def serve_audio(files: list[str]) -> tuple[web.AppRunner, list[str]]:
+    """음원을 로컬 HTTP로 제공(실제 스트림처럼 FFmpeg가 -reconnect 옵션으로 HTTP 입력을 연다)."""
+    app = web.Application()
+    names = {}
+    for i, path in enumerate(files):
+        names[f"{i}{os.path.splitext(path)[1]}"] = os.path.abspath(path)
+
+    async def handle(request):
+        path = names.get(request.match_info["name"])
+        if path is None:
+            raise web.HTTPNotFound()
+        return web.FileResponse(path)
+
+    app.router.add_get("/audio/{name}", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, [f"http://127.0.0.1:{port}/audio/{name}" for name in names]
+
+
+# ---- 대기열 연산 처리량 ----
+def queue_throughput(botmod, mode: str, size: int, seconds: float = 0.5) -> float:
+    """_start_next/handle_after가 곡마다 하는 대기열 연산(꺼내기 + 반복 모드별 되돌리기 + 저장 예약)의 초당 횟수."""
+    gid = -1000 - MODES.index(mode)  # 실제 길드와 겹치지 않는 ID
+    queue = botmod.get_queue(gid)
+    queue.clear()
+    for i in range(size):
+        queue.append({"title": f"track {i}", "url": f"http://bench/{i}", "requester_id": i % 7})
+    ops = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(200):
+            if mode == "shuffle" and len(queue) > 1:
+                track = queue.pop(random.randrange(len(queue)))
+            else:
+                track = queue.popleft()
+            if mode == "one":
+                queue.appendleft(track.copy())
+            else:
+                # off도 곡이 줄지 않도록 다시 넣는다(반복 all과 같은 비용)
+                queue.append(track)
+            botmod.save_state(gid)
+        ops += 200
+    queue.clear()
+    return ops / seconds
+
+
+# ---- 본체 ----
+async def run(args) -> VoiceResult:
+    if shutil.which("ffmpeg") is None:
+        raise SystemExit("ffmpeg를 찾을 수 없습니다. PATH에 ffmpeg를 넣고 다시 실행하세요.")
+    workdir = tempfile.mkdtemp(prefix="bench-voice-")
+    isolate_env(workdir)
+    import bot as botmod  # 환경 변수를 먼저 정해야 하므로 여기서 불러온다
+
+    files = list(args.audio)
+    if not files:
+        for i, freq in enumerate((220.0, 330.0, 440.0)):
+            path = os.path.join(workdir, f"tone{i}.wav")
+            make_tone(path, args.track_seconds, freq)
+            files.append(path)
+    audio_runner, urls = await serve_audio(files)
+
+    guilds: dict[int, FakeGuild] = {}
+    original_get_guild = botmod.bot.get_guild
+    # 패널 갱신(PanelRenderer)은 bot.get_guild로 길드를 찾으므로 가짜 길드도 보이게 한다
+    botmod.bot.get_guild = lambda gid: guilds.get(gid) or original_get_guild(gid)
+    loop = asyncio.get_running_loop()
+    try:
+        async with botmod.bot:  # bot.loop 준비(재생 종료 콜백이 사용). 로그인은 하지 않는다
+            rss_start = rss_mb()
+            rss_peak = rss_start
+            cpu_start = os.times()
+            clients: list[StubVoiceClient] = []
+            for g in range(args.guilds):
+                guild = FakeGuild(name=f"bench-{g}")
+                guilds[guild.id] = guild
+                text = FakeChannel(guild)
+                guild.system_channel = text
+                voice = StubVoiceClient(guild, FakeVoiceChannel(guild), loop)
+                clients.append(voice)
+                botmod.repeat_mode[guild.id] = "one" if args.mode == "one" else ("all" if args.mode in ("all", "shuffle") else "off")
+                botmod.shuffle_mode[guild.id] = args.mode == "shuffle"
+                queue = botmod.get_queue(guild.id)
+                for i in range(args.queue):
+                    url = urls[(g + i) % len(urls)]
+                    queue.append(
+                        {
+                            "title": f"bench {g}-{i}",
+                            "url": url,
+                            "web_url": url,
+                            "duration": args.track_seconds,
+                            "channel": text,
+                            "channel_id": text.id,
+                            "requester": "bench",
+                            "requester_id": g,
+                        }
+                    )
+            started = time.perf_counter()
+            # 한꺼번에 시작하면 FFmpeg 기동이 몰리므로 첫 1초에 고르게 흩는다
+            for i, voice in enumerate(clients):
+                loop.call_later(i / max(1, len(clients)), lambda v=voice: loop.create_task(botmod.start_playback(v.guild, v)))
+
+            procs: list[int] = []
+            ffmpeg_cpu: dict[int, float] = {}
+            ffmpeg_rss: list[float] = []
+            while time.perf_counter() - started < args.seconds:
+                await asyncio.sleep(1.0)
+                children = ffmpeg_children()
+                ffmpeg_cpu.update(children)
+                procs.append(len(children))
+                ffmpeg_rss.extend(rss_mb(pid) for pid in list(children)[:5])
+                rss_peak = max(rss_peak, rss_mb())
+            elapsed = time.perf_counter() - started
+
+            # 더 이어 재생하지 않도록 대기열과 반복을 비우고 끊는다
+            ffmpeg_cpu.update(ffmpeg_children())
+            cpu_end = os.times()
+            for voice in clients:
+                botmod.get_queue(voice.guild.id).clear()
+                botmod.repeat_mode[voice.guild.id] = "off"
+            await asyncio.gather(*(voice.disconnect() for voice in clients))
+            await asyncio.sleep(max(1.0, botmod.PANEL_DEBOUNCE + 0.5))
+            rss_end = rss_mb()
+            tasks_end = len(asyncio.all_tasks())
+
+            throughput = {mode: round(queue_throughput(botmod, mode, args.queue_ops_size)) for mode in MODES}
+    finally:
+        botmod.bot.get_guild = original_get_guild
+        await audio_runner.cleanup()
+        if botmod.match_store is not None:
+            botmod.match_store.close()
+        botmod.watch_store.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    streams = max(1, len(clients))
+    bot_cpu = (cpu_end.user + cpu_end.system) - (cpu_start.user + cpu_start.system)
+    lateness = sorted(d for c in clients for d in c.lateness)
+    gaps = sorted(g for c in clients for g in c.gaps)
+    return VoiceResult(
+        guilds=len(clients),
+        mode=args.mode,
+        seconds=round(elapsed, 1),
+        tracks_started=sum(c.plays for c in clients),
+        frames=sum(c.frames for c in clients),
+        expected_frames=int(elapsed / 0.02) * len(clients),
+        cpu_bot_pct=round(bot_cpu / elapsed * 100, 2),
+        cpu_bot_per_stream_pct=round(bot_cpu / elapsed * 100 / streams, 3),
+        cpu_ffmpeg_per_stream_pct=round(sum(ffmpeg_cpu.values()) / elapsed * 100 / streams, 3),
+        ffmpeg_procs_max=max(procs, default=0),
+        ffmpeg_procs_avg=round(sum(procs) / len(procs), 1) if procs else 0.0,
+        ffmpeg_rss_mb_avg=round(sum(ffmpeg_rss) / len(ffmpeg_rss), 1) if ffmpeg_rss else 0.0,
+        jitter_p50_ms=round(percentile(lateness, 0.5) * 1000, 2),
+        jitter_p99_ms=round(percentile(lateness, 0.99) * 1000, 2),
+        jitter_max_ms=round(lateness[-1] * 1000, 2) if lateness else 0.0,
+        late_frames=sum(1 for d in lateness if d > 0.02),
+        gap_p50_ms=round(percentile(gaps, 0.5) * 1000, 1),
+        gap_max_ms=round(gaps[-1] * 1000, 1) if gaps else 0.0,
+        rss_start_mb=round(rss_start, 1),
+        rss_end_mb=round(rss_end, 1),
+        rss_peak_mb=round(rss_peak, 1),
+        tasks_end=tasks_end,
+        queue_ops_per_sec=throughput,
+    )
+
+
+def print_result(r: VoiceResult):
+    print(f"길드 {r.guilds}개, 모드 {r.mode}, {r.seconds}초 | 곡 시작 {r.tracks_started}회, 프레임 {r.frames}/{r.expected_frames}")
+    print(
+        f"CPU(한 코어 기준): 봇 {r.cpu_bot_pct}% (스트림당 {r.cpu_bot_per_stream_pct}%), FFmpeg 스트림당 {r.cpu_ffmpeg_per_stream_pct}%"
+    )
+    print(f"FFmpeg 프로세스: 최대 {r.ffmpeg_procs_max}, 평균 {r.ffmpeg_procs_avg}, 프로세스당 RSS 약 {r.ffmpeg_rss_mb_avg}MB")
+    print(
+        f"프레임 지연(곡 첫 프레임 + n×20ms 대비): p50 {r.jitter_p50_ms}ms p99 {r.jitter_p99_ms}ms 최대 {r.jitter_max_ms}ms, "
+        f"20ms 넘게 늦은 프레임 {r.late_frames}"
+    )
+    print(f"곡 전환 공백: p50 {r.gap_p50_ms}ms 최대 {r.gap_max_ms}ms")
+    print(f"메모리(RSS): 시작 {r.rss_start_mb}MB → 끝 {r.rss_end_mb}MB (최대 {r.rss_peak_mb}MB), 남은 작업 {r.tasks_end}개")
+    print("대기열 연산/초: " + ", ".join(f"{mode} {n:,}" for mode, n in r.queue_ops_per_sec.items()))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.voice", description="음악 재생 동시 세션 부하 시험")
+    parser.add_argument("-g", "--guilds", type=int, default=10, help="동시에 재생할 길드 수")
+    parser.add_argument("-s", "--seconds", type=float, default=30.0, help="측정 시간(초)")
+    parser.add_argument("--mode", choices=MODES, default="all", help="반복/셔플 모드")
+    parser.add_argument("--audio", nargs="*", default=[], help="재생할 음원 파일(기본: 사인파 WAV 생성)")
+    parser.add_argument("--track-seconds", type=float, default=10.0, help="생성하는 음원 길이(초), 짧을수록 곡 전환이 잦다")
+    parser.add_argument("--queue", type=int, default=5, help="길드별 대기열 곡 수")
+    parser.add_argument("--queue-ops-size", type=int, default=30, help="대기열 연산 처리량을 잴 때의 대기열 길이")
+    parser.add_argument("--json", help="결과를 JSON으로 저장할 경로")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.ERROR, format="%(levelname)s %(name)s: %(message)s")
+    args = parse_args()
+    result = asyncio.run(run(args))
+    print_result(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(asdict(result), f, ensure_ascii=False, indent=2)
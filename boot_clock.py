@@ -0,0 +1,7 @@
+"""프로세스 시작 시각.
+
+bot.py가 다른 어떤 모듈보다 먼저 불러와, 모듈 로드(import)에 걸린 시간부터 시작 단계별 소요 시간을 잰다.
+"""
+import time
+
+BOOT_STARTED = time.perf_counter()
@@ -1,41 +1,155 @@
+# 시작 단계별 소요 시간 기록용. import 시간까지 재도록 가장 먼저 불러온다
+from boot_clock import BOOT_STARTED
 import os
 import asyncio
-import json
 from datetime import datetime, timedelta
 import time
 import random
 import logging
+import bisect
+import heapq
+import itertools
+import re
+import signal
+import threading
+import functools
 from typing import Dict, List, Any
-from collections import deque
-from urllib.parse import quote
+from urllib.parse import quote, urlparse, parse_qs
 
 import aiohttp
 import discord
 from discord.ext import commands
 from discord import app_commands
-import yt_dlp
+
+from guild_queue import GuildQueue
+from timer_wheel import TimerWheel
+from ratelimit import Rate, RateLimiter
+from quota import QuotaExhausted, UpstreamQuota, current_guild
+from response_cache import ResponseCache, SwrCache
+from cache import SqliteCache
+import metrics
+from metrics import DISCORD_ERRORS, DISCORD_LATENCY, QUOTA_WAIT, UPSTREAM_LATENCY, UPSTREAM_REQUESTS, YTDL_ERRORS, YTDL_LATENCY
+from command_core import CommandCore, Reply, UserError, format_age
+from match_store import MatchStore
+from watchlist import GAME_ALIASES, GAMES, WatchStore, watch_key
+from loopwatch import LoopWatch
+from profiler import SamplingProfiler
+from tracing import tracer
+from command_sync import CommandSyncer
+from sharding import parse_shard_ids, shard_for_guild
+from state_store import JsonStateBackend, JournalStateBackend, SqliteStateBackend, StatePersister
+
+# 샤딩: launcher.py가 클러스터 프로세스마다 지정한다. 단독 실행에서 SHARD_COUNT만 주면 한 프로세스가 모든 샤드를 맡는다
+SHARD_COUNT = os.getenv("SHARD_COUNT", "").strip().lower()  # 비우면 샤딩 안 함, auto면 디스코드 권장 수, 숫자면 전체 샤드 수
+SHARD_IDS = parse_shard_ids(os.getenv("SHARD_IDS", ""))  # 이 프로세스가 맡을 샤드("0-3", "0,2"), 비우면 전부
+CLUSTER_ID = int(os.getenv("CLUSTER_ID", "0"))  # 클러스터 안에서 이 프로세스 번호(0번만 슬래시 명령 동기화)
+CLUSTER_COUNT = max(1, int(os.getenv("CLUSTER_COUNT", "1")))  # 같은 토큰으로 도는 프로세스 수(외부 API 한도를 나눠 씀)
+if SHARD_IDS and not SHARD_COUNT.isdigit():
+    raise SystemExit("SHARD_IDS를 쓰려면 SHARD_COUNT에 전체 샤드 수를 숫자로 지정하세요.")
 
 # 메시지 내용 읽기 허용
 intents = discord.Intents.default()
 intents.message_content = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+
+class MinTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # 외부 API 할당량을 길드 단위로 나누기 위해 실행 중인 길드를 기록
+        current_guild.set(interaction.guild_id)
+        interaction.extras["started_at"] = time.perf_counter()
+        await load_guild_state(interaction.guild_id)
+        if interaction.command is not None:
+            profiler.label(f"/{interaction.command.qualified_name}")
+            interaction.extras["trace"] = tracer.begin(
+                f"/{interaction.command.qualified_name}", interaction.id, guild=interaction.guild_id, user=interaction.user.id
+            )
+        return True
+
+
+class MinBot(commands.AutoShardedBot if SHARD_COUNT else commands.Bot):
+    async def close(self):
+        # 종료 직전에 남은 상태 변경을 저장
+        await persister.close()
+        await super().close()
+
+
+shard_options = {"shard_count": int(SHARD_COUNT), "shard_ids": SHARD_IDS or None} if SHARD_COUNT.isdigit() else {}
+bot = MinBot(command_prefix="!", intents=intents, tree_cls=MinTree, **shard_options)
 tree = bot.tree
 synced = False  # 앱 커맨드 동기화 여부
+panel_watcher_task: asyncio.Task | None = None
+player_view: "PlayerView | None" = None  # 패널 버튼 클릭을 처리하는 단일 영구 뷰
+panel_components: "PlayerView | None" = None  # 패널 메시지에 붙이는 버튼 레이아웃(멈춘 뷰라 메시지별로 저장되지 않음)
 
 # 환경 설정
 MAX_QUEUE = int(os.getenv("MAX_QUEUE", "30"))  # 전체 대기열 제한
 MAX_PER_USER = int(os.getenv("MAX_PER_USER", "10"))  # 사용자별 대기열 제한
+QUEUE_PAGE_SIZE = 15  # 대기열 표시 한 페이지당 곡 수
+PANEL_DEBOUNCE = float(os.getenv("PANEL_DEBOUNCE", "0.75"))  # 패널 갱신 요청을 모으는 시간(초)
+PANEL_REFRESH_INTERVAL = float(os.getenv("PANEL_REFRESH_INTERVAL", "30"))  # 활성 패널 재점검 주기(초)
 ALLOWED_ROLE = os.getenv("ALLOWED_ROLE")  # 지정 시 해당 역할을 가진 유저만 제어
 VOLUME_DB = float(os.getenv("BOT_VOLUME_DB", "-22"))  # 기본 출력 게인(dB), 음량을 낮추려면 더 음수로
 STATE_FILE = os.getenv("BOT_STATE_FILE", "bot_state.json")
+STATE_BACKEND = os.getenv("STATE_BACKEND", "json").lower()  # json | journal | sqlite
+STATE_DB = os.getenv("STATE_DB", "bot_state.sqlite3")  # STATE_BACKEND=sqlite일 때 DB 파일
+STATE_IDLE_EVICT = float(os.getenv("STATE_IDLE_EVICT", "1800"))  # sqlite: 이 시간(초) 동안 안 쓴 길드 상태는 메모리에서 내림
+STATE_FLUSH_INTERVAL = float(os.getenv("STATE_FLUSH_INTERVAL", "2.0"))  # 상태 변경을 모아 저장하는 간격(초)
+JOURNAL_COMPACT_OPS = int(os.getenv("JOURNAL_COMPACT_OPS", "1000"))  # 저널 연산이 이만큼 쌓이면 스냅샷으로 압축
 CMD_COOLDOWN = float(os.getenv("CMD_COOLDOWN", "2.0"))  # 초 단위, 0이면 해제
+CMD_BURST = int(os.getenv("CMD_BURST", "3"))  # 사용자별로 연달아 쓸 수 있는 일반 명령 수
+HEAVY_COOLDOWN = float(os.getenv("HEAVY_COOLDOWN", "10"))  # 외부 API를 여러 번 부르는 명령(!lol, !fcmatch 등) 충전 간격(초), 0이면 해제
+HEAVY_BURST = int(os.getenv("HEAVY_BURST", "2"))
+GUILD_CMD_PER_MIN = int(os.getenv("GUILD_CMD_PER_MIN", "60"))  # 길드 전체 일반 명령 분당 한도, 0이면 해제
+GUILD_HEAVY_PER_MIN = int(os.getenv("GUILD_HEAVY_PER_MIN", "12"))  # 길드 전체 무거운 명령 분당 한도
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))  # 제한 상태를 기억하는 최대 버킷 수
 DELETE_COMMANDS = os.getenv("DELETE_COMMANDS", "true").lower() in ("1", "true", "yes", "on")
 QUIET_NOTICE = os.getenv("QUIET_NOTICE", "false").lower() in ("1", "true", "yes", "on")
 NEXON_API_KEY = os.getenv("NEXON_API_KEY")
 FIFA_API_KEY = os.getenv("FIFA_API_KEY")
 RIOT_API_KEY = os.getenv("RIOT_API_KEY")
+NEXON_API_BASE = os.getenv("NEXON_API_BASE", "https://open.api.nexon.com").rstrip("/")  # 벤치마크/테스트용 대체 서버 주소
+RIOT_API_BASE = os.getenv("RIOT_API_BASE", "https://{host}.api.riotgames.com").rstrip("/")  # {host}에 kr/asia 등이 들어감
 LOL_DEFAULT_REGION = os.getenv("LOL_DEFAULT_REGION", "kr").lower()
+LOL_HISTORY_DB = os.getenv("LOL_HISTORY_DB", "lol_history.sqlite3")  # 소환사별 경기 기록 저장 파일
+LOL_SYNC_BATCH = int(os.getenv("LOL_SYNC_BATCH", "20"))  # 명령 한 번에 새로 받아 올 경기 상세 최대 수
+LOL_STATS_MAX_GAMES = 100  # !lolstats 최대 집계 경기 수
+NEXON_RATE_PER_SEC = float(os.getenv("NEXON_RATE_PER_SEC", "5"))  # 넥슨 키(메이플/FC 각각) 초당 호출 한도
+NEXON_BURST = float(os.getenv("NEXON_BURST", "10"))
+RIOT_RATE_PER_SEC = float(os.getenv("RIOT_RATE_PER_SEC", "0.8"))  # 개발 키 기준 2분 100회
+RIOT_BURST = float(os.getenv("RIOT_BURST", "20"))
+GUILD_QUOTA_SHARE = float(os.getenv("GUILD_QUOTA_SHARE", "0.5"))  # 여러 길드가 동시에 기다릴 때 한 길드가 먼저 받는 한도 비율(혼자면 전체 한도)
+QUOTA_RESERVE = float(os.getenv("QUOTA_RESERVE", "0.2"))  # 남은 한도가 이 비율 아래면 캐시가 있는 요청은 캐시로 응답
+QUOTA_MAX_WAIT = float(os.getenv("QUOTA_MAX_WAIT", "8"))  # 호출 순서를 기다리는 최대 시간(초)
+QUOTA_GUILD_WEIGHTS = {
+    int(gid): float(w)
+    for gid, w in (pair.split(":", 1) for pair in os.getenv("QUOTA_GUILD_WEIGHTS", "").split(",") if ":" in pair)
+}  # "길드ID:가중치,..." 형식, 기본 가중치 1
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))  # 같은 조회를 다시 호출하지 않는 시간(초)
+RESPONSE_CACHE_STALE = float(os.getenv("RESPONSE_CACHE_STALE", "1800"))  # 한도 부족 시 대신 쓸 수 있는 캐시의 최대 나이(초)
+CACHE_DB = os.getenv("CACHE_DB")  # 지정 시 외부 API 응답을 이 SQLite 파일에도 저장해 같은 호스트의 봇 프로세스끼리(재시작 후에도) 재사용
+CACHE_DB_MAX_ENTRIES = int(os.getenv("CACHE_DB_MAX_ENTRIES", "50000"))  # 공유 캐시 최대 항목 수(넘으면 오래된 것부터 정리)
+LOOKUP_FRESH_TTL = float(os.getenv("LOOKUP_FRESH_TTL", "60"))  # 조회 결과를 갱신 없이 그대로 보여주는 시간(초)
+LOOKUP_MAX_STALE = float(os.getenv("LOOKUP_MAX_STALE", "3600"))  # 이보다 오래된 결과는 먼저 보여주지 않고 새로 조회(초)
+WATCH_DB = os.getenv("WATCH_DB", "watchlist.sqlite3")  # 관심 플레이어 목록 저장 파일
+WATCH_INTERVAL = float(os.getenv("WATCH_INTERVAL", "900"))  # 관심 플레이어 한 명을 다시 조회하는 주기(초)
+WATCH_MAX_PER_GUILD = int(os.getenv("WATCH_MAX_PER_GUILD", "10"))  # 길드당 등록 가능한 관심 플레이어 수
+WATCH_MAX_MISSES = int(os.getenv("WATCH_MAX_MISSES", "5"))  # 연속으로 이만큼 찾지 못한 관심 플레이어는 갱신을 멈춤
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 지정 시 http://METRICS_HOST:METRICS_PORT/metrics 제공
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE")  # 지정 시 이 파일에 주기적으로 지표 기록(node_exporter textfile)
+METRICS_INTERVAL = float(os.getenv("METRICS_INTERVAL", "15"))  # 지표 파일 기록 주기(초)
+LOOP_STALL_THRESHOLD = float(os.getenv("LOOP_STALL_THRESHOLD", "0.2"))  # 이보다 오래 루프가 멈추면 스택 기록(초), 0이면 끔
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")  # !profile / SIGUSR2 결과(collapsed stack) 저장 폴더
+PROFILE_SECONDS = float(os.getenv("PROFILE_SECONDS", "30"))  # 기본 프로파일링 시간(초)
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "300"))
+TRACE_FILE = os.getenv("TRACE_FILE")  # 지정 시 명령 트레이스(span)를 JSONL로 기록
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT")  # 예: http://localhost:4318/v1/traces
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "2000"))  # 이보다 오래 걸린 명령은 단계별 소요 시간을 로그로 남김, 0이면 끔
+YTDL_PRELOAD = os.getenv("YTDL_PRELOAD", "false").lower() in ("1", "true", "yes", "on")  # true면 게이트웨이 연결 후 yt-dlp를 미리 불러 둠
+COMMAND_SYNC_FILE = os.getenv("COMMAND_SYNC_FILE", "command_sync.json")  # 마지막으로 올린 슬래시 명령 정의의 해시(바뀐 경우에만 다시 동기화)
+DEV_GUILD_IDS = {int(x) for x in os.getenv("DEV_GUILD_IDS", "").split(",") if x.strip().isdigit()}  # 명령을 길드 단위로 즉시 반영할 개발 서버 ID(쉼표 구분)
+COMMAND_SYNC_CONCURRENCY = int(os.getenv("COMMAND_SYNC_CONCURRENCY", "4"))  # 동시에 올리는 동기화 범위 수
+tracer.configure(file=TRACE_FILE, otlp_endpoint=TRACE_OTLP_ENDPOINT, slow_ms=TRACE_SLOW_MS)
 
 # yt-dlp 설정 (고음질 우선, 검색 허용)
 ytdl_opts = {
@@ -51,37 +165,143 @@ ytdl_opts = {
         }
     },
 }
-ytdl = yt_dlp.YoutubeDL(ytdl_opts)
+# yt-dlp는 불러오는 데만 수백 ms와 수십 MB가 들어 처음 쓸 때(또는 준비 완료 후 뒤에서) 만든다
+_ytdl_clients: dict[str, Any] = {}
+_ytdl_lock = threading.Lock()
+
+
+def get_ytdl(flat: bool = False):
+    """flat=True: 플레이리스트/믹스 가져오기용(항목 메타데이터만 평면 추출, 스트림 주소는 재생 직전에 해석).
+    import가 오래 걸리므로 executor 스레드에서 호출한다."""
+    kind = "flat" if flat else "full"
+    client = _ytdl_clients.get(kind)
+    if client is None:
+        with _ytdl_lock:
+            client = _ytdl_clients.get(kind)
+            if client is None:
+                import yt_dlp
+
+                opts = {**ytdl_opts, "noplaylist": False, "extract_flat": "in_playlist"} if flat else ytdl_opts
+                client = _ytdl_clients[kind] = yt_dlp.YoutubeDL(opts)
+    return client
+
+
+PLAYLIST_PROGRESS_INTERVAL = 2.0  # 진행 메시지 편집 최소 간격(초)
 
 # 길드별 재생 대기열과 검색 캐시
-queues: dict[int, deque] = {}
+queues: dict[int, GuildQueue] = {}
 search_cache: dict[int, list[dict]] = {}
 current_track: dict[int, dict | None] = {}
-panels: dict[int, discord.Message] = {}
+panels: dict[int, discord.Message | discord.PartialMessage] = {}
 repeat_mode: dict[int, str] = {}  # off|one|all
 shuffle_mode: dict[int, bool] = {}
-track_messages: dict[int, discord.Message] = {}
-last_command_at: dict[int, float] = {}
+track_messages: dict[int, discord.Message | discord.PartialMessage] = {}
+prefetch_tasks: dict[int, tuple[dict, asyncio.Task]] = {}
+playback_locks: dict[int, asyncio.Lock] = {}
+panel_renderers: dict[int, "PanelRenderer"] = {}
+# 활성 패널이 있는 길드만 등록되는 재점검 타이머
+panel_wheel = TimerWheel(tick=1.0, slots=64)
+panel_wheel_wakeup = asyncio.Event()
+rate_limiter = RateLimiter(
+    {
+        ("user", "cheap"): Rate(CMD_BURST, CMD_COOLDOWN),
+        ("user", "heavy"): Rate(HEAVY_BURST, HEAVY_COOLDOWN),
+        ("guild", "cheap"): Rate(GUILD_CMD_PER_MIN, 60 / GUILD_CMD_PER_MIN) if GUILD_CMD_PER_MIN > 0 else None,
+        ("guild", "heavy"): Rate(GUILD_HEAVY_PER_MIN, 60 / GUILD_HEAVY_PER_MIN) if GUILD_HEAVY_PER_MIN > 0 else None,
+    },
+    max_keys=RATE_LIMIT_MAX_KEYS,
+)
+# 외부 API 키별 호출 한도와 응답 캐시
+# 클러스터 프로세스들이 같은 API 키를 쓰므로 한도를 프로세스 수로 나눈다
+quota_kwargs = {"guild_share": GUILD_QUOTA_SHARE, "reserve": QUOTA_RESERVE, "weights": QUOTA_GUILD_WEIGHTS}
+maple_quota = UpstreamQuota("nexon", NEXON_RATE_PER_SEC / CLUSTER_COUNT, max(1.0, NEXON_BURST / CLUSTER_COUNT), **quota_kwargs)
+fc_quota = UpstreamQuota("fconline", NEXON_RATE_PER_SEC / CLUSTER_COUNT, max(1.0, NEXON_BURST / CLUSTER_COUNT), **quota_kwargs)
+riot_quota = UpstreamQuota("riot", RIOT_RATE_PER_SEC / CLUSTER_COUNT, max(1.0, RIOT_BURST / CLUSTER_COUNT), **quota_kwargs)
+shared_cache = SqliteCache(CACHE_DB, keep=RESPONSE_CACHE_STALE, max_entries=CACHE_DB_MAX_ENTRIES) if CACHE_DB else None
+# 식별자(ocid/ouid/puuid) 조회, FC 메타, 경기 상세 등 모든 외부 API 응답이 여기를 거친다
+response_cache = ResponseCache(RESPONSE_CACHE_TTL, RESPONSE_CACHE_STALE, shared=shared_cache)
+lookup_cache = SwrCache(LOOKUP_FRESH_TTL, LOOKUP_MAX_STALE)  # 명령 단위 조회 결과(stale-while-revalidate)
+match_store = MatchStore(LOL_HISTORY_DB) if RIOT_API_KEY else None  # 롤 키가 없으면 롤 명령이 없으므로 열지 않음
+watch_store = WatchStore(WATCH_DB)  # 파일은 처음 등록할 때 만들고 그 전에는 열지 않음
+# 관심 플레이어 갱신 타이머(키: (게임, 소문자 이름)), 주기가 길어 슬롯을 넉넉히 둔다
+watch_wheel = TimerWheel(tick=1.0, slots=256)
+watch_wheel_wakeup = asyncio.Event()
+watch_refreshed: dict[tuple[str, str], float] = {}  # 마지막 갱신 성공 시각(monotonic)
+watch_failures: dict[tuple[str, str], tuple[int, int]] = {}  # 연속 (갱신 실패 수, 그중 찾지 못한 수)
+watch_task: asyncio.Task | None = None
 fc_spid_cache: list[dict] = []
 fc_season_cache: dict[int, str] = {}
 fc_position_cache: dict[int, str] = {}
 fc_spid_map: dict[int, dict] = {}
+# 선수 이름 검색용: 소문자 이름을 줄바꿈으로 이은 문자열과 각 이름의 시작 위치(fc_spid_cache 순서)
+fc_name_blob = ""
+fc_name_starts: list[int] = []
 fc_meta_loaded = False
 
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    format="%(asctime)s [%(levelname)s] " + (f"c{CLUSTER_ID} " if CLUSTER_COUNT > 1 else "") + "%(name)s: %(message)s",
 )
 logger = logging.getLogger("musicbot")
 
 
-def get_queue(guild_id: int) -> deque:
+def get_queue(guild_id: int) -> GuildQueue:
+    touch_guild(guild_id)
     if guild_id not in queues:
-        queues[guild_id] = deque()
+        queues[guild_id] = GuildQueue(listener=queue_listener(guild_id))
     return queues[guild_id]
 
 
+def set_repeat_mode(guild_id: int, mode: str):
+    touch_guild(guild_id)
+    repeat_mode[guild_id] = mode
+    if journal:
+        journal.record("rep", guild_id, mode)
+
+
+def set_shuffle_mode(guild_id: int, enabled: bool):
+    touch_guild(guild_id)
+    shuffle_mode[guild_id] = enabled
+    if journal:
+        journal.record("shuf", guild_id, enabled)
+
+
+def message_ref(msg: discord.Message | discord.PartialMessage | None) -> list[int] | None:
+    return [msg.channel.id, msg.id] if msg else None
+
+
+def rebind_message(ref) -> discord.PartialMessage | None:
+    """저장된 [채널 ID, 메시지 ID]를 조회 없이 PartialMessage로 되살린다(편집/삭제만 가능)."""
+    if not ref:
+        return None
+    try:
+        channel_id, message_id = int(ref[0]), int(ref[1])
+    except (TypeError, ValueError, IndexError):
+        return None
+    return bot.get_partial_messageable(channel_id).get_partial_message(message_id)
+
+
+def set_panel_message(guild_id: int, msg: discord.Message | discord.PartialMessage | None):
+    if msg is None:
+        panels.pop(guild_id, None)
+    else:
+        panels[guild_id] = msg
+    if journal:
+        journal.record("panel", guild_id, message_ref(msg))
+    save_state(guild_id)
+
+
+def set_track_message(guild_id: int, msg: discord.Message | discord.PartialMessage | None):
+    if msg is None:
+        track_messages.pop(guild_id, None)
+    else:
+        track_messages[guild_id] = msg
+    if journal:
+        journal.record("tmsg", guild_id, message_ref(msg))
+    save_state(guild_id)
+
+
 def clear_search(guild_id: int):
     search_cache.pop(guild_id, None)
 
@@ -142,27 +362,28 @@ def check_queue_limits(guild_id: int, user_id: int) -> str | None:
     queue = get_queue(guild_id)
     if len(queue) >= MAX_QUEUE:
         return f"대기열이 가득 찼어요. (최대 {MAX_QUEUE}곡)"
-    user_count = sum(1 for item in queue if item.get("requester_id") == user_id)
-    if user_count >= MAX_PER_USER:
+    if queue.count_for(user_id) >= MAX_PER_USER:
         return f"한 사람이 추가할 수 있는 최대 곡 수는 {MAX_PER_USER}곡이에요."
     return None
 
 
-def check_cooldown(user_id: int) -> str | None:
-    if CMD_COOLDOWN <= 0:
-        return None
-    now = time.time()
-    last = last_command_at.get(user_id, 0)
-    if now - last < CMD_COOLDOWN:
-        remaining = CMD_COOLDOWN - (now - last)
-        return f"잠시 후 다시 시도해 주세요. ({remaining:.1f}초)"
-    last_command_at[user_id] = now
+def check_cooldown(user: discord.abc.User, guild: discord.Guild | None = None, kind: str = "cheap") -> str | None:
+    """kind: "cheap"(일반) | "heavy"(외부 API를 여러 번 부르는 조회)."""
+    wait = rate_limiter.acquire(user.id, guild.id if guild else None, kind)
+    if wait > 0:
+        return f"잠시 후 다시 시도해 주세요. ({wait:.1f}초)"
     return None
 
 
+# 프리픽스/슬래시 명령이 함께 쓰는 조회 핸들러 레지스트리
+core = CommandCore(lookup_cache, check_cooldown)
+
+
+@tracer.wrap("delete_track_message")
 async def delete_track_message(guild_id: int):
-    msg = track_messages.pop(guild_id, None)
+    msg = track_messages.get(guild_id)
     if msg:
+        set_track_message(guild_id, None)
         try:
             await msg.delete()
         except Exception:
@@ -178,17 +399,66 @@ async def maybe_delete_command(message: discord.Message):
         pass
 
 
+def retry_after_seconds(resp: aiohttp.ClientResponse) -> float:
+    try:
+        return float(resp.headers.get("Retry-After", "1"))
+    except ValueError:
+        return 1.0
+
+
+async def upstream_get(
+    quota: UpstreamQuota, url: str, params: dict | None, headers: dict, *, endpoint: str, ttl: float | None = None
+) -> Any:
+    """호출 한도와 응답 캐시를 거쳐 GET. 한도가 빠듯하면 신선 기간이 지난 캐시라도 먼저 돌려준다.
+
+    endpoint는 지표 라벨용 경로(식별자를 뺀 형태)다. 돌려준 값은 응답 캐시와 같은 객체이므로 고치지 않는다.
+    """
+    labels = {"api": quota.name, "endpoint": endpoint}
+    key = (url, tuple(sorted((params or {}).items())))
+    hit = await response_cache.aget(key)
+    if hit and hit.fresh:
+        UPSTREAM_REQUESTS.inc(outcome="cache", **labels)
+        return hit.data
+    guild_id = current_guild.get()
+    if hit and quota.budget_low(guild_id):
+        UPSTREAM_REQUESTS.inc(outcome="stale", **labels)
+        return hit.data
+    try:
+        with QUOTA_WAIT.time(api=quota.name):
+            await quota.acquire(guild_id, timeout=QUOTA_MAX_WAIT)
+    except QuotaExhausted:
+        UPSTREAM_REQUESTS.inc(outcome="quota", **labels)
+        if hit:
+            return hit.data
+        raise ValueError("요청이 많아 잠시 후 다시 시도해 주세요.")
+    outcome = "error"
+    try:
+        with UPSTREAM_LATENCY.time(**labels), tracer.span("upstream", **labels):
+            async with aiohttp.ClientSession(headers=headers) as session:
+                async with session.get(url, params=params, timeout=10) as resp:
+                    if resp.status == 429:
+                        outcome = "429"
+                        quota.penalize(retry_after_seconds(resp))
+                        logger.warning("%s 호출 한도 초과(429), guild=%s", quota.name, guild_id)
+                        if hit:
+                            return hit.data
+                    if resp.status != 200:
+                        text = await resp.text()
+                        raise ValueError(f"API 오류 {resp.status}: {text}")
+                    data = await resp.json()
+                    outcome = "ok"
+    finally:
+        UPSTREAM_REQUESTS.inc(outcome=outcome, **labels)
+    response_cache.set(key, data, ttl)
+    return data
+
+
 async def nexon_get(endpoint: str, params: dict) -> dict:
     if not NEXON_API_KEY:
         raise ValueError("NEXON_API_KEY가 설정되지 않았습니다.")
     headers = {"x-nxopen-api-key": NEXON_API_KEY}
-    url = f"https://open.api.nexon.com{endpoint}"
-    async with aiohttp.ClientSession(headers=headers) as session:
-        async with session.get(url, params=params, timeout=10) as resp:
-            if resp.status != 200:
-                text = await resp.text()
-                raise ValueError(f"API 오류 {resp.status}: {text}")
-            return await resp.json()
+    url = f"{NEXON_API_BASE}{endpoint}"
+    return await upstream_get(maple_quota, url, params, headers, endpoint=endpoint)
 
 
 async def get_ocid(character_name: str) -> str:
@@ -213,13 +483,10 @@ async def fc_get(endpoint: str, params: dict) -> dict:
     if not FIFA_API_KEY:
         raise ValueError("FIFA_API_KEY가 설정되지 않았습니다.")
     headers = {"x-nxopen-api-key": FIFA_API_KEY}
-    url = f"https://open.api.nexon.com{endpoint}"
-    async with aiohttp.ClientSession(headers=headers) as session:
-        async with session.get(url, params=params, timeout=10) as resp:
-            if resp.status != 200:
-                text = await resp.text()
-                raise ValueError(f"API 오류 {resp.status}: {text}")
-            return await resp.json()
+    url = f"{NEXON_API_BASE}{endpoint}"
+    # 정적 메타데이터와 경기 상세는 바뀌지 않으므로 오래 보관
+    ttl = 86400 if endpoint.startswith(("/static/", "/fconline/v1/match-detail")) else None
+    return await upstream_get(fc_quota, url, params, headers, endpoint=endpoint, ttl=ttl)
 
 
 async def fc_get_ouid(nickname: str) -> str:
@@ -231,7 +498,7 @@ async def fc_get_ouid(nickname: str) -> str:
 
 
 async def ensure_fc_meta():
-    global fc_meta_loaded, fc_spid_cache, fc_season_cache, fc_position_cache
+    global fc_meta_loaded, fc_spid_cache, fc_spid_map, fc_season_cache, fc_position_cache, fc_name_blob, fc_name_starts
     if fc_meta_loaded and fc_spid_cache and fc_season_cache and fc_position_cache:
         return
     # spid, season 메타
@@ -240,20 +507,28 @@ async def ensure_fc_meta():
     position = await fc_get("/static/fconline/meta/spposition.json", {})
     fc_spid_cache = spid if isinstance(spid, list) else []
     fc_spid_map = {p.get("id"): p for p in fc_spid_cache if p.get("id") is not None}
+    names = [(p.get("name") or "").lower().replace("\n", " ") for p in fc_spid_cache]
+    fc_name_starts = list(itertools.accumulate((len(n) + 1 for n in names[:-1]), initial=0)) if names else []
+    fc_name_blob = "\n".join(names)
     fc_season_cache = {s.get("seasonId"): s.get("className") for s in (season or [])}
     fc_position_cache = {p.get("spposition"): p.get("desc") for p in (position or [])}
     fc_meta_loaded = True
 
 
 def find_players_by_name(keyword: str, limit: int = 5) -> list[dict]:
+    """이름에 keyword가 들어간 선수(메타 순서대로 limit명). 선수마다 소문자로 바꾸지 않고 이어 붙인 문자열에서 찾는다."""
     kw = keyword.lower()
+    if not kw:
+        return fc_spid_cache[:limit]
+    if "\n" in kw:
+        return []
     results = []
-    for p in fc_spid_cache:
-        name = p.get("name", "")
-        if kw in name.lower():
-            results.append(p)
-        if len(results) >= limit:
-            break
+    pos = fc_name_blob.find(kw)
+    while pos != -1 and len(results) < limit:
+        idx = bisect.bisect_right(fc_name_starts, pos) - 1
+        results.append(fc_spid_cache[idx])
+        nxt = fc_name_starts[idx + 1] if idx + 1 < len(fc_name_starts) else len(fc_name_blob)
+        pos = fc_name_blob.find(kw, nxt)
     return results
 
 
@@ -323,19 +598,22 @@ def resolve_riot_hosts(region: str | None) -> tuple[str, str]:
     return platform, routing
 
 
+def riot_route(path: str) -> str:
+    """지표 라벨용: 경로의 소환사/경기 식별자를 {id}로 바꿔 라벨 종류가 늘지 않게 한다."""
+    path = re.sub(r"/(by-riot-id|by-puuid|by-name|by-summoner)/.+?(?=/ids$|$)", r"/\1/{id}", path)
+    return re.sub(r"^(/lol/match/v5/matches)/[^/]+$", r"\1/{id}", path)
+
+
 async def riot_get(path: str, region: str | None, *, use_routing: bool, params: dict | None = None) -> dict:
     if not RIOT_API_KEY:
         raise ValueError("RIOT_API_KEY가 설정되지 않았습니다.")
     platform, routing = resolve_riot_hosts(region)
     host = routing if use_routing else platform
-    url = f"https://{host}.api.riotgames.com{path}"
+    url = RIOT_API_BASE.format(host=host) + path
     headers = {"X-Riot-Token": RIOT_API_KEY}
-    async with aiohttp.ClientSession(headers=headers) as session:
-        async with session.get(url, params=params, timeout=10) as resp:
-            if resp.status != 200:
-                text = await resp.text()
-                raise ValueError(f"API 오류 {resp.status}: {text}")
-            return await resp.json()
+    # 끝난 경기 상세는 바뀌지 않으므로 오래 보관
+    ttl = 86400 if path.startswith("/lol/match/v5/matches/") and not path.endswith("/ids") else None
+    return await upstream_get(riot_quota, url, params, headers, endpoint=riot_route(path), ttl=ttl)
 
 
 def kda_text(kills: int, deaths: int, assists: int) -> str:
@@ -358,31 +636,45 @@ def format_match_line(match: dict) -> str:
 
 
 def parse_match_detail(detail: dict, puuid: str) -> dict | None:
+    """경기 상세에서 해당 소환사의 한 줄 기록(저장용)만 뽑는다."""
     info = detail.get("info") or {}
     meta = detail.get("metadata") or {}
     participants = info.get("participants") or []
     me = next((p for p in participants if p.get("puuid") == puuid), None)
-    if not me:
+    if not me or not meta.get("matchId"):
         return None
-    queue_id = info.get("queueId")
-    duration_s = info.get("gameDuration") or 0
-    mins, secs = divmod(int(duration_s), 60)
-    duration_text = f"{mins}분 {secs:02d}초"
     return {
         "match_id": meta.get("matchId"),
-        "queue_id": queue_id,
-        "queue_name": QUEUE_NAME.get(queue_id, str(queue_id) if queue_id else "알 수 없음"),
+        "game_start": int(info.get("gameStartTimestamp") or info.get("gameCreation") or 0),
+        "queue_id": info.get("queueId"),
         "champion": me.get("championName") or "챔피언",
         "kills": me.get("kills", 0),
         "deaths": me.get("deaths", 0),
         "assists": me.get("assists", 0),
-        "kda": kda_text(me.get("kills", 0), me.get("deaths", 0), me.get("assists", 0)),
         "win": bool(me.get("win")),
-        "duration_text": duration_text,
+        "duration": int(info.get("gameDuration") or 0),
     }
 
 
-async def fetch_lol_recent(summoner_name: str, region: str | None = None) -> dict:
+def match_summary(row: dict) -> dict:
+    """저장된 경기 행에 표시용 값(큐 이름/KDA/경기 시간)을 붙인다."""
+    queue_id = row.get("queue_id")
+    mins, secs = divmod(int(row.get("duration") or 0), 60)
+    return {
+        **row,
+        "win": bool(row.get("win")),
+        "queue_name": QUEUE_NAME.get(queue_id, str(queue_id) if queue_id else "알 수 없음"),
+        "kda": kda_text(row.get("kills", 0), row.get("deaths", 0), row.get("assists", 0)),
+        "duration_text": f"{mins}분 {secs:02d}초",
+    }
+
+
+async def store_call(func, *args):
+    """SQLite 저장소 호출을 이벤트 루프 밖에서 실행."""
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args))
+
+
+async def resolve_lol_account(summoner_name: str, region: str | None = None) -> dict:
     platform, routing = resolve_riot_hosts(region)
     game_name = summoner_name
     tag_line = None
@@ -406,33 +698,135 @@ async def fetch_lol_recent(summoner_name: str, region: str | None = None) -> dic
         puuid = summoner.get("puuid")
         if not puuid:
             raise ValueError("소환사 정보를 찾지 못했습니다.")
+    return {
+        "platform": platform,
+        "routing": routing,
+        "summoner": summoner,
+        "puuid": puuid,
+        "riot_id": {"name": game_name, "tag": tag_line} if tag_line else None,
+    }
+
+
+async def fetch_match_rows(match_ids: list[str], puuid: str, routing: str) -> list[dict | None]:
+    """경기 상세를 동시에 받아 저장용 행으로 바꾼다(호출 순서는 할당량이 조절). 실패한 자리는 None."""
+    details = await asyncio.gather(
+        *(riot_get(f"/lol/match/v5/matches/{mid}", routing, use_routing=True) for mid in match_ids),
+        return_exceptions=True,
+    )
+    return [None if isinstance(d, Exception) else parse_match_detail(d, puuid) for d in details]
+
+
+def contiguous_rows(rows: list[dict | None]) -> list[dict]:
+    """앞에서부터 실패(None) 없이 이어지는 행만. 저장 구간 중간이 비지 않게 한다."""
+    keep = []
+    for row in rows:
+        if row is None:
+            break
+        keep.append(row)
+    return keep
+
+
+async def sync_lol_history(puuid: str, routing: str, want: int) -> tuple[int, int] | None:
+    """새 경기를 최신 쪽부터 받아 저장하고, 남은 빈 구간과 want보다 모자란 과거 쪽을 차례로 채운다.
+
+    한 번에 받는 경기 상세는 LOL_SYNC_BATCH개까지다. 새 경기가 그보다 많이 쌓였으면 최신 경기부터 저장하고
+    저장된 마지막 경기와의 사이를 빈 구간(gap)으로 남겨, 다음 조회부터 그 구간을 최근 쪽부터 채운다.
+    어느 쪽이든 실패 없이 이어지는 만큼만 저장한다. 채우지 못한 빈 구간(없으면 None)을 반환.
+    """
+    ids_path = f"/lol/match/v5/matches/by-puuid/{puuid}/ids"
+    state = await store_call(match_store.sync_state, puuid)
+    gap = state["gap"]
+    budget = LOL_SYNC_BATCH
+
+    async def fetch_unknown(params: dict) -> tuple[list[str], dict[str, int], list[str], list[dict]]:
+        """(목록, 그중 저장된 ID -> 시작 시각, 저장 안 된 ID, 새로 저장할 행(최신순))."""
+        ids = await riot_get(ids_path, routing, use_routing=True, params=params) or []
+        known = await store_call(match_store.known_ids, puuid, ids)
+        unknown = [mid for mid in ids if mid not in known]
+        rows = contiguous_rows(await fetch_match_rows(unknown[:budget], puuid, routing)) if unknown else []
+        return ids, known, unknown, rows
+
+    if state["count"]:
+        # 저장된 마지막 경기 이후(목록은 최신순). 한 쪽(100개)에 다 담기지 않으면 나머지는 빈 구간으로 남는다
+        ids, _, unknown, rows = await fetch_unknown({"start": 0, "count": 100, "startTime": state["newest"] // 1000})
+        budget -= min(len(unknown), budget)
+        if rows:
+            if len(rows) < len(unknown) or len(ids) == 100:
+                # 기존 빈 구간이 있으면 합친다(사이에 저장된 경기는 채울 때 known_ids로 걸러진다)
+                gap = (gap[0] if gap else state["newest"], rows[-1]["game_start"])
+            await store_call(match_store.add, puuid, rows, None, gap)
+            state["count"] += len(rows)
+
+    if gap and budget > 0:
+        before = gap
+        ids, known, unknown, rows = await fetch_unknown(
+            {"start": 0, "count": 100, "startTime": gap[0] // 1000, "endTime": gap[1] // 1000}
+        )
+        budget -= min(len(unknown), budget)
+        if len(rows) == len(unknown) and len(ids) < 100:
+            gap = None
+        elif rows:
+            gap = (gap[0], rows[-1]["game_start"])
+        elif not unknown and known:
+            # 합쳐진 구간 위쪽이 이미 저장된 경기로만 한 쪽을 채웠으면 그 아래로 내려간다
+            gap = (gap[0], min(known.values()))
+        if gap != before:
+            await store_call(match_store.add, puuid, rows, None, gap)
+            state["count"] += len(rows)
+
+    need = min(want, LOL_STATS_MAX_GAMES) - state["count"]
+    if need > 0 and budget > 0 and not state["exhausted"]:
+        count = min(100, need)
+        params = {"start": 0, "count": count}
+        if state["count"]:
+            params["endTime"] = state["oldest"] // 1000 - 1
+        older = await riot_get(ids_path, routing, use_routing=True, params=params)
+        older = older or []
+        keep = contiguous_rows(await fetch_match_rows(older[:budget], puuid, routing))
+        exhausted = len(older) < count and len(keep) == len(older)
+        if keep or exhausted:
+            await store_call(match_store.add, puuid, keep, exhausted, gap)
+    return gap
+
+
+async def gap_note(puuid: str, gap: tuple[int, int] | None, games: int) -> str | None:
+    """최근 games경기 안에 빈 구간 아래의 경기가 섞여 있으면 안내 문구."""
+    if gap is None or await store_call(match_store.count_since, puuid, gap[1]) >= games:
+        return None
+    return "새 경기가 많이 쌓여 중간 경기 일부를 아직 받지 못했습니다. 다시 조회하면 이어서 채웁니다."
+
+
+async def fetch_lol_recent(summoner_name: str, region: str | None = None) -> dict:
+    account = await resolve_lol_account(summoner_name, region)
+    platform, routing, summoner, puuid = account["platform"], account["routing"], account["summoner"], account["puuid"]
 
     summoner_id = summoner.get("id")
     ranks = await riot_get(f"/lol/league/v4/entries/by-summoner/{summoner_id}", platform, use_routing=False)
     rank_solo = next((r for r in (ranks or []) if r.get("queueType") == "RANKED_SOLO_5x5"), None)
     rank_flex = next((r for r in (ranks or []) if r.get("queueType") == "RANKED_FLEX_SR"), None)
 
-    match_ids = await riot_get(f"/lol/match/v5/matches/by-puuid/{puuid}/ids", routing, use_routing=True, params={"start": 0, "count": 5})
-    summaries = []
-    for mid in (match_ids or [])[:5]:
-        try:
-            detail = await riot_get(f"/lol/match/v5/matches/{mid}", routing, use_routing=True)
-            parsed = parse_match_detail(detail, puuid)
-            if parsed:
-                summaries.append(parsed)
-        except Exception as exc:
-            summaries.append({"match_id": mid, "win": False, "queue_name": "조회 실패", "champion": str(exc), "kills": 0, "deaths": 0, "assists": 0, "kda": "?", "duration_text": "-"})
+    # 새 경기만 받아 저장한 뒤 최근 5경기는 저장소에서 읽는다
+    gap = await sync_lol_history(puuid, routing, want=5)
+    rows = await store_call(match_store.recent, puuid, 5)
 
     return {
         "platform": platform,
         "summoner": summoner,
         "rank_solo": rank_solo,
         "rank_flex": rank_flex,
-        "riot_id": {"name": game_name, "tag": tag_line} if tag_line else None,
-        "matches": summaries,
+        "riot_id": account["riot_id"],
+        "matches": [match_summary(r) for r in rows],
+        "partial": await gap_note(puuid, gap, len(rows)),
     }
 
 
+async def fetch_lol_stats(summoner_name: str, games: int, region: str | None = None) -> dict:
+    account = await resolve_lol_account(summoner_name, region)
+    gap = await sync_lol_history(account["puuid"], account["routing"], want=games)
+    stats = await store_call(match_store.aggregate, account["puuid"], games)
+    return {**account, "games": games, "stats": stats, "partial": await gap_note(account["puuid"], gap, stats["games"])}
+
+
 def format_rank_line(entry: dict | None, label: str) -> str:
     if not entry:
         return f"{label}: 기록 없음"
@@ -446,7 +840,7 @@ def format_rank_line(entry: dict | None, label: str) -> str:
     return f"{label}: {tier} {div} {lp}LP | {wins}승 {losses}패 ({wr})"
 
 
-def build_lol_embed(summary: dict) -> discord.Embed:
+def build_lol_reply(summary: dict) -> Reply:
     summoner = summary.get("summoner", {})
     riot_id = summary.get("riot_id")
     matches = summary.get("matches", [])
@@ -476,97 +870,395 @@ def build_lol_embed(summary: dict) -> discord.Embed:
     else:
         recent_summary = "최근 경기 기록 없음"
 
-    embed = discord.Embed(
+    reply = Reply(
         title=f"{display_name} 전적 요약 ({platform.upper()})",
         description=f"소환사 레벨: {level}\n[OP.GG 바로가기]({opgg_link})",
         color=0x5865F2,
     )
-    embed.add_field(name="최근 5경기 요약", value=recent_summary, inline=False)
-    embed.add_field(name="랭크", value=f"{format_rank_line(rank_solo, '솔로 랭크')}\n{format_rank_line(rank_flex, '자유 랭크')}", inline=False)
+    if summary.get("partial"):
+        reply.description += f"\n{summary['partial']}"
+    reply.add_field("최근 5경기 요약", recent_summary, inline=False)
+    reply.add_field("랭크", f"{format_rank_line(rank_solo, '솔로 랭크')}\n{format_rank_line(rank_flex, '자유 랭크')}", inline=False)
 
     if matches:
         lines = [f"{idx+1}) {format_match_line(m)}" for idx, m in enumerate(matches[:5])]
-        embed.add_field(name="최근 5경기", value="\n".join(lines), inline=False)
+        reply.add_field("최근 5경기", "\n".join(lines), inline=False)
     else:
-        embed.add_field(name="최근 5경기", value="경기 기록을 찾지 못했습니다.", inline=False)
-    return embed
+        reply.add_field("최근 5경기", "경기 기록을 찾지 못했습니다.", inline=False)
+    return reply
 
 
-def save_state():
-    data = {
-        "queues": {},
-        "repeat_mode": repeat_mode,
-        "shuffle_mode": shuffle_mode,
+def serialize_track(item: dict) -> dict:
+    return {
+        "title": item.get("title"),
+        "url": item.get("url"),
+        "web_url": item.get("web_url"),
+        "duration": item.get("duration"),
+        "thumbnail": item.get("thumbnail"),
+        "requester": item.get("requester"),
+        "requester_id": item.get("requester_id"),
+        "channel_id": item.get("channel_id"),
     }
+
+
+def collect_state(dirty: set) -> dict:
+    """저장용 스냅샷(이벤트 루프에서 호출). 바뀐 길드의 대기열만 다시 직렬화한다."""
+    refresh_all = None in dirty
     for gid, q in queues.items():
-        serial = []
-        for item in q:
-            serial.append(
-                {
-                    "title": item.get("title"),
-                    "url": item.get("url"),
-                    "web_url": item.get("web_url"),
-                    "duration": item.get("duration"),
-                    "thumbnail": item.get("thumbnail"),
-                    "requester": item.get("requester"),
-                    "requester_id": item.get("requester_id"),
-                    "channel_id": item.get("channel_id"),
-                }
-            )
-        data["queues"][gid] = serial
-    try:
-        with open(STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    except Exception as exc:
-        logger.warning("Failed to save state: %s", exc)
+        if refresh_all or gid in dirty or gid not in queue_snapshots:
+            queue_snapshots[gid] = [serialize_track(item) for item in q]
+    for gid in [g for g in queue_snapshots if g not in queues]:
+        queue_snapshots.pop(gid, None)
+    return {
+        "queues": dict(queue_snapshots),
+        "repeat_mode": dict(repeat_mode),
+        "shuffle_mode": dict(shuffle_mode),
+        "panels": {gid: message_ref(msg) for gid, msg in panels.items()},
+        "track_messages": {gid: message_ref(msg) for gid, msg in track_messages.items()},
+    }
+
+
+def save_state(guild_id: int | None = None):
+    """상태 저장 예약. 실제 쓰기는 StatePersister가 백그라운드에서 모아서 처리한다."""
+    with tracer.span("save_state"):
+        persister.mark_dirty(guild_id)
+
+
+def _int_keys(raw: dict) -> dict:
+    out = {}
+    for key, value in (raw or {}).items():
+        try:
+            out[int(key)] = value
+        except (TypeError, ValueError):
+            continue
+    return out
 
 
 def load_state():
-    if not os.path.exists(STATE_FILE):
-        return
     try:
-        with open(STATE_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = state_backend.load()
     except Exception as exc:
         logger.warning("Failed to load state: %s", exc)
         return
-    repeat_mode.update(data.get("repeat_mode", {}))
-    shuffle_mode.update(data.get("shuffle_mode", {}))
-    for gid_str, items in (data.get("queues") or {}).items():
-        try:
-            gid = int(gid_str)
-        except Exception:
+    if not data:
+        return
+    repeat_mode.update(_int_keys(data.get("repeat_mode")))
+    shuffle_mode.update(_int_keys(data.get("shuffle_mode")))
+    for gid, items in _int_keys(data.get("queues")).items():
+        queues[gid] = GuildQueue(items, listener=queue_listener(gid))
+    for store, key in ((panels, "panels"), (track_messages, "track_messages")):
+        for gid, ref in _int_keys(data.get(key)).items():
+            msg = rebind_message(ref)
+            if msg:
+                store[gid] = msg
+
+
+def queue_listener(guild_id: int):
+    """저널 백엔드일 때 대기열 변경을 연산 단위로 기록하는 콜백."""
+    if not journal:
+        return None
+
+    def record(kind: str, *args):
+        if kind == "ins":
+            args = (args[0], serialize_track(args[1]))
+        journal.record(kind, guild_id, *args)
+
+    return record
+
+
+def collect_journal(dirty: set) -> dict:
+    return journal.payload(lambda: collect_state({None}))
+
+
+def collect_rows(dirty: set) -> dict[int, dict]:
+    """SQLite 백엔드용: 바뀐(그리고 메모리에 올라와 있는) 길드의 행만 만든다."""
+    targets = loaded_guilds if None in dirty else dirty
+    rows = {}
+    for gid in targets:
+        if gid is None or gid not in loaded_guilds:
             continue
-        dq = deque()
-        for item in items:
-            dq.append(item)
-        queues[gid] = dq
+        q = queues.get(gid)
+        panel = panels.get(gid)
+        notice = track_messages.get(gid)
+        rows[gid] = {
+            "queue": [serialize_track(item) for item in q] if q else [],
+            "repeat_mode": repeat_mode.get(gid),
+            "shuffle": shuffle_mode.get(gid, False),
+            "panel_channel_id": panel.channel.id if panel else None,
+            "panel_message_id": panel.id if panel else None,
+            "track_channel_id": notice.channel.id if notice else None,
+            "track_message_id": notice.id if notice else None,
+        }
+    return rows
+
+
+def touch_guild(guild_id: int):
+    """지연 로딩 백엔드(sqlite)면 길드를 쓴 시각을 남긴다(유휴 정리 기준). 행 읽기는 load_guild_state가 맡는다."""
+    if STATE_LAZY:
+        guild_last_used[guild_id] = time.monotonic()
+
+
+async def load_guild_state(guild_id: int | None):
+    """지연 로딩 백엔드(sqlite)면 길드 상태를 처음 쓸 때 그 길드 행만 executor에서 읽어 온다(명령/버튼 진입 시 호출).
+
+    읽기에 실패하면 로드된 길드로 표시하지 않는다. collect_rows는 로드된 길드만 저장하므로 빈 메모리 상태가
+    저장된 행을 덮어쓰지 않고, 다음 명령에서 다시 읽는다.
+    """
+    if not STATE_LAZY or guild_id is None:
+        return
+    touch_guild(guild_id)
+    if guild_id in loaded_guilds:
+        return
+    # 같은 길드의 명령이 동시에 들어와도 행은 한 번만 읽는다
+    task = guild_loads.get(guild_id)
+    if task is None:
+        task = guild_loads[guild_id] = asyncio.ensure_future(store_call(state_backend.load_guild, guild_id))
+        task.add_done_callback(lambda _: guild_loads.pop(guild_id, None))
+    try:
+        row = await asyncio.shield(task)
+    except Exception as exc:
+        logger.warning("Failed to load state for guild %s: %s", guild_id, exc)
+        return
+    if guild_id in loaded_guilds:
+        return
+    if row:
+        apply_guild_row(guild_id, row)
+    loaded_guilds.add(guild_id)
 
 
+def apply_guild_row(guild_id: int, row: dict):
+    """저장된 행을 메모리에 올린다. 읽기 실패 뒤 다시 읽은 경우 그사이 메모리에 생긴 값을 우선한다."""
+    if row["queue"] and not queues.get(guild_id):
+        queues[guild_id] = GuildQueue(row["queue"], listener=queue_listener(guild_id))
+    if row.get("repeat_mode"):
+        repeat_mode.setdefault(guild_id, row["repeat_mode"])
+    if row.get("shuffle"):
+        shuffle_mode.setdefault(guild_id, True)
+    for store, prefix in ((panels, "panel"), (track_messages, "track")):
+        msg = rebind_message([row.get(f"{prefix}_channel_id"), row.get(f"{prefix}_message_id")])
+        if msg and guild_id not in store:
+            store[guild_id] = msg
+
+
+def evict_guild(guild_id: int):
+    for store in (queues, repeat_mode, shuffle_mode, search_cache, current_track, panel_renderers, prefetch_tasks, playback_locks, queue_snapshots, guild_last_used):
+        store.pop(guild_id, None)
+    loaded_guilds.discard(guild_id)
+
+
+async def state_evictor():
+    """오래 쓰지 않은 길드 상태를 저장 후 메모리에서 내린다(sqlite 백엔드 전용)."""
+    while not bot.is_closed():
+        await asyncio.sleep(max(STATE_IDLE_EVICT / 4, 30))
+        await persister.flush()
+        now = time.monotonic()
+        for gid in list(loaded_guilds):
+            if now - guild_last_used.get(gid, 0) < STATE_IDLE_EVICT:
+                continue
+            guild = bot.get_guild(gid)
+            if (guild and guild.voice_client) or current_track.get(gid) or gid in panels or persister.is_dirty(gid):
+                continue
+            evict_guild(gid)
+
+
+loaded_guilds: set[int] = set()
+guild_loads: dict[int, asyncio.Future] = {}
+guild_last_used: dict[int, float] = {}
+if CLUSTER_COUNT > 1 and STATE_BACKEND != "sqlite":
+    # json/journal은 파일 하나를 통째로 쓰므로 여러 프로세스가 서로 덮어쓴다. 길드별 행으로 저장하는 sqlite만 나눠 쓸 수 있다
+    logger.warning("클러스터 실행(CLUSTER_COUNT=%d)에서는 STATE_BACKEND=%s 대신 sqlite를 씁니다.", CLUSTER_COUNT, STATE_BACKEND)
+    STATE_BACKEND = "sqlite"
+if STATE_BACKEND == "journal":
+    journal: JournalStateBackend | None = JournalStateBackend(STATE_FILE, compact_every=JOURNAL_COMPACT_OPS)
+    state_backend = journal
+    persister = StatePersister(journal, collect_journal, interval=STATE_FLUSH_INTERVAL)
+elif STATE_BACKEND == "sqlite":
+    journal = None
+    state_backend = SqliteStateBackend(STATE_DB)
+    persister = StatePersister(state_backend, collect_rows, interval=STATE_FLUSH_INTERVAL)
+    # 처음 전환할 때 기존 JSON 상태를 한 번 옮겨 온다(클러스터에서는 먼저 뜨는 0번만)
+    if CLUSTER_ID == 0 and state_backend.is_empty() and os.path.exists(STATE_FILE):
+        try:
+            state_backend.import_snapshot(JsonStateBackend(STATE_FILE).load() or {})
+        except Exception as exc:
+            logger.warning("Failed to import %s into %s: %s", STATE_FILE, STATE_DB, exc)
+else:
+    journal = None
+    state_backend = JsonStateBackend(STATE_FILE)
+    persister = StatePersister(state_backend, collect_state, interval=STATE_FLUSH_INTERVAL)
+queue_snapshots: dict[int, list[dict]] = {}
+STATE_LAZY = getattr(state_backend, "lazy", False)
+
 # 초기 상태 로드
 load_state()
 
 
+def instrument_discord_http(http):
+    """디스코드 REST 호출마다 걸린 시간과 실패를 라우트(식별자 없는 경로 템플릿) 단위로 기록."""
+    original = http.request
+
+    async def request(route, **kwargs):
+        labels = {"method": route.method, "route": route.path}
+        started = time.perf_counter()
+        try:
+            return await original(route, **kwargs)
+        except discord.HTTPException as exc:
+            DISCORD_ERRORS.inc(status=str(exc.status), **labels)
+            raise
+        except Exception:
+            DISCORD_ERRORS.inc(status="error", **labels)
+            raise
+        finally:
+            DISCORD_LATENCY.observe(time.perf_counter() - started, **labels)
+
+    http.request = request
+
+
+def queue_gauges() -> dict[tuple, float]:
+    return {("tracks",): sum(len(q) for q in queues.values()), ("guilds",): sum(1 for q in queues.values() if q)}
+
+
+metrics.registry.gauge("bot_music_queue", "대기열 곡 수(tracks)와 대기열이 있는 서버 수(guilds)", ("kind",), fn=queue_gauges)
+metrics.registry.gauge("bot_voice_clients", "연결된 음성 클라이언트 수", fn=lambda: len(bot.voice_clients))
+metrics.registry.gauge("bot_guilds", "참여 중인 서버 수", fn=lambda: len(bot.guilds))
+metrics.registry.gauge(
+    "bot_shard_latency_seconds",
+    "샤드별 게이트웨이 하트비트 지연",
+    ("shard",),
+    fn=lambda: {(str(shard_id),): shard.latency for shard_id, shard in getattr(bot, "shards", {}).items()},
+)
+metrics.registry.gauge(
+    "bot_cache_hit_ratio",
+    "캐시 신선 적중 비율",
+    ("cache",),
+    fn=lambda: {
+        ("lookup",): lookup_cache.hit_ratio(),
+        ("response",): response_cache.hit_ratio(),
+        **({("shared",): response_cache.shared_hit_ratio()} if shared_cache else {}),
+    },
+)
+metrics.registry.gauge(
+    "bot_cache_entries", "캐시 항목 수", ("cache",), fn=lambda: {("lookup",): len(lookup_cache), ("response",): len(response_cache)}
+)
+metrics.registry.gauge(
+    "bot_upstream_quota_pending",
+    "호출 한도 대기 중인 요청 수",
+    ("api",),
+    fn=lambda: {(q.name,): q.pending() for q in (maple_quota, fc_quota, riot_quota)},
+)
+metrics.registry.gauge("bot_event_loop_tasks", "이벤트 루프의 작업 수", fn=lambda: len(asyncio.all_tasks()))
+loop_watch = LoopWatch(threshold=LOOP_STALL_THRESHOLD)
+profiler = SamplingProfiler(PROFILE_DIR)
+command_syncer = CommandSyncer(tree, COMMAND_SYNC_FILE, DEV_GUILD_IDS, COMMAND_SYNC_CONCURRENCY)
+
+
+async def run_profile(seconds: float) -> str:
+    """프로파일링 후 결과 요약 문구. 실행 중이면 RuntimeError."""
+    seconds = max(1.0, min(seconds, PROFILE_MAX_SECONDS))
+    path, tags = await profiler.run(seconds)
+    total = sum(tags.values()) or 1
+    top = ", ".join(f"{tag} {n * 100 / total:.0f}%" for tag, n in tags.most_common(5))
+    return f"{seconds:g}초 프로파일 저장: `{path}`\n샘플 비중: {top or '없음'}"
+
+
+def on_profile_signal():
+    async def runner():
+        try:
+            logger.info(await run_profile(PROFILE_SECONDS))
+        except RuntimeError as exc:
+            logger.info("%s", exc)
+
+    bot.loop.create_task(runner())
+
+
+metrics.registry.gauge("bot_event_loop_lag_quantile_seconds", "최근 이벤트 루프 지연 백분위", ("quantile",), fn=loop_watch.percentiles)
+
+
+@bot.event
+async def setup_hook():
+    global player_view, panel_components
+    player_view = PlayerView()
+    bot.add_view(player_view)
+    panel_components = PlayerView()
+    panel_components.stop()
+    persister.start()
+    tracer.start()
+    if STATE_LAZY:
+        bot.loop.create_task(state_evictor())
+    instrument_discord_http(bot.http)
+    if hasattr(signal, "SIGUSR2"):
+        try:
+            # kill -USR2 <pid>로 재시작 없이 PROFILE_SECONDS 동안 프로파일링
+            bot.loop.add_signal_handler(signal.SIGUSR2, on_profile_signal)
+        except (NotImplementedError, RuntimeError):
+            pass
+    if LOOP_STALL_THRESHOLD > 0:
+        loop_watch.start()
+    if METRICS_PORT:
+        try:
+            await metrics.serve(METRICS_HOST, METRICS_PORT)
+        except OSError as exc:
+            logger.warning("지표 서버 시작 실패(%s:%s): %s", METRICS_HOST, METRICS_PORT, exc)
+    if METRICS_TEXTFILE:
+        bot.loop.create_task(metrics.textfile_writer(METRICS_TEXTFILE, METRICS_INTERVAL))
+    record_startup("login")
+
+
+async def sync_commands(force: bool = False) -> dict[str, str]:
+    results = await command_syncer.sync(bot.application_id, force=force)
+    changed = {scope: r for scope, r in results.items() if r != "unchanged"}
+    logger.info("슬래시 명령 동기화: %s", changed or "변경 없음")
+    return results
+
+
 @bot.event
 async def on_ready():
     global synced
     if not synced:
-        for g in bot.guilds:
-            await tree.sync(guild=g)
-        try:
-            await tree.sync()
-        except Exception:
-            pass
+        # 명령 정의가 바뀐 범위만 뒤에서 올린다(시작과 패널 점검을 막지 않음)
         synced = True
-    # 패널 상태 주기적 검사 시작
-    bot.loop.create_task(panel_watcher())
+        record_startup("ready")
+        if CLUSTER_ID == 0:
+            # 명령 트리는 애플리케이션 단위라 클러스터에서 한 프로세스만 올린다
+            bot.loop.create_task(sync_commands())
+        if YTDL_PRELOAD:
+            # 첫 !play가 yt-dlp 로딩을 기다리지 않도록 연결된 뒤 스레드에서 미리 만든다
+            bot.loop.run_in_executor(None, get_ytdl)
+    # 활성 패널 재점검 루프 시작(재연결로 on_ready가 다시 와도 하나만 유지)
+    global panel_watcher_task
+    if panel_watcher_task is None or panel_watcher_task.done():
+        panel_watcher_task = bot.loop.create_task(panel_watcher())
+        # 재시작 전에 남아 있던 패널은 한꺼번에 건드리지 않고 나눠서 한 번씩 점검
+        for i, guild_id in enumerate(list(panels)):
+            panel_wheel.schedule(guild_id, 5 + i % 60)
+        panel_wheel_wakeup.set()
+    global watch_task
+    if watch_task is None or watch_task.done():
+        watch_task = bot.loop.create_task(watch_refresher())
     print(f"Logged in as {bot.user} (ID: {bot.user.id})")
 
 
 @bot.before_invoke
 async def delete_prefix_command_message(ctx):
-    """모든 프리픽스 명령 호출 메시지를 설정에 따라 삭제."""
+    """모든 프리픽스 명령 호출 메시지를 설정에 따라 삭제하고, 할당량 계산용으로 실행 길드를 기록."""
+    current_guild.set(ctx.guild.id if ctx.guild else None)
+    ctx.started_at = time.perf_counter()
+    profiler.label(f"!{ctx.command.qualified_name}")
+    ctx.trace = tracer.begin(f"!{ctx.command.qualified_name}", ctx.message.id, guild=ctx.guild.id if ctx.guild else None, user=ctx.author.id)
     bot.loop.create_task(maybe_delete_command(ctx.message))
+    await load_guild_state(ctx.guild.id if ctx.guild else None)
+
+
+@bot.after_invoke
+async def record_prefix_command(ctx):
+    started = getattr(ctx, "started_at", None)
+    if started is None:
+        return
+    name = ctx.command.qualified_name
+    tracer.end(getattr(ctx, "trace", None), "failed" if ctx.command_failed else None)
+    metrics.COMMAND_LATENCY.observe(time.perf_counter() - started, command=name, surface="prefix")
+    if ctx.command_failed:
+        metrics.COMMAND_ERRORS.inc(command=name, surface="prefix")
 
 
 @bot.command()
@@ -574,11 +1266,35 @@ async def ping(ctx):
     await ctx.send("pong!")
 
 
+@bot.command(name="profile")
+async def profile_cmd(ctx, seconds: float = PROFILE_SECONDS):
+    """봇 소유자 전용: seconds 동안 샘플링 프로파일링 후 collapsed-stack 파일을 저장."""
+    if not await bot.is_owner(ctx.author):
+        return await ctx.send("봇 소유자만 사용할 수 있어요.")
+    if profiler.running:
+        return await ctx.send("이미 프로파일링 중이에요.")
+    await ctx.send(f"{min(max(seconds, 1), PROFILE_MAX_SECONDS):g}초 동안 프로파일링합니다.")
+    try:
+        await ctx.send(await run_profile(seconds))
+    except RuntimeError as exc:
+        await ctx.send(str(exc))
+
+
+@bot.command(name="synccommands")
+async def sync_commands_cmd(ctx):
+    """봇 소유자 전용: 저장된 해시와 관계없이 슬래시 명령을 다시 동기화."""
+    if not await bot.is_owner(ctx.author):
+        return await ctx.send("봇 소유자만 사용할 수 있어요.")
+    results = await sync_commands(force=True)
+    failed = [scope for scope, r in results.items() if r == "failed"]
+    await ctx.send(f"동기화 실패: {', '.join(failed)}" if failed else f"슬래시 명령을 다시 동기화했어요. ({len(results)}개 범위)")
+
+
 @bot.command(name="helpme")
 async def help_cmd(ctx):
     text = (
         "▶ 음악\n"
-        f"- !p / !play <링크|검색어> (슬래시 /play도 가능). 대기열 {MAX_QUEUE}곡, 1인 {MAX_PER_USER}곡.\n"
+        f"- !p / !play <링크|검색어|플레이리스트> (슬래시 /play도 가능). 대기열 {MAX_QUEUE}곡, 1인 {MAX_PER_USER}곡.\n"
         "- !search → 버튼 선택, !queue / !clear / !move / !remove / !skip / !stop / !pause / !resume / !panel\n"
         "- 같은 음성 채널에서만 제어. 안내 숨김은 QUIET_NOTICE, 명령 삭제는 DELETE_COMMANDS, 음량은 BOT_VOLUME_DB(기본 {VOLUME_DB}dB)\n"
         "\n▶ 메이플 (NEXON_API_KEY 필요, 슬래시도 동일 이름)\n"
@@ -592,11 +1308,16 @@ async def help_cmd(ctx):
         "- !fcmatchdetail(피파전적): 최근 5경기 스코어/상대\n"
         "- !fcmeta(피파메타) [matchtype|season|division]\n"
         "- !fcplayer(선수검색) <이름>: 선수 목록(시즌/포지션/이미지)\n"
+        "\n▶ 롤 (RIOT_API_KEY 필요, 슬래시도 동일 이름)\n"
+        "- !lol(전적, 롤전적) <소환사명|이름#태그>: 최근 5경기 + 랭크\n"
+        "- !lolstats(롤통계) <소환사명> [20|50|100]: 챔피언/큐별 통계\n"
+        "\n▶ 관심 플레이어 (서버 관리 권한)\n"
+        "- !watch <lol|fc|maple> <이름>, !unwatch, !watchlist, !watchchannel [#채널|off]: 미리 조회 + 새 경기 알림\n"
         "\n▶ 설정/실행\n"
         "- 필수: DISCORD_TOKEN, (선택) NEXON_API_KEY, FIFA_API_KEY\n"
         "- 자주 쓰는 옵션: BOT_VOLUME_DB, DELETE_COMMANDS, QUIET_NOTICE, MAX_QUEUE, MAX_PER_USER\n"
         "- 상태 저장: bot_state.json(STATE_FILE), 컨테이너/서버에서는 볼륨 마운트 권장\n"
-        "\n기타: !미개, !매국"
+        "\n기타: !미개, !매국 (봇 소유자: !profile, !synccommands)"
     )
     await ctx.send(text)
 
@@ -613,567 +1334,764 @@ async def mae_guk(ctx):
     await ctx.send("저는 매국 김규민 입니다")
 
 
+# ---------- 조회 기능(프리픽스/슬래시 공통 핸들러) ----------
+MAPLE_COLOR = 0x57F287
+FC_COLOR = 0x3498DB
+
+
+async def maple_character(endpoint: str, character_name: str) -> dict:
+    ocid = await get_ocid(character_name)
+    return await nexon_get(f"/maplestory/v1/character/{endpoint}", {"ocid": ocid})
+
+
+def list_reply(title: str, lines: list[str], color: int, empty: str = "데이터 없음") -> Reply:
+    return Reply(title=title, description="\n".join(lines) or empty, color=color)
+
+
+@core.feature("msbasic", requires="NEXON_API_KEY")
+async def msbasic_core(character_name: str) -> Reply:
+    basic = await maple_character("basic", character_name)
+    name = basic.get("character_name", character_name)
+    world = basic.get("world_name", "?")
+    level = basic.get("character_level", "?")
+    job = basic.get("character_class", "?")
+    gender = basic.get("character_gender", "?")
+    guild = basic.get("character_guild_name") or "-"
+    create = basic.get("character_date_create") or "-"
+    desc = (
+        f"월드: {world}\n"
+        f"레벨: {level}\n"
+        f"직업: {job}\n"
+        f"성별: {gender}\n"
+        f"길드: {guild}\n"
+        f"생성일: {create}"
+    )
+    return Reply(title=f"{name} 기본 정보", description=desc, color=MAPLE_COLOR)
+
+
+@core.feature("msstat", requires="NEXON_API_KEY")
+async def msstat_core(character_name: str) -> Reply:
+    stat = await maple_character("stat", character_name)
+    lines = [f"{s.get('stat_name')}: {s.get('stat_value')}" for s in (stat.get("stat") or [])[:8]]
+    return list_reply(f"{character_name} 종합 능력치", lines, MAPLE_COLOR)
+
+
+@core.feature("mspop", requires="NEXON_API_KEY")
+async def mspop_core(character_name: str) -> Reply:
+    pop = await maple_character("popularity", character_name)
+    value = pop.get("popularity") or "?"
+    return Reply(title=f"{character_name} 인기도", description=f"인기도: {value}", color=MAPLE_COLOR)
+
+
+@core.feature("msequip", requires="NEXON_API_KEY")
+async def msequip_core(character_name: str) -> Reply:
+    eq = await maple_character("item-equipment", character_name)
+    lines = []
+    for it in (eq.get("item_equipment") or [])[:10]:
+        name = it.get("item_name") or "이름없음"
+        star = it.get("starforce") or 0
+        main = it.get("item_option", [])
+        first_opt = main[0]["option_value"] if main else ""
+        lines.append(f"{name} ★{star} {first_opt}")
+    return list_reply(f"{character_name} 장착 장비 (상위 10)", lines, MAPLE_COLOR)
+
+
+@core.feature("msskill", requires="NEXON_API_KEY")
+async def msskill_core(character_name: str) -> Reply:
+    skills = await maple_character("skill", character_name)
+    lines = [f"{s.get('skill_name')} Lv.{s.get('skill_level')}" for s in (skills.get("character_skill") or [])[:10]]
+    return list_reply(f"{character_name} 스킬 (상위 10)", lines, MAPLE_COLOR)
+
+
+@core.feature("msauc", requires="NEXON_API_KEY")
+async def msauc_core(item_name: str) -> Reply:
+    params, clean = auction_params(item_name)
+    try:
+        data = await nexon_get("/maplestory/v1/auction", params)
+    except ValueError as exc:
+        if "OPENAPI00004" in str(exc) or "valid parameter" in str(exc):
+            raise UserError("조회 실패: 아이템명을 정확히 입력해 주세요. 예) 경매 몽환의 벨트") from exc
+        raise
+    # 최저가 5개만 필요하므로 전체 정렬 대신 힙으로 고른다
+    rows = heapq.nsmallest(5, data.get("items") or [], key=lambda x: x.get("unit_price", 0))
+    lines = [f"{r.get('item_name')} | {r.get('unit_price')}메소 x{r.get('count',1)}" for r in rows]
+    return list_reply(f"경매장 시세: {clean}", lines, 0xFEE75C)
+
+
+@core.feature("msbeauty", requires="NEXON_API_KEY")
+async def msbeauty_core(character_name: str) -> Reply:
+    data = await maple_character("beauty-equipment", character_name)
+    reply = Reply(title=f"{character_name} 헤어/성형/피부", color=MAPLE_COLOR)
+    reply.add_field("헤어", data.get("character_hair") or "-", inline=False)
+    reply.add_field("성형", data.get("character_face") or "-", inline=False)
+    reply.add_field("피부", data.get("character_skin_name") or "-", inline=False)
+    return reply
+
+
+@core.feature("msandroid", requires="NEXON_API_KEY")
+async def msandroid_core(character_name: str) -> Reply:
+    data = await maple_character("android-equipment", character_name)
+    reply = Reply(title=f"{character_name} 안드로이드", color=MAPLE_COLOR)
+    reply.add_field("이름", data.get("android_name") or "-", inline=False)
+    reply.add_field("헤어", data.get("android_hair") or "-")
+    reply.add_field("성형", data.get("android_face") or "-")
+    return reply
+
+
+@core.feature("mspet", requires="NEXON_API_KEY")
+async def mspet_core(character_name: str) -> Reply:
+    data = await maple_character("pet-equipment", character_name)
+    lines = [f"{p.get('pet_name')} | 장비: {p.get('pet_equipment_item_name') or '-'}" for p in (data.get("pet_equipment") or [])[:3]]
+    return list_reply(f"{character_name} 펫 정보", lines, MAPLE_COLOR, empty="펫 없음")
+
+
+@core.feature("mslink", requires="NEXON_API_KEY")
+async def mslink_core(character_name: str) -> Reply:
+    data = await maple_character("link-skill", character_name)
+    lines = [f"{s.get('skill_name')} Lv.{s.get('skill_level')}" for s in (data.get("character_link_skill") or [])[:5]]
+    return list_reply(f"{character_name} 링크 스킬", lines, MAPLE_COLOR)
+
+
+@core.feature("msvmatrix", requires="NEXON_API_KEY")
+async def msvmatrix_core(character_name: str) -> Reply:
+    data = await maple_character("vmatrix", character_name)
+    lines = [f"{c.get('v_core_name')} Lv.{c.get('v_core_level')}" for c in (data.get("character_v_core_equipment") or [])[:6]]
+    return list_reply(f"{character_name} V매트릭스", lines, MAPLE_COLOR)
+
+
+@core.feature("mshexa", requires="NEXON_API_KEY")
+async def mshexa_core(character_name: str) -> Reply:
+    data = await maple_character("hexamatrix", character_name)
+    lines = [f"{h.get('hexa_core_name')} Lv.{h.get('hexa_core_level')}" for h in (data.get("character_hexacore_equipment") or [])[:6]]
+    return list_reply(f"{character_name} HEXA 코어", lines, MAPLE_COLOR)
+
+
+@core.feature("mshexastat", requires="NEXON_API_KEY")
+async def mshexastat_core(character_name: str) -> Reply:
+    data = await maple_character("hexamatrix-stat", character_name)
+    lines = [f"{s.get('stat_core_name')} Lv.{s.get('stat_core_level')}" for s in (data.get("character_hexamatrix_stat_core") or [])[:5]]
+    return list_reply(f"{character_name} HEXA 스탯", lines, MAPLE_COLOR)
+
+
+@core.feature("msdojo", requires="NEXON_API_KEY")
+async def msdojo_core(character_name: str) -> Reply:
+    data = await maple_character("dojang", character_name)
+    reply = Reply(title=f"{character_name} 무릉도장", color=MAPLE_COLOR)
+    reply.add_field("최고 층", data.get("dojang_best_floor") or "?")
+    reply.add_field("랭크", data.get("dojang_best_time_rank") or "?")
+    reply.add_field("기록", f"{data.get('dojang_best_time') or '?'}초")
+    return reply
+
+
+@core.feature("msotherstat", requires="NEXON_API_KEY")
+async def msotherstat_core(character_name: str) -> Reply:
+    data = await maple_character("other-stat", character_name)
+    lines = [f"{s.get('stat_name')}: {s.get('stat_value')}" for s in (data.get("character_additional_information") or [])[:8]]
+    return list_reply(f"{character_name} 기타 능력치", lines, MAPLE_COLOR)
+
+
+@core.feature("fcbasic", requires="FIFA_API_KEY")
+async def fcbasic_core(nickname: str) -> Reply:
+    ouid = await fc_get_ouid(nickname)
+    data = await fc_get("/fconline/v1/user/basic", {"ouid": ouid})
+    level = data.get("level", "?")
+    nickname = data.get("nickname", nickname)
+    access = data.get("access_id", "-")
+    desc = f"레벨: {level}\n닉네임: {nickname}\nAccess ID: {access}"
+    return Reply(title=f"{nickname} 기본 정보", description=desc, color=FC_COLOR)
+
+
+@core.feature("fcmax", requires="FIFA_API_KEY")
+async def fcmax_core(nickname: str) -> Reply:
+    ouid = await fc_get_ouid(nickname)
+    data = await fc_get("/fconline/v1/user/maxdivision", {"ouid": ouid})
+    lines = [f"시즌:{d.get('seasonId')} | 등급:{d.get('division')} | 타입:{d.get('matchType')}" for d in (data.get("maxdivision") or [])[:5]]
+    return list_reply(f"{nickname} 역대 최고 등급", lines, FC_COLOR)
+
+
+async def fc_recent_lines(nickname: str, matchtype: str, *, show_id: bool) -> list[str]:
+    """최근 5경기 결과 줄 목록. 경기 상세는 동시에 조회한다."""
+    ouid = await fc_get_ouid(nickname)
+    params = {"ouid": ouid, "offset": 0, "limit": 5, "matchtype": matchtype}
+    match_ids = await fc_get("/fconline/v1/user/match", params)
+    match_ids = (match_ids if isinstance(match_ids, list) else [])[:5]
+    details = await asyncio.gather(
+        *(fc_get("/fconline/v1/match-detail", {"matchid": mid}) for mid in match_ids),
+        return_exceptions=True,
+    )
+    lines = []
+    for mid, detail in zip(match_ids, details):
+        if isinstance(detail, Exception):
+            lines.append(f"{mid}: 상세 실패 ({detail})")
+            continue
+        infos = detail.get("matchInfo") or []
+        if len(infos) < 2:
+            lines.append(f"{mid}: 상세 없음")
+            continue
+        p1, p2 = infos[0], infos[1]
+        # 내 팀 판단
+        mine = p1 if p1.get("ouid") == ouid else p2
+        opp = p2 if mine is p1 else p1
+        my_score = mine.get("shoot", {}).get("goalTotal") if mine else "?"
+        opp_score = opp.get("shoot", {}).get("goalTotal") if opp else "?"
+        opp_name = opp.get("nickname") if opp else "?"
+        result = "무" if my_score == opp_score else ("승" if my_score > opp_score else "패")
+        line = f"{result} {my_score}:{opp_score} vs {opp_name}"
+        lines.append(f"{line} (matchId {mid})" if show_id else line)
+    return lines
+
+
+@core.feature("fcmatch", kind="heavy", requires="FIFA_API_KEY")
+async def fcmatch_core(nickname: str, matchtype: str = "50") -> Reply:
+    lines = await fc_recent_lines(nickname, matchtype, show_id=True)
+    return list_reply(f"{nickname} 최근 경기 (최대 5)", lines, FC_COLOR)
+
+
+@core.feature("fcmatchdetail", kind="heavy", requires="FIFA_API_KEY")
+async def fcmatchdetail_core(nickname: str, matchtype: str = "50") -> Reply:
+    lines = await fc_recent_lines(nickname, matchtype, show_id=False)
+    return list_reply(f"{nickname} 최근 경기 요약", lines, FC_COLOR)
+
+
+@core.feature("fctrade", requires="FIFA_API_KEY")
+async def fctrade_core(nickname: str, tradetype: str = "sell") -> Reply:
+    """tradetype: sell(판매) / buy(구매). 기본 sell."""
+    nickname = nickname.strip()
+    tmap = {"sell": "sell", "buy": "buy", "판매": "sell", "구매": "buy"}
+    tval = tmap.get(tradetype.lower())
+    if not tval:
+        raise UserError("tradetype은 sell(판매)/buy(구매) 중 하나를 입력하세요.")
+    no_trades = "조회 실패: 닉네임을 확인하거나 거래 내역이 없는 경우일 수 있습니다. tradetype은 sell/buy만 지원하며, 없으면 자동 재시도합니다."
+    try:
+        ouid = await fc_get_ouid(nickname)
+        params = {"ouid": ouid, "tradetype": tval, "offset": 0, "limit": 5}
+        try:
+            data = await fc_get("/fconline/v1/user/trade", params)
+        except ValueError as exc:
+            if "OPENAPI00004" not in str(exc):
+                raise
+            # tradetype 없이 재시도
+            data = await fc_get("/fconline/v1/user/trade", {"ouid": ouid, "offset": 0, "limit": 5})
+    except ValueError as exc:
+        if "OPENAPI00004" in str(exc):
+            raise UserError(no_trades) from exc
+        raise
+    try:
+        await ensure_fc_meta()  # 선수 이름 표시용, 실패해도 spid로 표시
+    except Exception:
+        pass
+    rows = data.get("trades") if isinstance(data, dict) else data
+    lines = []
+    for r in (rows or [])[:5]:
+        item = fc_pretty_player_by_id(r.get("spid")) if r.get("spid") else "-"
+        price = r.get("value") or "-"
+        trade_type = r.get("tradeType") or tval
+        date = r.get("tradeDate") or ""
+        grade = r.get("grade") or "-"
+        lines.append(f"{date} | {trade_type} | {item} | 강화:{grade} | 가격:{price}")
+    return list_reply(f"{nickname} 거래 기록(최근 5, {tval})", lines, FC_COLOR)
+
+
+@core.feature("fcplayer", requires="FIFA_API_KEY", cached=False)
+async def fcplayer_core(name: str) -> Reply:
+    """선수 이름으로 검색 후 시즌/포지션/이미지 표시(최대 5개). 메타데이터가 메모리에 있어 캐시하지 않는다."""
+    await ensure_fc_meta()
+    matches = find_players_by_name(name, limit=5)
+    if not matches:
+        return Reply(content="검색 결과가 없습니다.")
+    reply = Reply(title=f"선수 검색: {name}", description="\n".join(fc_pretty_player(p) for p in matches), color=FC_COLOR)
+    first_spid = matches[0].get("id")
+    if first_spid:
+        reply.thumbnail = fc_player_image(first_spid)
+    return reply
+
+
+FC_META_ENDPOINTS = {
+    "matchtype": "/static/fconline/meta/matchtype.json",
+    "season": "/static/fconline/meta/seasonid.json",
+    "division": "/static/fconline/meta/division.json",
+}
+
+
+@core.feature("fcmeta", requires="FIFA_API_KEY")
+async def fcmeta_core(meta_type: str = "matchtype") -> Reply:
+    """FC Online 메타데이터(매치타입/시즌/등급) 요약."""
+    meta_type = meta_type.lower()
+    endpoint = FC_META_ENDPOINTS.get(meta_type)
+    if not endpoint:
+        raise UserError("사용법: fcmeta [matchtype|season|division]")
+    data = await fc_get(endpoint, {})
+    if isinstance(data, list):
+        items = data[:10]
+        if meta_type == "matchtype":
+            lines = [f"{d.get('matchtype')}: {d.get('desc')}" for d in items]
+        elif meta_type == "season":
+            lines = [f"{d.get('seasonId')}: {d.get('className')}" for d in items]
+        else:
+            lines = [f"{d.get('divisionId')}: {d.get('divisionName')}" for d in items]
+    else:
+        lines = ["데이터 없음"]
+    return list_reply(f"FC 메타 ({meta_type})", lines, FC_COLOR)
+
+
+@core.feature("lol", kind="heavy", requires="RIOT_API_KEY")
+async def lol_core(summoner_name: str, region: str | None = None) -> Reply:
+    summary = await fetch_lol_recent(summoner_name, (region or LOL_DEFAULT_REGION).lower())
+    return build_lol_reply(summary)
+
+
+def lol_stats_games(games: int | None) -> int:
+    """집계 경기 수를 20/50/100 중 하나로 맞춘다(캐시 키가 흩어지지 않도록)."""
+    games = games or 20
+    for step in (20, 50):
+        if games <= step:
+            return step
+    return LOL_STATS_MAX_GAMES
+
+
+@core.feature("lolstats", kind="heavy", requires="RIOT_API_KEY")
+async def lolstats_core(summoner_name: str, games: int = 20, region: str | None = None) -> Reply:
+    result = await fetch_lol_stats(summoner_name, games, (region or LOL_DEFAULT_REGION).lower())
+    stats = result["stats"]
+    riot_id = result.get("riot_id")
+    name = f"{riot_id['name']}#{riot_id['tag']}" if riot_id else (result["summoner"].get("name") or summoner_name)
+    reply = Reply(title=f"{name} 최근 {result['games']}경기 통계 ({result['platform'].upper()})", color=0x5865F2)
+    total = stats["games"]
+    if not total:
+        reply.description = "저장된 경기 기록이 없습니다."
+        return reply
+    wins = stats["wins"]
+    k, d, a = stats["kills"], stats["deaths"], stats["assists"]
+    if total < result["games"]:
+        reply.description = f"지금까지 받아 온 {total}경기 기준입니다. 다시 조회하면 이어서 채웁니다."
+    elif result.get("partial"):
+        reply.description = result["partial"]
+    reply.add_field("승패", f"{total}전 {wins}승 {total - wins}패 ({wins / total * 100:.0f}%)")
+    reply.add_field("K/D/A", f"{k}/{d}/{a} (KDA {kda_text(k, d, a)})")
+    reply.add_field("평균", f"{k / total:.1f}/{d / total:.1f}/{a / total:.1f} · {stats['duration'] / total / 60:.0f}분")
+    champ_lines = [
+        f"{c['champion']} {c['games']}판 {c['wins'] / c['games'] * 100:.0f}% · KDA {kda_text(c['kills'], c['deaths'], c['assists'])}"
+        for c in stats["champions"][:5]
+    ]
+    reply.add_field("많이 한 챔피언", "\n".join(champ_lines), inline=False)
+    queue_lines = [
+        f"{QUEUE_NAME.get(q['queue_id'], str(q['queue_id']))} {q['games']}판 {q['wins']}승"
+        for q in stats["queues"]
+    ]
+    reply.add_field("큐별", "\n".join(queue_lines), inline=False)
+    return reply
+
+
+# ---------- 관심 플레이어(watchlist) ----------
+# 게임별로 미리 데워 둘 명령과 인자 이름. 인자는 프리픽스/슬래시 명령과 같아야 같은 캐시 키가 된다.
+WATCH_FEATURES = {
+    "lol": [("lol", "summoner_name", {})],
+    "fc": [("fcbasic", "nickname", {}), ("fcmatch", "nickname", {"matchtype": "50"})],
+    "maple": [("msbasic", "character_name", {})],
+}
+
+
+def parse_watch_game(game: str) -> str:
+    resolved = GAME_ALIASES.get(game.strip().lower())
+    if not resolved:
+        raise UserError("게임은 lol(롤) / fc(피파) / maple(메이플) 중 하나를 입력하세요.")
+    return resolved
+
+
+def owns_guild(guild_id: int) -> bool:
+    """이 프로세스가 맡은 샤드의 길드인지. 클러스터 실행에서 다른 프로세스 길드의 관심 플레이어는 그쪽이 갱신·알림한다."""
+    if not SHARD_IDS:
+        return True
+    return shard_for_guild(guild_id, int(SHARD_COUNT)) in SHARD_IDS
+
+
+def watch_game_missing_key(game: str) -> str | None:
+    """게임 조회에 필요한 API 키가 없으면 그 환경 변수 이름."""
+    required = core.features[WATCH_FEATURES[game][0][0]].requires
+    return required if required and not os.getenv(required) else None
+
+
+async def latest_match(game: str, name: str) -> tuple[str, str] | None:
+    """(경기 ID, 알림 문구). 방금 데운 조회가 응답 캐시에 남아 있어 추가 호출은 거의 없다."""
+    if game == "lol":
+        account = await resolve_lol_account(name, LOL_DEFAULT_REGION)
+        rows = await store_call(match_store.recent, account["puuid"], 1)
+        if not rows:
+            return None
+        return rows[0]["match_id"], format_match_line(match_summary(rows[0]))
+    if game == "fc":
+        ouid = await fc_get_ouid(name)
+        match_ids = await fc_get("/fconline/v1/user/match", {"ouid": ouid, "offset": 0, "limit": 5, "matchtype": "50"})
+        if not isinstance(match_ids, list) or not match_ids:
+            return None
+        lines = await fc_recent_lines(name, "50", show_id=False)
+        return match_ids[0], lines[0] if lines else match_ids[0]
+    return None
+
+
+async def notify_new_match(target: dict, match_id: str, line: str):
+    game, name = target["game"], target["name"]
+    for guild_id, last_seen in target["guilds"].items():
+        if last_seen is None or last_seen == match_id:
+            continue
+        channel_id = await store_call(watch_store.channel, guild_id)
+        channel = bot.get_channel(channel_id) if channel_id else None
+        if channel is None:
+            continue
+        try:
+            await channel.send(f"🎮 [{GAMES[game]}] **{name}** 새 경기\n{line}")
+        except discord.HTTPException as exc:
+            logger.info("관심 플레이어 알림 실패(guild=%s): %s", guild_id, exc)
+
+
+async def refresh_watch_target(game: str, name: str) -> bool:
+    """관심 플레이어 조회를 미리 데워 두고 새 경기가 있으면 알린다. 등록이 모두 지워졌으면 False."""
+    target = await store_call(watch_store.target, game, name)
+    if target is not None:
+        target["guilds"] = {gid: seen for gid, seen in target["guilds"].items() if owns_guild(gid)}
+    if not target or not target["guilds"]:
+        return False
+    name = target["name"]
+    for feature, arg, extra in WATCH_FEATURES[game]:
+        # 다음 갱신 전까지는 명령이 업스트림을 부르지 않고 캐시로 응답
+        await core.warm(feature, WATCH_INTERVAL * 2, **{arg: name, **extra})
+    watch_refreshed[watch_key(game, name)] = time.monotonic()
+    latest = await latest_match(game, name)
+    if latest:
+        match_id, line = latest
+        await notify_new_match(target, match_id, line)
+        if any(seen != match_id for seen in target["guilds"].values()):
+            await store_call(watch_store.set_last_seen, game, name, match_id, list(target["guilds"]))
+    return True
+
+
+def lookup_not_found(exc: Exception) -> bool:
+    """대상이 없어서 난 조회 실패(이름 오타 등)인지. 다시 조회해도 결과가 같은 실패다."""
+    text = str(exc)
+    return isinstance(exc, UserError) or "찾지 못했습니다" in text or text.startswith("API 오류 404")
+
+
+async def watch_failed(key: tuple[str, str], exc: Exception) -> float | None:
+    """갱신 실패를 세어 다음 갱신까지의 간격을 정한다(연속 실패마다 두 배, 최대 16배).
+
+    찾지 못한 실패가 WATCH_MAX_MISSES번 이어지면 이 프로세스가 맡은 등록의 갱신을 멈추고 None을 반환한다.
+    """
+    failures, misses = watch_failures.get(key, (0, 0))
+    failures += 1
+    misses = misses + 1 if lookup_not_found(exc) else misses
+    if misses >= WATCH_MAX_MISSES:
+        watch_failures.pop(key, None)
+        target = await store_call(watch_store.target, *key)
+        owned = [gid for gid in (target["guilds"] if target else {}) if owns_guild(gid)]
+        await store_call(watch_store.set_stopped, *key, True, owned)
+        logger.warning("관심 플레이어 %s/%s를 %d번 연속 찾지 못해 갱신을 멈춥니다: %s", *key, misses, exc)
+        return None
+    watch_failures[key] = (failures, misses)
+    logger.info("관심 플레이어 갱신 실패 %s/%s(%d번째): %s", *key, failures, exc)
+    return WATCH_INTERVAL * 2 ** min(failures, 4)
+
+
+def schedule_watch(key: tuple[str, str], delay: float):
+    watch_wheel.schedule(key, delay)
+    watch_wheel_wakeup.set()
+
+
+async def watch_refresher():
+    """관심 플레이어를 주기마다 하나씩 갱신. 시작 시 등록된 플레이어는 주기 전체에 고르게 흩어 놓는다."""
+    await bot.wait_until_ready()
+    # 키가 없는 게임은 조회할 수 없으므로 갱신 순서에 넣지 않는다(키를 넣고 재시작하면 다시 돈다)
+    targets = [
+        key
+        for key, target in (await store_call(watch_store.targets)).items()
+        if not watch_game_missing_key(key[0]) and any(owns_guild(gid) for gid in target["guilds"])
+    ]
+    for i, key in enumerate(targets):
+        if key not in watch_wheel:
+            watch_wheel.schedule(key, 5 + i * WATCH_INTERVAL / len(targets))
+    quotas = {"lol": riot_quota, "fc": fc_quota, "maple": maple_quota}
+    while not bot.is_closed():
+        if not watch_wheel:
+            watch_wheel_wakeup.clear()
+            await watch_wheel_wakeup.wait()
+            continue
+        await asyncio.sleep(watch_wheel.tick)
+        for game, lowered in watch_wheel.advance():
+            key = (game, lowered)
+            if quotas[game].budget_low(None):
+                # 호출 한도가 빠듯하면 사용자 명령에 양보하고 나중에 다시
+                watch_wheel.schedule(key, 60)
+                continue
+            try:
+                delay = WATCH_INTERVAL if await refresh_watch_target(game, lowered) else None
+                watch_failures.pop(key, None)
+            except Exception as exc:
+                delay = await watch_failed(key, exc)
+            if delay is not None:
+                watch_wheel.schedule(key, delay)
+            else:
+                watch_refreshed.pop(key, None)
+
+
+async def watch_add(guild: discord.Guild, user: discord.abc.User, game: str, name: str) -> str:
+    game = parse_watch_game(game)
+    missing = watch_game_missing_key(game)
+    if missing:
+        raise UserError(f"{missing}가 설정되지 않아 {GAMES[game]} 플레이어는 등록할 수 없어요.")
+    name = name.strip()
+    if not name:
+        raise UserError("이름을 입력하세요.")
+    if await store_call(watch_store.count, guild.id) >= WATCH_MAX_PER_GUILD:
+        raise UserError(f"관심 플레이어는 서버당 {WATCH_MAX_PER_GUILD}명까지 등록할 수 있어요.")
+    key = watch_key(game, name)
+    if not await store_call(watch_store.add, guild.id, game, name, user.id):
+        if not await store_call(watch_store.set_stopped, game, name, False, [guild.id]):
+            return f"이미 등록된 플레이어예요: [{GAMES[game]}] {name}"
+        # 찾지 못해 멈췄던 등록을 다시 등록하면 갱신을 재개한다
+        if key not in watch_wheel:
+            schedule_watch(key, 5)
+        return f"관심 플레이어 갱신 재개: [{GAMES[game]}] {name}"
+    if key not in watch_wheel:
+        schedule_watch(key, 5)
+    return f"관심 플레이어 등록: [{GAMES[game]}] {name} (약 {format_age(WATCH_INTERVAL)}마다 갱신)"
+
+
+async def watch_remove(guild: discord.Guild, game: str, name: str) -> str:
+    game = parse_watch_game(game)
+    if not await store_call(watch_store.remove, guild.id, game, name):
+        return "등록되지 않은 플레이어예요."
+    # 다른 길드도 보고 있지 않으면 다음 차례에 refresh_watch_target이 False를 돌려 빠진다
+    return f"관심 플레이어 해제: [{GAMES[game]}] {name.strip()}"
+
+
+async def watch_list_reply(guild: discord.Guild) -> Reply:
+    players = await store_call(watch_store.guild_players, guild.id)
+    channel_id = await store_call(watch_store.channel, guild.id)
+    reply = Reply(title="관심 플레이어", color=0x5865F2)
+    if not players:
+        reply.description = "등록된 플레이어가 없어요. !watch <lol|fc|maple> <이름>으로 등록하세요."
+    now = time.monotonic()
+    for game in GAMES:
+        lines = []
+        for p in players:
+            if p["game"] != game:
+                continue
+            at = watch_refreshed.get(watch_key(game, p["name"]))
+            if p["stopped"]:
+                status = "⚠ 찾지 못해 갱신 중지(이름을 확인해 다시 등록하면 재개)"
+            else:
+                status = f"{format_age(now - at)} 전 갱신" if at else "갱신 대기"
+            lines.append(f"{p['name']} · {status}")
+        if lines:
+            reply.add_field(GAMES[game], "\n".join(lines), inline=False)
+    reply.footer = f"새 경기 알림: #{bot.get_channel(channel_id) or channel_id}" if channel_id else "새 경기 알림 꺼짐(!watchchannel)"
+    return reply
+
+
+def check_watch_manage(member) -> str | None:
+    if not getattr(getattr(member, "guild_permissions", None), "manage_guild", False):
+        return "관심 플레이어 관리는 서버 관리 권한이 필요해요."
+    return None
+
+
+# ---------- 조회 명령(프리픽스) ----------
 @bot.command(name="msbasic", aliases=["ms", "메이플기본"])
 async def ms_basic(ctx, *, character_name: str):
     """메이플 캐릭터 기본 정보 조회."""
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    if not NEXON_API_KEY:
-        return await ctx.send("NEXON_API_KEY가 설정되지 않았습니다.")
-
-    try:
-        # 1) ocid 조회
-        ocid_data = await nexon_get("/maplestory/v1/id", {"character_name": character_name})
-        ocid = ocid_data.get("ocid")
-        if not ocid:
-            return await ctx.send("캐릭터를 찾지 못했습니다.")
-
-        # 2) 기본 정보 조회
-        basic = await nexon_get("/maplestory/v1/character/basic", {"ocid": ocid})
-        name = basic.get("character_name", character_name)
-        world = basic.get("world_name", "?")
-        level = basic.get("character_level", "?")
-        job = basic.get("character_class", "?")
-        gender = basic.get("character_gender", "?")
-        guild = basic.get("character_guild_name") or "-"
-        create = basic.get("character_date_create") or "-"
-
-        desc = (
-            f"월드: {world}\n"
-            f"레벨: {level}\n"
-            f"직업: {job}\n"
-            f"성별: {gender}\n"
-            f"길드: {guild}\n"
-            f"생성일: {create}"
-        )
-        embed = discord.Embed(title=f"{name} 기본 정보", description=desc, color=0x57F287)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "msbasic", character_name=character_name)
 
 
 @bot.command(name="msstat", aliases=["능력치"])
 async def ms_stat(ctx, *, character_name: str):
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    try:
-        ocid = await get_ocid(character_name)
-        stat = await nexon_get("/maplestory/v1/character/stat", {"ocid": ocid})
-        latest = (stat.get("stat") or [])[:8]
-        lines = [f"{s.get('stat_name')}: {s.get('stat_value')}" for s in latest]
-        embed = discord.Embed(title=f"{character_name} 종합 능력치", description="\n".join(lines) or "데이터 없음", color=0x57F287)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "msstat", character_name=character_name)
 
 
 @bot.command(name="mspop", aliases=["인기도"])
 async def ms_pop(ctx, *, character_name: str):
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    try:
-        ocid = await get_ocid(character_name)
-        pop = await nexon_get("/maplestory/v1/character/popularity", {"ocid": ocid})
-        value = pop.get("popularity") or "?"
-        embed = discord.Embed(title=f"{character_name} 인기도", description=f"인기도: {value}", color=0x57F287)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "mspop", character_name=character_name)
 
 
 @bot.command(name="msequip", aliases=["장비"])
 async def ms_equip(ctx, *, character_name: str):
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    try:
-        ocid = await get_ocid(character_name)
-        eq = await nexon_get("/maplestory/v1/character/item-equipment", {"ocid": ocid})
-        items = (eq.get("item_equipment") or [])[:10]
-        lines = []
-        for it in items:
-            name = it.get("item_name") or "이름없음"
-            star = it.get("starforce") or 0
-            main = it.get("item_option", [])
-            first_opt = main[0]["option_value"] if main else ""
-            lines.append(f"{name} ★{star} {first_opt}")
-        embed = discord.Embed(title=f"{character_name} 장착 장비 (상위 10)", description="\n".join(lines) or "데이터 없음", color=0x57F287)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "msequip", character_name=character_name)
 
 
 @bot.command(name="msskill", aliases=["스킬"])
 async def ms_skill(ctx, *, character_name: str):
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    try:
-        ocid = await get_ocid(character_name)
-        skills = await nexon_get("/maplestory/v1/character/skill", {"ocid": ocid})
-        list_skill = (skills.get("character_skill") or [])[:10]
-        lines = [f"{s.get('skill_name')} Lv.{s.get('skill_level')}" for s in list_skill]
-        embed = discord.Embed(title=f"{character_name} 스킬 (상위 10)", description="\n".join(lines) or "데이터 없음", color=0x57F287)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "msskill", character_name=character_name)
 
 
 @bot.command(name="msauc", aliases=["경매"])
 async def ms_auction(ctx, *, item_name: str):
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    try:
-        params, clean = auction_params(item_name)
-        data = await nexon_get("/maplestory/v1/auction", params)
-        rows = sorted(data.get("items") or [], key=lambda x: x.get("unit_price", 0))[:5]
-        lines = [f"{r.get('item_name')} | {r.get('unit_price')}메소 x{r.get('count',1)}" for r in rows]
-        embed = discord.Embed(title=f"경매장 시세: {clean}", description="\n".join(lines) or "데이터 없음", color=0xFEE75C)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        msg = str(exc)
-        if "OPENAPI00004" in msg or "valid parameter" in msg:
-            await ctx.send("조회 실패: 아이템명을 정확히 입력해 주세요. 예) !경매 몽환의 벨트")
-        else:
-            await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "msauc", item_name=item_name)
 
 
 @bot.command(name="msbeauty", aliases=["헤어성형"])
 async def ms_beauty(ctx, *, character_name: str):
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    try:
-        ocid = await get_ocid(character_name)
-        data = await nexon_get("/maplestory/v1/character/beauty-equipment", {"ocid": ocid})
-        hair = data.get("character_hair") or "-"
-        face = data.get("character_face") or "-"
-        skin = data.get("character_skin_name") or "-"
-        embed = discord.Embed(title=f"{character_name} 헤어/성형/피부", color=0x57F287)
-        embed.add_field(name="헤어", value=hair, inline=False)
-        embed.add_field(name="성형", value=face, inline=False)
-        embed.add_field(name="피부", value=skin, inline=False)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "msbeauty", character_name=character_name)
 
 
 @bot.command(name="msandroid", aliases=["안드로이드"])
 async def ms_android(ctx, *, character_name: str):
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    try:
-        ocid = await get_ocid(character_name)
-        data = await nexon_get("/maplestory/v1/character/android-equipment", {"ocid": ocid})
-        android = data.get("android_name") or "-"
-        hair = data.get("android_hair") or "-"
-        face = data.get("android_face") or "-"
-        embed = discord.Embed(title=f"{character_name} 안드로이드", color=0x57F287)
-        embed.add_field(name="이름", value=android, inline=False)
-        embed.add_field(name="헤어", value=hair, inline=True)
-        embed.add_field(name="성형", value=face, inline=True)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "msandroid", character_name=character_name)
 
 
 @bot.command(name="mspet", aliases=["펫"])
 async def ms_pet(ctx, *, character_name: str):
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    try:
-        ocid = await get_ocid(character_name)
-        data = await nexon_get("/maplestory/v1/character/pet-equipment", {"ocid": ocid})
-        pets = data.get("pet_equipment") or []
-        lines = []
-        for p in pets[:3]:
-            lines.append(f"{p.get('pet_name')} | 장비: {p.get('pet_equipment_item_name') or '-'}")
-        embed = discord.Embed(title=f"{character_name} 펫 정보", description="\n".join(lines) or "펫 없음", color=0x57F287)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "mspet", character_name=character_name)
 
 
 @bot.command(name="mslink", aliases=["링크스킬"])
 async def ms_link(ctx, *, character_name: str):
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    try:
-        ocid = await get_ocid(character_name)
-        data = await nexon_get("/maplestory/v1/character/link-skill", {"ocid": ocid})
-        skills = (data.get("character_link_skill") or [])[:5]
-        lines = [f"{s.get('skill_name')} Lv.{s.get('skill_level')}" for s in skills]
-        embed = discord.Embed(title=f"{character_name} 링크 스킬", description="\n".join(lines) or "데이터 없음", color=0x57F287)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "mslink", character_name=character_name)
 
 
 @bot.command(name="msvmatrix", aliases=["브이매트릭스"])
 async def ms_vmatrix(ctx, *, character_name: str):
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    try:
-        ocid = await get_ocid(character_name)
-        data = await nexon_get("/maplestory/v1/character/vmatrix", {"ocid": ocid})
-        cores = (data.get("character_v_core_equipment") or [])[:6]
-        lines = [f"{c.get('v_core_name')} Lv.{c.get('v_core_level')}" for c in cores]
-        embed = discord.Embed(title=f"{character_name} V매트릭스", description="\n".join(lines) or "데이터 없음", color=0x57F287)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "msvmatrix", character_name=character_name)
 
 
 @bot.command(name="mshexa", aliases=["헥사"])
 async def ms_hexa(ctx, *, character_name: str):
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    try:
-        ocid = await get_ocid(character_name)
-        data = await nexon_get("/maplestory/v1/character/hexamatrix", {"ocid": ocid})
-        skills = (data.get("character_hexacore_equipment") or [])[:6]
-        lines = [f"{h.get('hexa_core_name')} Lv.{h.get('hexa_core_level')}" for h in skills]
-        embed = discord.Embed(title=f"{character_name} HEXA 코어", description="\n".join(lines) or "데이터 없음", color=0x57F287)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "mshexa", character_name=character_name)
 
 
 @bot.command(name="mshexastat", aliases=["헥사스탯"])
 async def ms_hexastat(ctx, *, character_name: str):
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    try:
-        ocid = await get_ocid(character_name)
-        data = await nexon_get("/maplestory/v1/character/hexamatrix-stat", {"ocid": ocid})
-        stats = data.get("character_hexamatrix_stat_core") or []
-        lines = []
-        for s in stats[:5]:
-            lines.append(f"{s.get('stat_core_name')} Lv.{s.get('stat_core_level')}")
-        embed = discord.Embed(title=f"{character_name} HEXA 스탯", description="\n".join(lines) or "데이터 없음", color=0x57F287)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "mshexastat", character_name=character_name)
 
 
 @bot.command(name="msdojo", aliases=["무릉"])
 async def ms_dojo(ctx, *, character_name: str):
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    try:
-        ocid = await get_ocid(character_name)
-        data = await nexon_get("/maplestory/v1/character/dojang", {"ocid": ocid})
-        floor = data.get("dojang_best_floor") or "?"
-        rank = data.get("dojang_best_time_rank") or "?"
-        time_val = data.get("dojang_best_time") or "?"
-        embed = discord.Embed(title=f"{character_name} 무릉도장", color=0x57F287)
-        embed.add_field(name="최고 층", value=floor, inline=True)
-        embed.add_field(name="랭크", value=rank, inline=True)
-        embed.add_field(name="기록", value=f"{time_val}초", inline=True)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "msdojo", character_name=character_name)
 
 
 @bot.command(name="msotherstat", aliases=["기타스탯"])
 async def ms_otherstat(ctx, *, character_name: str):
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    try:
-        ocid = await get_ocid(character_name)
-        data = await nexon_get("/maplestory/v1/character/other-stat", {"ocid": ocid})
-        stats = data.get("character_additional_information") or []
-        lines = [f"{s.get('stat_name')}: {s.get('stat_value')}" for s in stats[:8]]
-        embed = discord.Embed(title=f"{character_name} 기타 능력치", description="\n".join(lines) or "데이터 없음", color=0x57F287)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "msotherstat", character_name=character_name)
 
 
 # FC Online
 @bot.command(name="fcbasic", aliases=["fc", "피파기본"])
 async def fc_basic(ctx, *, nickname: str):
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    try:
-        ouid = await fc_get_ouid(nickname)
-        data = await fc_get("/fconline/v1/user/basic", {"ouid": ouid})
-        level = data.get("level", "?")
-        nickname = data.get("nickname", nickname)
-        access = data.get("access_id", "-")
-        desc = f"레벨: {level}\n닉네임: {nickname}\nAccess ID: {access}"
-        embed = discord.Embed(title=f"{nickname} 기본 정보", description=desc, color=0x3498DB)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "fcbasic", nickname=nickname)
 
 
 @bot.command(name="fcmax", aliases=["피파등급"])
 async def fc_max(ctx, *, nickname: str):
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    try:
-        ouid = await fc_get_ouid(nickname)
-        data = await fc_get("/fconline/v1/user/maxdivision", {"ouid": ouid})
-        latest = data.get("maxdivision") or []
-        lines = []
-        for d in latest[:5]:
-            lines.append(f"시즌:{d.get('seasonId')} | 등급:{d.get('division')} | 타입:{d.get('matchType')}")
-        embed = discord.Embed(title=f"{nickname} 역대 최고 등급", description="\n".join(lines) or "데이터 없음", color=0x3498DB)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "fcmax", nickname=nickname)
 
 
 @bot.command(name="fcmatch", aliases=["피파경기", "최근경기"])
 async def fc_match(ctx, nickname: str, matchtype: str = "50"):
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    try:
-        ouid = await fc_get_ouid(nickname)
-        params = {"ouid": ouid, "offset": 0, "limit": 5, "matchtype": matchtype}
-        matches = await fc_get("/fconline/v1/user/match", params)
-        ids = matches if isinstance(matches, list) else []
-        lines = []
-        for mid in ids[:5]:
-            try:
-                detail = await fc_get("/fconline/v1/match-detail", {"matchid": mid})
-                infos = detail.get("matchInfo") or []
-                if len(infos) < 2:
-                    lines.append(f"{mid}: 상세 없음")
-                    continue
-                p1, p2 = infos[0], infos[1]
-                mine = p1 if p1.get("ouid") == ouid else p2
-                opp = p2 if mine is p1 else p1
-                my_score = mine.get("shoot", {}).get("goalTotal") if mine else "?"
-                opp_score = opp.get("shoot", {}).get("goalTotal") if opp else "?"
-                opp_name = opp.get("nickname") if opp else "?"
-                result = "무" if my_score == opp_score else ("승" if my_score > opp_score else "패")
-                lines.append(f"{result} {my_score}:{opp_score} vs {opp_name}")
-            except Exception as inner:
-                lines.append(f"{mid}: 상세 실패 ({inner})")
-        embed = discord.Embed(title=f"{nickname} 최근 경기 (최대 5)", description="\n".join(lines) or "데이터 없음", color=0x3498DB)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "fcmatch", nickname=nickname, matchtype=matchtype)
 
 
 @bot.command(name="fctrade", aliases=["피파거래"])
 async def fc_trade(ctx, nickname: str, tradetype: str = "sell"):
     """tradetype: sell(판매) / buy(구매). 기본 sell."""
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    try:
-        nickname = nickname.strip()
-        tmap = {"sell": "sell", "buy": "buy", "판매": "sell", "구매": "buy"}
-        tval = tmap.get(tradetype.lower())
-        if not tval:
-            return await ctx.send("tradetype은 sell(판매)/buy(구매) 중 하나를 입력하세요.")
-        ouid = await fc_get_ouid(nickname)
-        params = {"ouid": ouid, "tradetype": tval, "offset": 0, "limit": 5}
-        try:
-            data = await fc_get("/fconline/v1/user/trade", params)
-        except ValueError as exc:
-            if "OPENAPI00004" in str(exc):
-                # tradetype 없이 재시도
-                data = await fc_get("/fconline/v1/user/trade", {"ouid": ouid, "offset": 0, "limit": 5})
-            else:
-                raise
-        rows = data.get("trades") if isinstance(data, dict) else data
-        rows = rows or []
-        lines = []
-        for r in rows[:5]:
-            item = r.get("spid") or "-"
-            price = r.get("value") or "-"
-            trade_type = r.get("tradeType") or tval
-            lines.append(f"{trade_type} | 아이템:{item} | 가격:{price}")
-        embed = discord.Embed(
-            title=f"{nickname} 거래 기록(최근 5, {tval})",
-            description="\n".join(lines) or "데이터 없음",
-            color=0x3498DB,
-        )
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        msg = str(exc)
-        if "OPENAPI00004" in msg:
-            await ctx.send("조회 실패: 닉네임을 확인하거나 거래 내역이 없는 경우일 수 있습니다. tradetype은 sell/buy만 지원하며, 없으면 자동 재시도합니다.")
-        else:
-            await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "fctrade", nickname=nickname, tradetype=tradetype)
 
 
-@bot.command(name="fcmatchdetail", aliases=["피파전적"])
-async def fc_matchdetail(ctx, nickname: str, matchtype: str = "50"):
-    """최근 5경기 상대 닉네임과 스코어 요약"""
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    try:
-        ouid = await fc_get_ouid(nickname)
-        params = {"ouid": ouid, "offset": 0, "limit": 5, "matchtype": matchtype}
-        match_ids = await fc_get("/fconline/v1/user/match", params)
-        match_ids = match_ids if isinstance(match_ids, list) else []
-        lines = []
-        for mid in match_ids[:5]:
-            try:
-                detail = await fc_get("/fconline/v1/match-detail", {"matchid": mid})
-                infos = detail.get("matchInfo") or []
-                if len(infos) < 2:
-                    lines.append(f"{mid}: 상세 없음")
-                    continue
-                p1, p2 = infos[0], infos[1]
-                # 내 팀 판단
-                mine = p1 if p1.get("ouid") == ouid else p2
-                opp = p2 if mine is p1 else p1
-                my_score = mine.get("shoot", {}).get("goalTotal") if mine else "?"
-                opp_score = opp.get("shoot", {}).get("goalTotal") if opp else "?"
-                opp_name = opp.get("nickname") if opp else "?"
-                result = "무" if my_score == opp_score else ("승" if my_score > opp_score else "패")
-                lines.append(f"{result} {my_score}:{opp_score} vs {opp_name}")
-            except Exception as inner:
-                lines.append(f"{mid}: 상세 실패 ({inner})")
-        embed = discord.Embed(
-            title=f"{nickname} 최근 경기 요약",
-            description="\n".join(lines) or "데이터 없음",
-            color=0x3498DB,
-        )
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+@bot.command(name="fcmatchdetail", aliases=["피파전적"])
+async def fc_matchdetail(ctx, nickname: str, matchtype: str = "50"):
+    """최근 5경기 상대 닉네임과 스코어 요약"""
+    await core.run_prefix(ctx, "fcmatchdetail", nickname=nickname, matchtype=matchtype)
 
 
 @bot.command(name="fcplayer", aliases=["선수검색"])
 async def fc_player(ctx, *, name: str):
     """선수 이름으로 검색 후 시즌/포지션/이미지 표시(최대 5개)"""
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    try:
-        await ensure_fc_meta()
-        matches = find_players_by_name(name, limit=5)
-        if not matches:
-            return await ctx.send("검색 결과가 없습니다.")
-        lines = [fc_pretty_player(p) for p in matches]
-        embed = discord.Embed(title=f"선수 검색: {name}", description="\n".join(lines), color=0x3498DB)
-        first_spid = matches[0].get("id")
-        if first_spid:
-            embed.set_thumbnail(url=fc_player_image(first_spid))
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "fcplayer", name=name)
 
 
 @bot.command(name="fcmeta", aliases=["피파메타"])
 async def fc_meta(ctx, meta_type: str = "matchtype"):
     """FC Online 메타데이터(매치타입/시즌/등급) 요약."""
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    meta_type = meta_type.lower()
-    endpoint_map = {
-        "matchtype": "/static/fconline/meta/matchtype.json",
-        "season": "/static/fconline/meta/seasonid.json",
-        "division": "/static/fconline/meta/division.json",
-    }
-    endpoint = endpoint_map.get(meta_type)
-    if not endpoint:
-        return await ctx.send("사용법: !fcmeta [matchtype|season|division]")
-    try:
-        data = await fc_get(endpoint, {})
-        if isinstance(data, list):
-            items = data[:10]
-            if meta_type == "matchtype":
-                lines = [f"{d.get('matchtype')}: {d.get('desc')}" for d in items]
-            elif meta_type == "season":
-                lines = [f"{d.get('seasonId')}: {d.get('className')}" for d in items]
-            else:
-                lines = [f"{d.get('divisionId')}: {d.get('divisionName')}" for d in items]
-        else:
-            lines = ["데이터 없음"]
-        embed = discord.Embed(title=f"FC 메타 ({meta_type})", description="\n".join(lines) or "데이터 없음", color=0x3498DB)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "fcmeta", meta_type=meta_type)
 
 
 # LoL recent matches (Riot API)
 @bot.command(name="lol", aliases=["전적", "롤전적"])
 async def lol_recent(ctx, *, summoner_name: str):
     """롤 소환사 최근 5경기 요약을 조회합니다."""
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    if not RIOT_API_KEY:
-        return await ctx.send("RIOT_API_KEY가 설정되지 않았습니다.")
+    await core.run_prefix(ctx, "lol", summoner_name=summoner_name)
+
+
+@bot.command(name="lolstats", aliases=["롤통계"])
+async def lol_stats(ctx, *, args: str):
+    """롤 소환사 최근 20/50/100경기 통계. 마지막에 경기 수를 붙일 수 있습니다."""
+    summoner_name, _, tail = args.rpartition(" ")
+    if summoner_name and tail.isdigit():
+        games = int(tail)
+    else:
+        summoner_name, games = args, 20
+    await core.run_prefix(ctx, "lolstats", summoner_name=summoner_name.strip(), games=lol_stats_games(games))
+
+
+@bot.command(name="watch", aliases=["관심등록"])
+async def watch_cmd(ctx, game: str, *, name: str):
+    """관심 플레이어 등록: 주기적으로 미리 조회해 두고 새 경기를 알립니다."""
+    if ctx.guild is None:
+        return await ctx.send("서버에서만 사용할 수 있어요.")
+    err = check_watch_manage(ctx.author)
+    if err:
+        return await ctx.send(err)
     try:
-        summary = await fetch_lol_recent(summoner_name, LOL_DEFAULT_REGION)
-        embed = build_lol_embed(summary)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+        await ctx.send(await watch_add(ctx.guild, ctx.author, game, name))
+    except UserError as exc:
+        await ctx.send(str(exc))
+
+
+@bot.command(name="unwatch", aliases=["관심해제"])
+async def unwatch_cmd(ctx, game: str, *, name: str):
+    if ctx.guild is None:
+        return await ctx.send("서버에서만 사용할 수 있어요.")
+    err = check_watch_manage(ctx.author)
+    if err:
+        return await ctx.send(err)
+    try:
+        await ctx.send(await watch_remove(ctx.guild, game, name))
+    except UserError as exc:
+        await ctx.send(str(exc))
+
+
+@bot.command(name="watchlist", aliases=["관심목록"])
+async def watchlist_cmd(ctx):
+    if ctx.guild is None:
+        return await ctx.send("서버에서만 사용할 수 있어요.")
+    await ctx.send(**(await watch_list_reply(ctx.guild)).send_kwargs())
+
+
+@bot.command(name="watchchannel", aliases=["관심알림"])
+async def watchchannel_cmd(ctx, channel: discord.TextChannel | None = None, off: str | None = None):
+    """새 경기 알림 채널 지정(채널 생략 시 현재 채널, `off`로 끄기)."""
+    if ctx.guild is None:
+        return await ctx.send("서버에서만 사용할 수 있어요.")
+    err = check_watch_manage(ctx.author)
+    if err:
+        return await ctx.send(err)
+    if channel is None and off and off.lower() in ("off", "끄기"):
+        await store_call(watch_store.set_channel, ctx.guild.id, None)
+        return await ctx.send("새 경기 알림을 껐어요.")
+    channel = channel or ctx.channel
+    await store_call(watch_store.set_channel, ctx.guild.id, channel.id)
+    await ctx.send(f"새 경기 알림을 {channel.mention}에 보낼게요.")
 
 
 @bot.command(name="수민")
 async def su_min(ctx):
     """고정된 소환사 '신 수 민#kr1' 전적을 바로 보여줍니다."""
-    bot.loop.create_task(maybe_delete_command(ctx.message))
-    cd_err = check_cooldown(ctx.author.id)
-    if cd_err:
-        return await ctx.send(cd_err)
-    if not RIOT_API_KEY:
-        return await ctx.send("RIOT_API_KEY가 설정되지 않았습니다.")
-    target = "신 수 민#kr1"
-    try:
-        summary = await fetch_lol_recent(target, LOL_DEFAULT_REGION)
-        embed = build_lol_embed(summary)
-        await ctx.send(embed=embed)
-    except Exception as exc:
-        await ctx.send(f"조회 실패: {exc}")
+    await core.run_prefix(ctx, "lol", summoner_name="신 수 민#kr1")
 
 
+@tracer.wrap("extract_stream")
 async def extract_stream(url: str):
     loop = asyncio.get_event_loop()
     try:
-        info = await loop.run_in_executor(None, lambda: ytdl.extract_info(url, download=False))
+        with YTDL_LATENCY.time(op="stream"):
+            info = await loop.run_in_executor(None, lambda: get_ytdl().extract_info(url, download=False))
     except Exception as exc:
+        YTDL_ERRORS.inc(op="stream")
         raise ValueError(f"영상 정보를 불러오지 못했습니다: {exc}") from exc
 
     try:
@@ -1198,11 +2116,175 @@ async def extract_stream(url: str):
         raise ValueError(f"스트림 추출 중 오류: {exc}") from exc
 
 
+def is_playlist_url(url: str) -> bool:
+    parsed = urlparse(url)
+    if not parsed.scheme:
+        return False
+    return "list" in parse_qs(parsed.query) or parsed.path.rstrip("/").endswith("/playlist")
+
+
+def flat_entry_to_track(entry: dict) -> dict | None:
+    """평면 추출 항목을 미해석 트랙(dict, url=None)으로 변환."""
+    web_url = entry.get("webpage_url") or entry.get("url")
+    if web_url and "://" not in web_url and entry.get("id"):
+        web_url = f"https://www.youtube.com/watch?v={entry['id']}"
+    if not web_url:
+        return None
+    thumb = entry.get("thumbnail")
+    if not thumb and entry.get("thumbnails"):
+        thumb = entry["thumbnails"][-1].get("url")
+    return {
+        "title": entry.get("title") or "제목 없음",
+        "url": None,
+        "web_url": web_url,
+        "duration": entry.get("duration"),
+        "thumbnail": thumb,
+    }
+
+
+async def iter_playlist_entries(url: str):
+    """플레이리스트 항목을 추출되는 대로 하나씩 내보낸다(추출은 executor 스레드에서)."""
+    loop = asyncio.get_running_loop()
+    out: asyncio.Queue = asyncio.Queue()
+    done = object()
+    cancelled = threading.Event()
+
+    def produce():
+        # 지표는 루프 스레드에서만 갱신한다
+        started = time.perf_counter()
+        try:
+            ytdl_flat = get_ytdl(flat=True)
+            info = ytdl_flat.extract_info(url, download=False, process=False)
+            # watch?v=..&list=.. 처럼 플레이리스트로 넘겨주는 결과는 따라간다
+            hops = 0
+            while info and info.get("_type") in ("url", "url_transparent") and hops < 3:
+                info = ytdl_flat.extract_info(info["url"], download=False, process=False, ie_key=info.get("ie_key"))
+                hops += 1
+            entries = (info or {}).get("entries")
+            if entries is None:
+                if info:
+                    loop.call_soon_threadsafe(out.put_nowait, info)
+                return
+            for entry in entries:
+                if cancelled.is_set():
+                    break
+                if entry:
+                    loop.call_soon_threadsafe(out.put_nowait, entry)
+        except Exception as exc:
+            loop.call_soon_threadsafe(functools.partial(YTDL_ERRORS.inc, op="playlist"))
+            loop.call_soon_threadsafe(out.put_nowait, exc)
+        finally:
+            loop.call_soon_threadsafe(functools.partial(YTDL_LATENCY.observe, time.perf_counter() - started, op="playlist"))
+            loop.call_soon_threadsafe(out.put_nowait, done)
+
+    loop.run_in_executor(None, produce)
+    try:
+        while True:
+            entry = await out.get()
+            if entry is done:
+                return
+            if isinstance(entry, Exception):
+                raise ValueError(f"플레이리스트를 불러오지 못했습니다: {entry}") from entry
+            yield entry
+    finally:
+        cancelled.set()
+
+
+@tracer.wrap("resolve_track")
+async def resolve_track(guild_id: int, track: dict) -> dict:
+    """스트림 주소가 없는 트랙을 해석. 같은 트랙을 프리페치 중이면 그 결과를 기다린다."""
+    if track.get("url"):
+        return track
+    pending = prefetch_tasks.get(guild_id)
+    if pending and pending[0] is track and not pending[1].done():
+        await asyncio.shield(pending[1])
+        if track.get("url"):
+            return track
+    info = await extract_stream(track.get("web_url"))
+    track.update({k: v for k, v in info.items() if v is not None})
+    return track
+
+
+async def _prefetch(track: dict):
+    try:
+        info = await extract_stream(track.get("web_url"))
+        track.update({k: v for k, v in info.items() if v is not None})
+    except Exception as exc:
+        logger.info("Prefetch failed for %s: %s", track.get("web_url"), exc)
+
+
+def schedule_prefetch(guild_id: int):
+    """다음 곡이 미해석 상태면 백그라운드에서 미리 해석."""
+    pending = prefetch_tasks.get(guild_id)
+    if pending and not pending[1].done():
+        return
+    queue = get_queue(guild_id)
+    if not queue:
+        prefetch_tasks.pop(guild_id, None)
+        return
+    nxt = queue[0]
+    if nxt.get("url") or not nxt.get("web_url"):
+        return
+    prefetch_tasks[guild_id] = (nxt, asyncio.create_task(_prefetch(nxt)))
+
+
+@tracer.wrap("import_playlist")
+async def import_playlist(guild: discord.Guild, voice: discord.VoiceClient, url: str, *, channel, requester: discord.abc.User, send):
+    """플레이리스트를 스트리밍으로 읽어 대기열에 바로바로 추가하고, 진행 상황은 한 메시지를 편집해 알린다."""
+    progress = await send("플레이리스트를 불러오는 중...")
+    added = 0
+    stop_reason = None
+    last_edit = time.monotonic()
+    queue = get_queue(guild.id)
+    try:
+        async for entry in iter_playlist_entries(url):
+            track = flat_entry_to_track(entry)
+            if not track:
+                continue
+            stop_reason = check_queue_limits(guild.id, requester.id)
+            if stop_reason:
+                break
+            track.update(
+                {
+                    "channel": channel,
+                    "channel_id": channel.id,
+                    "requester": requester.display_name,
+                    "requester_id": requester.id,
+                }
+            )
+            queue.append(track)
+            added += 1
+            if added == 1 and not voice.is_playing() and not voice.is_paused():
+                # 첫 곡은 나머지 항목을 기다리지 않고 바로 재생
+                asyncio.create_task(start_playback(guild, voice))
+            now = time.monotonic()
+            if progress and now - last_edit >= PLAYLIST_PROGRESS_INTERVAL:
+                last_edit = now
+                try:
+                    await progress.edit(content=f"플레이리스트를 불러오는 중... {added}곡 추가")
+                except Exception:
+                    pass
+    except ValueError as exc:
+        stop_reason = str(exc)
+    text = f"플레이리스트에서 {added}곡을 추가했어요."
+    if stop_reason:
+        text += f"\n중단: {stop_reason}"
+    if progress:
+        try:
+            await progress.edit(content=text)
+        except Exception:
+            pass
+    schedule_prefetch(guild.id)
+    return added
+
+
 async def search_tracks(query: str, limit: int = 7):
     loop = asyncio.get_event_loop()
     try:
-        info = await loop.run_in_executor(None, lambda: ytdl.extract_info(f"ytsearch{limit}:{query}", download=False))
+        with YTDL_LATENCY.time(op="search"):
+            info = await loop.run_in_executor(None, lambda: get_ytdl().extract_info(f"ytsearch{limit}:{query}", download=False))
     except Exception as exc:
+        YTDL_ERRORS.inc(op="search")
         raise ValueError(f"검색 실패: {exc}") from exc
 
     entries = [e for e in (info.get("entries") or []) if e]
@@ -1265,9 +2347,16 @@ def build_panel_embed(guild: discord.Guild) -> discord.Embed:
 
 
 class PlayerView(discord.ui.View):
+    """패널 버튼. 고정 custom_id를 쓰므로 시작 시 한 번 등록하면 모든 길드/재시작 이후 패널에서 동작한다.
+    길드는 항상 interaction에서 가져온다."""
+
     def __init__(self):
         super().__init__(timeout=None)
 
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        await load_guild_state(interaction.guild_id)
+        return True
+
     async def _check_voice(self, interaction: discord.Interaction, require_bot=True):
         voice, err = enforce_voice_interaction(interaction, require_bot=require_bot)
         if err:
@@ -1275,7 +2364,7 @@ class PlayerView(discord.ui.View):
             return None
         return voice
 
-    @discord.ui.button(label="⏯ 재생/일시정지", style=discord.ButtonStyle.primary)
+    @discord.ui.button(label="⏯ 재생/일시정지", style=discord.ButtonStyle.primary, custom_id="minbot:panel:toggle")
     async def toggle(self, interaction: discord.Interaction, button: discord.ui.Button):
         voice = await self._check_voice(interaction, require_bot=True)
         if not voice:
@@ -1291,7 +2380,7 @@ class PlayerView(discord.ui.View):
         await update_panel(interaction.guild)
         await interaction.response.send_message(msg, ephemeral=True)
 
-    @discord.ui.button(label="⏭ 스킵", style=discord.ButtonStyle.secondary)
+    @discord.ui.button(label="⏭ 스킵", style=discord.ButtonStyle.secondary, custom_id="minbot:panel:skip")
     async def skip(self, interaction: discord.Interaction, button: discord.ui.Button):
         voice = await self._check_voice(interaction, require_bot=True)
         if not voice:
@@ -1302,8 +2391,8 @@ class PlayerView(discord.ui.View):
         await update_panel(interaction.guild)
         await interaction.response.send_message("다음 곡으로 넘어갑니다.", ephemeral=True)
 
-    @discord.ui.button(label="⏹ 정지", style=discord.ButtonStyle.danger)
-    async def stop(self, interaction: discord.Interaction, button: discord.ui.Button):
+    @discord.ui.button(label="⏹ 정지", style=discord.ButtonStyle.danger, custom_id="minbot:panel:stop")
+    async def stop_all(self, interaction: discord.Interaction, button: discord.ui.Button):
         voice = await self._check_voice(interaction, require_bot=True)
         if not voice:
             return
@@ -1314,12 +2403,12 @@ class PlayerView(discord.ui.View):
         await update_panel(interaction.guild)
         await interaction.response.send_message("정지했습니다.", ephemeral=True)
 
-    @discord.ui.button(label="🔄 새로고침", style=discord.ButtonStyle.secondary)
+    @discord.ui.button(label="🔄 새로고침", style=discord.ButtonStyle.secondary, custom_id="minbot:panel:refresh")
     async def refresh(self, interaction: discord.Interaction, button: discord.ui.Button):
         await update_panel(interaction.guild)
         await interaction.response.send_message("패널을 새로고침했습니다.", ephemeral=True)
 
-    @discord.ui.button(label="📜 대기열", style=discord.ButtonStyle.success)
+    @discord.ui.button(label="📜 대기열", style=discord.ButtonStyle.success, custom_id="minbot:panel:queue")
     async def show_queue(self, interaction: discord.Interaction, button: discord.ui.Button):
         voice = await self._check_voice(interaction, require_bot=True)
         if not voice:
@@ -1327,10 +2416,10 @@ class PlayerView(discord.ui.View):
         queue = get_queue(interaction.guild.id)
         if not queue:
             return await interaction.response.send_message("대기열이 비어 있어요.", ephemeral=True)
-        lines = [f"{idx+1}. {item['title']}" for idx, item in enumerate(queue)]
-        await interaction.response.send_message("대기열:\n" + "\n".join(lines), ephemeral=True)
+        text, view = queue_page_message(interaction.guild.id)
+        await interaction.response.send_message(text, view=view, ephemeral=True)
 
-    @discord.ui.button(label="🔁 반복", style=discord.ButtonStyle.secondary)
+    @discord.ui.button(label="🔁 반복", style=discord.ButtonStyle.secondary, custom_id="minbot:panel:repeat")
     async def toggle_repeat(self, interaction: discord.Interaction, button: discord.ui.Button):
         role_err = check_role_interaction(interaction)
         if role_err:
@@ -1338,23 +2427,62 @@ class PlayerView(discord.ui.View):
         guild_id = interaction.guild.id
         current = repeat_mode.get(guild_id, "off")
         next_mode = {"off": "one", "one": "all", "all": "off"}[current]
-        repeat_mode[guild_id] = next_mode
+        set_repeat_mode(guild_id, next_mode)
         await update_panel(interaction.guild)
-        save_state()
+        save_state(interaction.guild.id)
         await interaction.response.send_message(f"반복 모드: {next_mode}", ephemeral=True)
 
-    @discord.ui.button(label="🔀 셔플", style=discord.ButtonStyle.secondary)
+    @discord.ui.button(label="🔀 셔플", style=discord.ButtonStyle.secondary, custom_id="minbot:panel:shuffle")
     async def toggle_shuffle(self, interaction: discord.Interaction, button: discord.ui.Button):
         role_err = check_role_interaction(interaction)
         if role_err:
             return await interaction.response.send_message(role_err, ephemeral=True)
         guild_id = interaction.guild.id
-        shuffle_mode[guild_id] = not shuffle_mode.get(guild_id, False)
+        set_shuffle_mode(guild_id, not shuffle_mode.get(guild_id, False))
         await update_panel(interaction.guild)
-        save_state()
+        save_state(interaction.guild.id)
         await interaction.response.send_message(f"셔플: {'On' if shuffle_mode[guild_id] else 'Off'}", ephemeral=True)
 
 
+def render_queue_page(guild_id: int, page: int) -> tuple[str, int, int]:
+    """대기열의 한 페이지만 문자열로 만든다. (본문, 보정된 페이지, 전체 페이지 수)"""
+    queue = get_queue(guild_id)
+    total = len(queue)
+    pages = max(1, -(-total // QUEUE_PAGE_SIZE))
+    page = min(max(page, 0), pages - 1)
+    start = page * QUEUE_PAGE_SIZE
+    lines = [f"{start+idx+1}. {item['title']}" for idx, item in enumerate(queue.page(start, QUEUE_PAGE_SIZE))]
+    return f"대기열 ({page+1}/{pages}쪽, 총 {total}곡):\n" + "\n".join(lines), page, pages
+
+
+def queue_page_message(guild_id: int) -> tuple[str, Any]:
+    text, _, pages = render_queue_page(guild_id, 0)
+    if pages <= 1:
+        return text, discord.utils.MISSING
+    return text, QueuePageView(guild_id)
+
+
+class QueuePageView(discord.ui.View):
+    """대기열을 페이지 단위로 넘겨 보는 뷰. 요청한 페이지만 렌더링한다."""
+
+    def __init__(self, guild_id: int):
+        super().__init__(timeout=120)
+        self.guild_id = guild_id
+        self.page = 0
+
+    async def _show(self, interaction: discord.Interaction, page: int):
+        text, self.page, _ = render_queue_page(self.guild_id, page)
+        await interaction.response.edit_message(content=text, view=self)
+
+    @discord.ui.button(label="◀ 이전", style=discord.ButtonStyle.secondary)
+    async def prev_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page - 1)
+
+    @discord.ui.button(label="다음 ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page + 1)
+
+
 class SearchView(discord.ui.View):
     def __init__(self, guild_id: int, requester_id: int, is_ephemeral: bool):
         super().__init__(timeout=60)
@@ -1371,7 +2499,7 @@ class SearchView(discord.ui.View):
         async def callback(interaction: discord.Interaction):
             if interaction.user.id != self.requester_id:
                 return await interaction.response.send_message("검색을 시작한 사람만 선택할 수 있습니다.", ephemeral=True)
-            cd_err = check_cooldown(interaction.user.id)
+            cd_err = check_cooldown(interaction.user, interaction.guild)
             if cd_err:
                 return await interaction.response.send_message(cd_err, ephemeral=True)
             role_err = check_role_interaction(interaction)
@@ -1412,78 +2540,167 @@ class SearchView(discord.ui.View):
                 await start_playback(interaction.guild, voice)
                 await interaction.response.send_message(f"재생 시작: {track['title']}", ephemeral=True)
             await update_panel(interaction.guild, channel=interaction.channel)
-            save_state()
+            save_state(interaction.guild.id)
         return callback
 
 
-async def update_panel(guild: discord.Guild, channel: discord.abc.Messageable | None = None):
-    """패널 메시지를 해당 길드에 대해 갱신."""
-    queue = get_queue(guild.id)
-    track = current_track.get(guild.id)
-    voice = guild.voice_client
-    msg = panels.get(guild.id)
+class PanelRenderer:
+    """길드별 패널 갱신기. 짧은 창(PANEL_DEBOUNCE) 안의 요청을 모아 한 번만 그리고,
+    마지막으로 보낸 embed와 같으면 API 호출을 건너뛴다."""
 
-    # 대기열/재생 없음 상태면 패널 메시지를 제거
-    if not queue and not track and (voice is None or not voice.is_playing()):
-        if msg:
+    def __init__(self, guild_id: int):
+        self.guild_id = guild_id
+        self.channel: discord.abc.Messageable | None = None  # 재게시 요청 채널(마지막 요청 우선)
+        self.last_sent: dict | None = None
+        self._dirty = False
+        self._task: asyncio.Task | None = None
+
+    def request(self, channel: discord.abc.Messageable | None = None):
+        if channel is not None:
+            self.channel = channel
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while self._dirty:
+            await asyncio.sleep(PANEL_DEBOUNCE)
+            self._dirty = False
+            channel, self.channel = self.channel, None
+            guild = bot.get_guild(self.guild_id)
+            if guild is None:
+                return
             try:
-                await msg.delete()
-            except Exception:
-                pass
-            panels.pop(guild.id, None)
-        return
-
-    embed = build_panel_embed(guild)
-    view = PlayerView()
-
-    # 새 패널 채널이 지정되지 않았고, 기존 패널도 없으면 현재 트랙의 채널을 사용
-    if channel is None and msg is None:
-        if track:
-            channel = track.get("channel")
+                await self._render(guild, channel)
+            except Exception as exc:
+                logger.warning("Panel render failed for guild %s: %s", self.guild_id, exc)
+
+    async def _render(self, guild: discord.Guild, channel: discord.abc.Messageable | None):
+        queue = get_queue(guild.id)
+        track = current_track.get(guild.id)
+        voice = guild.voice_client
+        msg = panels.get(guild.id)
+
+        # 대기열/재생 없음 상태면 패널 메시지를 제거
+        if not queue and not track and (voice is None or not voice.is_playing()):
+            panel_wheel.cancel(guild.id)
+            if msg:
+                set_panel_message(guild.id, None)
+                self.last_sent = None
+                try:
+                    await msg.delete()
+                except Exception:
+                    pass
+            return
 
-    # 채널이 주어졌다면 기존 패널을 지우고 새 메시지를 만들어 하단에 유지
-    if channel:
-        old = panels.pop(guild.id, None)
-        if old:
+        embed = build_panel_embed(guild)
+        rendered = embed.to_dict()
+        view = panel_components or PlayerView()
+
+        # 새 패널 채널이 지정되지 않았고, 기존 패널도 없으면 현재 트랙의 채널을 사용
+        if channel is None and msg is None:
+            if track:
+                channel = track.get("channel")
+
+        # 기존 패널이 이미 그 채널의 마지막 메시지라면 재게시 대신 편집으로 처리
+        if channel and msg and getattr(channel, "id", None) == msg.channel.id and getattr(channel, "last_message_id", None) == msg.id:
+            channel = None
+
+        # 채널이 주어졌다면 기존 패널을 지우고 새 메시지를 만들어 하단에 유지
+        if channel:
+            old = panels.get(guild.id)
+            if old:
+                set_panel_message(guild.id, None)
+            self.last_sent = None
+            if old:
+                try:
+                    with tracer.span("panel_delete"):
+                        await old.delete()
+                except Exception:
+                    pass
             try:
-                await old.delete()
+                with tracer.span("panel_send"):
+                    set_panel_message(guild.id, await channel.send(embed=embed, view=view))
+                self.last_sent = rendered
             except Exception:
                 pass
-        try:
-            new_msg = await channel.send(embed=embed, view=view)
-            panels[guild.id] = new_msg
+            self._arm_refresh(guild.id)
             return
-        except Exception:
-            pass
 
-    # 채널이 없고 기존 패널만 있을 때는 편집으로만 갱신
-    if msg and not channel:
-        try:
-            await msg.edit(embed=embed, view=view)
-        except Exception:
-            panels.pop(guild.id, None)
+        # 채널이 없고 기존 패널만 있을 때는 내용이 바뀐 경우에만 편집
+        if msg and rendered != self.last_sent:
+            try:
+                with tracer.span("panel_edit"):
+                    await msg.edit(embed=embed, view=view)
+                self.last_sent = rendered
+            except Exception:
+                set_panel_message(guild.id, None)
+                self.last_sent = None
+        self._arm_refresh(guild.id)
+
+    @staticmethod
+    def _arm_refresh(guild_id: int):
+        if guild_id in panels:
+            panel_wheel.schedule(guild_id, PANEL_REFRESH_INTERVAL)
+            panel_wheel_wakeup.set()
+        else:
+            panel_wheel.cancel(guild_id)
 
 
-async def start_playback(guild: discord.Guild, voice: discord.VoiceClient):
-    queue = get_queue(guild.id)
-    if not queue:
-        return
+async def update_panel(guild: discord.Guild, channel: discord.abc.Messageable | None = None):
+    """패널 갱신을 요청. 실제 반영은 길드별 PanelRenderer가 모아서 처리한다."""
+    with tracer.span("update_panel", repost=channel is not None):
+        renderer = panel_renderers.get(guild.id)
+        if renderer is None:
+            renderer = panel_renderers[guild.id] = PanelRenderer(guild.id)
+        renderer.request(channel)
 
-    track = queue.popleft()
-    # 셔플 모드일 때 무작위로 꺼내기
-    if shuffle_mode.get(guild.id) and len(queue) > 1:
-        idx = random.randrange(len(queue))
-        track = queue[idx]
-        del queue[idx]
 
-    title = track["title"]
-    stream_url = track["url"]
+def track_channel(guild: discord.Guild, voice: discord.VoiceClient, track: dict):
     channel = track.get("channel")
     channel_id = track.get("channel_id")
     if channel is None and channel_id:
         channel = bot.get_channel(channel_id)
     if channel is None:
         channel = voice.channel or guild.system_channel
+    return channel
+
+
+@tracer.wrap("start_playback")
+async def start_playback(guild: discord.Guild, voice: discord.VoiceClient):
+    lock = playback_locks.setdefault(guild.id, asyncio.Lock())
+    async with lock:
+        if voice.is_playing() or voice.is_paused():
+            return
+        await _start_next(guild, voice)
+
+
+async def _start_next(guild: discord.Guild, voice: discord.VoiceClient):
+    queue = get_queue(guild.id)
+    while True:
+        if not queue:
+            return
+        # 셔플 모드일 때 무작위로 꺼내기
+        if shuffle_mode.get(guild.id) and len(queue) > 1:
+            track = queue.pop(random.randrange(len(queue)))
+        else:
+            track = queue.popleft()
+        try:
+            # 플레이리스트로 들어온 곡은 재생 직전에 스트림 주소를 해석
+            await resolve_track(guild.id, track)
+            break
+        except Exception as exc:
+            logger.warning("Skipping unplayable track %s: %s", track.get("web_url"), exc)
+            channel = track_channel(guild, voice, track)
+            if channel and not QUIET_NOTICE:
+                try:
+                    await channel.send(f"재생할 수 없는 곡을 건너뜁니다: {track.get('title')}")
+                except Exception:
+                    pass
+
+    title = track["title"]
+    stream_url = track["url"]
+    channel = track_channel(guild, voice, track)
     current_track[guild.id] = track
 
     ffmpeg_opts = {
@@ -1491,25 +2708,27 @@ async def start_playback(guild: discord.Guild, voice: discord.VoiceClient):
         # volume 필터로 출력 음량 조절 (VOLUME_DB, 음수가 더 작음)
         "options": f"-vn -ac 2 -ar 48000 -b:a 192k -application audio -filter:a volume={VOLUME_DB}dB",
     }
-    source = discord.FFmpegOpusAudio(stream_url, **ffmpeg_opts)
-
     def after_playback(error):
         bot.loop.call_soon_threadsafe(asyncio.create_task, handle_after(guild, error))
 
-    voice.play(source, after=after_playback)
+    with tracer.span("ffmpeg_spawn"):
+        source = discord.FFmpegOpusAudio(stream_url, **ffmpeg_opts)
+        voice.play(source, after=after_playback)
+    schedule_prefetch(guild.id)
     # 이전 재생 알림 삭제 후 새 알림(가능하면 기존 메시지를 재활용)
     await delete_track_message(guild.id)
     if not QUIET_NOTICE and channel:
         try:
-            msg = await channel.send(f"재생 시작: {title}")
-            track_messages[guild.id] = msg
+            with tracer.span("channel_send"):
+                msg = await channel.send(f"재생 시작: {title}")
+            set_track_message(guild.id, msg)
         except Exception:
             pass
     # repeat_all이면 재생된 곡을 큐 끝으로 보냄
     if repeat_mode.get(guild.id) == "all":
         get_queue(guild.id).append(track)
     await update_panel(guild, channel=channel)
-    save_state()
+    save_state(guild.id)
 
 
 async def handle_after(guild: discord.Guild, error: Exception | None):
@@ -1523,7 +2742,7 @@ async def handle_after(guild: discord.Guild, error: Exception | None):
             current_track[guild.id] = None
             await voice.disconnect()
             await update_panel(guild)
-            save_state()
+            save_state(guild.id)
             return
 
     if error and voice:
@@ -1570,7 +2789,7 @@ async def leave(ctx):
     clear_search(ctx.guild.id)
     current_track[ctx.guild.id] = None
     await update_panel(ctx.guild)
-    save_state()
+    save_state(ctx.guild.id)
     await ctx.send("음성 채널 연결을 끊었습니다.")
 
 
@@ -1578,7 +2797,7 @@ async def leave(ctx):
 async def play(ctx, *, url: str):
     try:
         bot.loop.create_task(maybe_delete_command(ctx.message))
-        cd_err = check_cooldown(ctx.author.id)
+        cd_err = check_cooldown(ctx.author, ctx.guild)
         if cd_err:
             return await ctx.send(cd_err)
         role_err = check_role_ctx(ctx)
@@ -1588,12 +2807,20 @@ async def play(ctx, *, url: str):
         if err:
             return await ctx.send(err)
         if voice is None:
-            voice = await ctx.author.voice.channel.connect()
+            with tracer.span("voice_connect"):
+                voice = await ctx.author.voice.channel.connect()
 
         limit_err = check_queue_limits(ctx.guild.id, ctx.author.id)
         if limit_err:
             return await ctx.send(limit_err)
 
+        if is_playlist_url(url):
+            await import_playlist(ctx.guild, voice, url, channel=ctx.channel, requester=ctx.author, send=ctx.send)
+            await update_panel(ctx.guild, channel=ctx.channel)
+            clear_search(ctx.guild.id)
+            save_state(ctx.guild.id)
+            return
+
         info = await extract_stream(url)
         queue = get_queue(ctx.guild.id)
         info.update(
@@ -1607,12 +2834,13 @@ async def play(ctx, *, url: str):
         queue.append(info)
 
         if voice.is_playing() or voice.is_paused():
-            await ctx.send(f"대기열에 추가: {info['title']}")
+            with tracer.span("channel_send"):
+                await ctx.send(f"대기열에 추가: {info['title']}")
         else:
             await start_playback(ctx.guild, voice)
         await update_panel(ctx.guild, channel=ctx.channel)
         clear_search(ctx.guild.id)
-        save_state()
+        save_state(ctx.guild.id)
     except Exception as exc:
         return await ctx.send(f"재생에 실패했습니다: {exc}")
 
@@ -1631,7 +2859,7 @@ async def stop(ctx):
     current_track[ctx.guild.id] = None
     voice.stop()
     await update_panel(ctx.guild)
-    save_state()
+    save_state(ctx.guild.id)
     await ctx.send("재생을 중지했어요.")
 
 
@@ -1697,8 +2925,8 @@ async def queue_list(ctx):
     queue = get_queue(ctx.guild.id)
     if not queue:
         return await ctx.send("대기열이 비어 있어요.")
-    lines = [f"{idx+1}. {item['title']}" for idx, item in enumerate(queue)]
-    await ctx.send("대기열:\n" + "\n".join(lines))
+    text, view = queue_page_message(ctx.guild.id)
+    await ctx.send(text, view=view)
 
 
 @bot.command(name="clear")
@@ -1713,7 +2941,7 @@ async def queue_clear(ctx):
     queue = get_queue(ctx.guild.id)
     queue.clear()
     await update_panel(ctx.guild)
-    save_state()
+    save_state(ctx.guild.id)
     await ctx.send("대기열을 비웠습니다.")
 
 
@@ -1747,11 +2975,9 @@ async def queue_move(ctx, src: int, dst: int):
     dst -= 1
     if src < 0 or src >= len(queue) or dst < 0 or dst >= len(queue):
         return await ctx.send("인덱스가 잘못되었습니다.")
-    item = queue[src]
-    del queue[src]
-    queue.insert(dst, item)
+    queue.move(src, dst)
     await update_panel(ctx.guild)
-    save_state()
+    save_state(ctx.guild.id)
     await ctx.send("순서를 변경했습니다.")
 
 
@@ -1771,10 +2997,9 @@ async def queue_remove(ctx, index: int):
     index -= 1
     if index < 0 or index >= len(queue):
         return await ctx.send("인덱스가 잘못되었습니다.")
-    removed = queue[index]["title"]
-    del queue[index]
+    removed = queue.pop(index)["title"]
     await update_panel(ctx.guild)
-    save_state()
+    save_state(ctx.guild.id)
     await ctx.send(f"대기열에서 제거했습니다: {removed}")
 
 
@@ -1810,7 +3035,7 @@ async def choose_cmd(ctx, index: int):
     if index < 0 or index >= len(results):
         return await ctx.send("인덱스가 잘못되었습니다.")
 
-    cd_err = check_cooldown(ctx.author.id)
+    cd_err = check_cooldown(ctx.author, ctx.guild)
     if cd_err:
         return await ctx.send(cd_err)
     role_err = check_role_ctx(ctx)
@@ -1846,7 +3071,7 @@ async def choose_cmd(ctx, index: int):
     else:
         await start_playback(ctx.guild, voice)
     await update_panel(ctx.guild, channel=ctx.channel)
-    save_state()
+    save_state(ctx.guild.id)
 
 
 @tree.command(name="join", description="현재 음성 채널에 봇을 초대합니다.")
@@ -1869,33 +3094,41 @@ async def slash_leave(interaction: discord.Interaction):
     clear_search(interaction.guild.id)
     current_track[interaction.guild.id] = None
     await update_panel(interaction.guild)
-    save_state()
+    save_state(interaction.guild.id)
     await interaction.response.send_message("음성 채널 연결을 끊었습니다.", ephemeral=True)
 
 
 @tree.command(name="play", description="유튜브 링크의 오디오를 재생합니다.")
-@app_commands.describe(url="유튜브 주소")
+@app_commands.describe(url="유튜브 주소 (플레이리스트/믹스 주소면 전체를 가져옵니다)")
 async def slash_play(interaction: discord.Interaction, url: str):
     if not interaction.response.is_done():
-        await interaction.response.defer(thinking=True)
+        with tracer.span("defer"):
+            await interaction.response.defer(thinking=True)
 
     try:
-        cd_err = check_cooldown(interaction.user.id)
-        if cd_err:
-            return await interaction.followup.send(cd_err, ephemeral=True)
-        role_err = check_role_interaction(interaction)
-        if role_err:
-            return await interaction.followup.send(role_err, ephemeral=True)
-        voice, err = enforce_voice_interaction(interaction, require_bot=False)
+        with tracer.span("checks"):
+            check_err = check_cooldown(interaction.user, interaction.guild) or check_role_interaction(interaction)
+            voice, err = (None, check_err) if check_err else enforce_voice_interaction(interaction, require_bot=False)
         if err:
             return await interaction.followup.send(err, ephemeral=True)
         if voice is None:
-            voice = await interaction.user.voice.channel.connect()
+            with tracer.span("voice_connect"):
+                voice = await interaction.user.voice.channel.connect()
 
         limit_err = check_queue_limits(interaction.guild.id, interaction.user.id)
         if limit_err:
             return await interaction.followup.send(limit_err, ephemeral=True)
 
+        if is_playlist_url(url):
+            async def send(content):
+                return await interaction.followup.send(content, wait=True)
+
+            await import_playlist(interaction.guild, voice, url, channel=interaction.channel, requester=interaction.user, send=send)
+            await update_panel(interaction.guild, channel=interaction.channel)
+            clear_search(interaction.guild.id)
+            save_state(interaction.guild.id)
+            return
+
         info = await extract_stream(url)
         queue = get_queue(interaction.guild.id)
         info.update(
@@ -1909,12 +3142,13 @@ async def slash_play(interaction: discord.Interaction, url: str):
         queue.append(info)
 
         if voice.is_playing() or voice.is_paused():
-            await interaction.followup.send(f"대기열에 추가: {info['title']}", ephemeral=True)
+            with tracer.span("followup_send"):
+                await interaction.followup.send(f"대기열에 추가: {info['title']}", ephemeral=True)
         else:
             await start_playback(interaction.guild, voice)
         await update_panel(interaction.guild, channel=interaction.channel)
         clear_search(interaction.guild.id)
-        save_state()
+        save_state(interaction.guild.id)
     except Exception as exc:
         try:
             await interaction.followup.send(f"재생에 실패했습니다: {exc}", ephemeral=True)
@@ -1935,7 +3169,7 @@ async def slash_stop(interaction: discord.Interaction):
     current_track[interaction.guild.id] = None
     voice.stop()
     await update_panel(interaction.guild)
-    save_state()
+    save_state(interaction.guild.id)
     await interaction.response.send_message("재생을 중지했어요.", ephemeral=True)
 
 
@@ -1997,8 +3231,8 @@ async def slash_queue(interaction: discord.Interaction):
     queue = get_queue(interaction.guild.id)
     if not queue:
         return await interaction.response.send_message("대기열이 비어 있어요.", ephemeral=True)
-    lines = [f"{idx+1}. {item['title']}" for idx, item in enumerate(queue)]
-    await interaction.response.send_message("대기열:\n" + "\n".join(lines), ephemeral=True)
+    text, view = queue_page_message(interaction.guild.id)
+    await interaction.response.send_message(text, view=view, ephemeral=True)
 
 
 @tree.command(name="clear", description="대기열을 비웁니다.")
@@ -2013,7 +3247,7 @@ async def slash_clear(interaction: discord.Interaction):
     queue.clear()
     clear_search(interaction.guild.id)
     await update_panel(interaction.guild)
-    save_state()
+    save_state(interaction.guild.id)
     await interaction.response.send_message("대기열을 비웠습니다.", ephemeral=True)
 
 
@@ -2045,11 +3279,9 @@ async def slash_move(interaction: discord.Interaction, src: int, dst: int):
     dst -= 1
     if src < 0 or src >= len(queue) or dst < 0 or dst >= len(queue):
         return await interaction.response.send_message("인덱스가 잘못되었습니다.", ephemeral=True)
-    item = queue[src]
-    del queue[src]
-    queue.insert(dst, item)
+    queue.move(src, dst)
     await update_panel(interaction.guild)
-    save_state()
+    save_state(interaction.guild.id)
     await interaction.response.send_message("순서를 변경했습니다.", ephemeral=True)
 
 
@@ -2068,10 +3300,9 @@ async def slash_remove(interaction: discord.Interaction, index: int):
     index -= 1
     if index < 0 or index >= len(queue):
         return await interaction.response.send_message("인덱스가 잘못되었습니다.", ephemeral=True)
-    removed = queue[index]["title"]
-    del queue[index]
+    removed = queue.pop(index)["title"]
     await update_panel(interaction.guild)
-    save_state()
+    save_state(interaction.guild.id)
     await interaction.response.send_message(f"대기열에서 제거했습니다: {removed}", ephemeral=True)
 
 
@@ -2109,7 +3340,7 @@ async def slash_choose(interaction: discord.Interaction, index: int):
     if index < 0 or index >= len(results):
         return await interaction.response.send_message("인덱스가 잘못되었습니다.", ephemeral=True)
 
-    cd_err = check_cooldown(interaction.user.id)
+    cd_err = check_cooldown(interaction.user, interaction.guild)
     if cd_err:
         return await interaction.response.send_message(cd_err, ephemeral=True)
     role_err = check_role_interaction(interaction)
@@ -2145,7 +3376,7 @@ async def slash_choose(interaction: discord.Interaction, index: int):
     else:
         await start_playback(interaction.guild, voice)
     await update_panel(interaction.guild, channel=interaction.channel)
-    save_state()
+    save_state(interaction.guild.id)
 
 
 # ---------- MapleStory Slash ----------
@@ -2154,257 +3385,91 @@ async def slash_choose(interaction: discord.Interaction, index: int):
 @tree.command(name="msbasic", description="메이플 기본 정보 조회")
 @app_commands.describe(character_name="캐릭터 이름")
 async def slash_msbasic(interaction: discord.Interaction, character_name: str):
-    if not NEXON_API_KEY:
-        return await interaction.response.send_message("NEXON_API_KEY가 설정되지 않았습니다.", ephemeral=True)
-    await interaction.response.defer(ephemeral=True)
-    try:
-        ocid = await get_ocid(character_name)
-        basic = await nexon_get("/maplestory/v1/character/basic", {"ocid": ocid})
-        name = basic.get("character_name", character_name)
-        world = basic.get("world_name", "?")
-        level = basic.get("character_level", "?")
-        job = basic.get("character_class", "?")
-        gender = basic.get("character_gender", "?")
-        guild = basic.get("character_guild_name") or "-"
-        create = basic.get("character_date_create") or "-"
-        desc = f"월드: {world}\n레벨: {level}\n직업: {job}\n성별: {gender}\n길드: {guild}\n생성일: {create}"
-        embed = discord.Embed(title=f"{name} 기본 정보", description=desc, color=0x57F287)
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "msbasic", character_name=character_name)
 
 
 @tree.command(name="msstat", description="메이플 종합 능력치 조회")
 @app_commands.describe(character_name="캐릭터 이름")
 async def slash_msstat(interaction: discord.Interaction, character_name: str):
-    await interaction.response.defer(ephemeral=True)
-    try:
-        ocid = await get_ocid(character_name)
-        stat = await nexon_get("/maplestory/v1/character/stat", {"ocid": ocid})
-        latest = (stat.get("stat") or [])[:8]
-        lines = [f"{s.get('stat_name')}: {s.get('stat_value')}" for s in latest]
-        embed = discord.Embed(title=f"{character_name} 종합 능력치", description="\n".join(lines) or "데이터 없음", color=0x57F287)
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "msstat", character_name=character_name)
 
 
 @tree.command(name="mspop", description="메이플 인기도 조회")
 @app_commands.describe(character_name="캐릭터 이름")
 async def slash_mspop(interaction: discord.Interaction, character_name: str):
-    await interaction.response.defer(ephemeral=True)
-    try:
-        ocid = await get_ocid(character_name)
-        pop = await nexon_get("/maplestory/v1/character/popularity", {"ocid": ocid})
-        value = pop.get("popularity") or "?"
-        embed = discord.Embed(title=f"{character_name} 인기도", description=f"인기도: {value}", color=0x57F287)
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "mspop", character_name=character_name)
 
 
 @tree.command(name="msequip", description="메이플 장착 장비 조회")
 @app_commands.describe(character_name="캐릭터 이름")
 async def slash_msequip(interaction: discord.Interaction, character_name: str):
-    await interaction.response.defer(ephemeral=True)
-    try:
-        ocid = await get_ocid(character_name)
-        eq = await nexon_get("/maplestory/v1/character/item-equipment", {"ocid": ocid})
-        items = (eq.get("item_equipment") or [])[:10]
-        lines = []
-        for it in items:
-            name = it.get("item_name") or "이름없음"
-            star = it.get("starforce") or 0
-            main = it.get("item_option", [])
-            first_opt = main[0]["option_value"] if main else ""
-            lines.append(f"{name} ★{star} {first_opt}")
-        embed = discord.Embed(title=f"{character_name} 장착 장비 (상위 10)", description="\n".join(lines) or "데이터 없음", color=0x57F287)
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "msequip", character_name=character_name)
 
 
 @tree.command(name="msskill", description="메이플 스킬 조회")
 @app_commands.describe(character_name="캐릭터 이름")
 async def slash_msskill(interaction: discord.Interaction, character_name: str):
-    await interaction.response.defer(ephemeral=True)
-    try:
-        ocid = await get_ocid(character_name)
-        skills = await nexon_get("/maplestory/v1/character/skill", {"ocid": ocid})
-        list_skill = (skills.get("character_skill") or [])[:10]
-        lines = [f"{s.get('skill_name')} Lv.{s.get('skill_level')}" for s in list_skill]
-        embed = discord.Embed(title=f"{character_name} 스킬 (상위 10)", description="\n".join(lines) or "데이터 없음", color=0x57F287)
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "msskill", character_name=character_name)
 
 
 @tree.command(name="mslink", description="메이플 링크 스킬 조회")
 @app_commands.describe(character_name="캐릭터 이름")
 async def slash_mslink(interaction: discord.Interaction, character_name: str):
-    await interaction.response.defer(ephemeral=True)
-    try:
-        ocid = await get_ocid(character_name)
-        data = await nexon_get("/maplestory/v1/character/link-skill", {"ocid": ocid})
-        skills = (data.get("character_link_skill") or [])[:5]
-        lines = [f"{s.get('skill_name')} Lv.{s.get('skill_level')}" for s in skills]
-        embed = discord.Embed(title=f"{character_name} 링크 스킬", description="\n".join(lines) or "데이터 없음", color=0x57F287)
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "mslink", character_name=character_name)
 
 
 @tree.command(name="mspet", description="메이플 펫 정보 조회")
 @app_commands.describe(character_name="캐릭터 이름")
 async def slash_mspet(interaction: discord.Interaction, character_name: str):
-    await interaction.response.defer(ephemeral=True)
-    try:
-        ocid = await get_ocid(character_name)
-        data = await nexon_get("/maplestory/v1/character/pet-equipment", {"ocid": ocid})
-        pets = data.get("pet_equipment") or []
-        lines = []
-        for p in pets[:3]:
-            lines.append(f"{p.get('pet_name')} | 장비: {p.get('pet_equipment_item_name') or '-'}")
-        embed = discord.Embed(title=f"{character_name} 펫 정보", description="\n".join(lines) or "펫 없음", color=0x57F287)
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "mspet", character_name=character_name)
 
 
 @tree.command(name="msandroid", description="메이플 안드로이드 정보 조회")
 @app_commands.describe(character_name="캐릭터 이름")
 async def slash_msandroid(interaction: discord.Interaction, character_name: str):
-    await interaction.response.defer(ephemeral=True)
-    try:
-        ocid = await get_ocid(character_name)
-        data = await nexon_get("/maplestory/v1/character/android-equipment", {"ocid": ocid})
-        android = data.get("android_name") or "-"
-        hair = data.get("android_hair") or "-"
-        face = data.get("android_face") or "-"
-        embed = discord.Embed(title=f"{character_name} 안드로이드", color=0x57F287)
-        embed.add_field(name="이름", value=android, inline=False)
-        embed.add_field(name="헤어", value=hair, inline=True)
-        embed.add_field(name="성형", value=face, inline=True)
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "msandroid", character_name=character_name)
 
 
 @tree.command(name="msbeauty", description="메이플 헤어/성형/피부 조회")
 @app_commands.describe(character_name="캐릭터 이름")
 async def slash_msbeauty(interaction: discord.Interaction, character_name: str):
-    await interaction.response.defer(ephemeral=True)
-    try:
-        ocid = await get_ocid(character_name)
-        data = await nexon_get("/maplestory/v1/character/beauty-equipment", {"ocid": ocid})
-        hair = data.get("character_hair") or "-"
-        face = data.get("character_face") or "-"
-        skin = data.get("character_skin_name") or "-"
-        embed = discord.Embed(title=f"{character_name} 헤어/성형/피부", color=0x57F287)
-        embed.add_field(name="헤어", value=hair, inline=False)
-        embed.add_field(name="성형", value=face, inline=False)
-        embed.add_field(name="피부", value=skin, inline=False)
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "msbeauty", character_name=character_name)
 
 
 @tree.command(name="msvmatrix", description="메이플 V매트릭스 조회")
 @app_commands.describe(character_name="캐릭터 이름")
 async def slash_msvmatrix(interaction: discord.Interaction, character_name: str):
-    await interaction.response.defer(ephemeral=True)
-    try:
-        ocid = await get_ocid(character_name)
-        data = await nexon_get("/maplestory/v1/character/vmatrix", {"ocid": ocid})
-        cores = (data.get("character_v_core_equipment") or [])[:6]
-        lines = [f"{c.get('v_core_name')} Lv.{c.get('v_core_level')}" for c in cores]
-        embed = discord.Embed(title=f"{character_name} V매트릭스", description="\n".join(lines) or "데이터 없음", color=0x57F287)
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "msvmatrix", character_name=character_name)
 
 
 @tree.command(name="mshexa", description="메이플 HEXA 코어 조회")
 @app_commands.describe(character_name="캐릭터 이름")
 async def slash_mshexa(interaction: discord.Interaction, character_name: str):
-    await interaction.response.defer(ephemeral=True)
-    try:
-        ocid = await get_ocid(character_name)
-        data = await nexon_get("/maplestory/v1/character/hexamatrix", {"ocid": ocid})
-        skills = (data.get("character_hexacore_equipment") or [])[:6]
-        lines = [f"{h.get('hexa_core_name')} Lv.{h.get('hexa_core_level')}" for h in skills]
-        embed = discord.Embed(title=f"{character_name} HEXA 코어", description="\n".join(lines) or "데이터 없음", color=0x57F287)
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "mshexa", character_name=character_name)
 
 
 @tree.command(name="mshexastat", description="메이플 HEXA 스탯 조회")
 @app_commands.describe(character_name="캐릭터 이름")
 async def slash_mshexastat(interaction: discord.Interaction, character_name: str):
-    await interaction.response.defer(ephemeral=True)
-    try:
-        ocid = await get_ocid(character_name)
-        data = await nexon_get("/maplestory/v1/character/hexamatrix-stat", {"ocid": ocid})
-        stats = data.get("character_hexamatrix_stat_core") or []
-        lines = [f"{s.get('stat_core_name')} Lv.{s.get('stat_core_level')}" for s in stats[:5]]
-        embed = discord.Embed(title=f"{character_name} HEXA 스탯", description="\n".join(lines) or "데이터 없음", color=0x57F287)
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "mshexastat", character_name=character_name)
 
 
 @tree.command(name="msdojo", description="메이플 무릉도장 기록 조회")
 @app_commands.describe(character_name="캐릭터 이름")
 async def slash_msdojo(interaction: discord.Interaction, character_name: str):
-    await interaction.response.defer(ephemeral=True)
-    try:
-        ocid = await get_ocid(character_name)
-        data = await nexon_get("/maplestory/v1/character/dojang", {"ocid": ocid})
-        floor = data.get("dojang_best_floor") or "?"
-        rank = data.get("dojang_best_time_rank") or "?"
-        time_val = data.get("dojang_best_time") or "?"
-        embed = discord.Embed(title=f"{character_name} 무릉도장", color=0x57F287)
-        embed.add_field(name="최고 층", value=floor, inline=True)
-        embed.add_field(name="랭크", value=rank, inline=True)
-        embed.add_field(name="기록", value=f"{time_val}초", inline=True)
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "msdojo", character_name=character_name)
 
 
 @tree.command(name="msotherstat", description="메이플 기타 능력치 조회")
 @app_commands.describe(character_name="캐릭터 이름")
 async def slash_msotherstat(interaction: discord.Interaction, character_name: str):
-    await interaction.response.defer(ephemeral=True)
-    try:
-        ocid = await get_ocid(character_name)
-        data = await nexon_get("/maplestory/v1/character/other-stat", {"ocid": ocid})
-        stats = data.get("character_additional_information") or []
-        lines = [f"{s.get('stat_name')}: {s.get('stat_value')}" for s in stats[:8]]
-        embed = discord.Embed(title=f"{character_name} 기타 능력치", description="\n".join(lines) or "데이터 없음", color=0x57F287)
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "msotherstat", character_name=character_name)
 
 
 @tree.command(name="msauc", description="메이플 경매장 시세 조회")
 @app_commands.describe(item_name="아이템 이름")
 async def slash_msauc(interaction: discord.Interaction, item_name: str):
-    await interaction.response.defer(ephemeral=True)
-    try:
-        params, clean = auction_params(item_name)
-        data = await nexon_get("/maplestory/v1/auction", params)
-        rows = sorted(data.get("items") or [], key=lambda x: x.get("unit_price", 0))[:5]
-        lines = [f"{r.get('item_name')} | {r.get('unit_price')}메소 x{r.get('count',1)}" for r in rows]
-        embed = discord.Embed(title=f"경매장 시세: {clean}", description="\n".join(lines) or "데이터 없음", color=0xFEE75C)
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        msg = str(exc)
-        if "OPENAPI00004" in msg or "valid parameter" in msg:
-            await interaction.followup.send("조회 실패: 아이템명을 정확히 입력해 주세요. 예) /msauc 몽환의 벨트", ephemeral=True)
-        else:
-            await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "msauc", item_name=item_name)
 
 
 # ---------- FC Online Slash ----------
@@ -2413,216 +3478,129 @@ async def slash_msauc(interaction: discord.Interaction, item_name: str):
 @tree.command(name="fcbasic", description="FC 온라인 기본 정보")
 @app_commands.describe(nickname="닉네임")
 async def slash_fcbasic(interaction: discord.Interaction, nickname: str):
-    if not FIFA_API_KEY:
-        return await interaction.response.send_message("FIFA_API_KEY가 설정되지 않았습니다.", ephemeral=True)
-    await interaction.response.defer(ephemeral=True)
-    try:
-        ouid = await fc_get_ouid(nickname)
-        data = await fc_get("/fconline/v1/user/basic", {"ouid": ouid})
-        level = data.get("level", "?")
-        nickname = data.get("nickname", nickname)
-        access = data.get("access_id", "-")
-        desc = f"레벨: {level}\n닉네임: {nickname}\nAccess ID: {access}"
-        embed = discord.Embed(title=f"{nickname} 기본 정보", description=desc, color=0x3498DB)
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "fcbasic", nickname=nickname)
 
 
 @tree.command(name="fcmax", description="FC 역대 최고 등급")
 @app_commands.describe(nickname="닉네임")
 async def slash_fcmax(interaction: discord.Interaction, nickname: str):
-    await interaction.response.defer(ephemeral=True)
-    try:
-        ouid = await fc_get_ouid(nickname)
-        data = await fc_get("/fconline/v1/user/maxdivision", {"ouid": ouid})
-        latest = data.get("maxdivision") or []
-        lines = [f"시즌:{d.get('seasonId')} | 등급:{d.get('division')} | 타입:{d.get('matchType')}" for d in latest[:5]]
-        embed = discord.Embed(title=f"{nickname} 역대 최고 등급", description="\n".join(lines) or "데이터 없음", color=0x3498DB)
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "fcmax", nickname=nickname)
 
 
 @tree.command(name="fcmatch", description="FC 최근 경기 ID 조회")
 @app_commands.describe(nickname="닉네임", matchtype="매치타입 (기본 50)")
 async def slash_fcmatch(interaction: discord.Interaction, nickname: str, matchtype: str = "50"):
-    await interaction.response.defer(ephemeral=True)
-    try:
-        ouid = await fc_get_ouid(nickname)
-        params = {"ouid": ouid, "offset": 0, "limit": 5, "matchtype": matchtype}
-        matches = await fc_get("/fconline/v1/user/match", params)
-        ids = matches if isinstance(matches, list) else []
-        lines = []
-        for mid in ids[:5]:
-            try:
-                detail = await fc_get("/fconline/v1/match-detail", {"matchid": mid})
-                infos = detail.get("matchInfo") or []
-                if len(infos) < 2:
-                    lines.append(f"{mid}: 상세 없음")
-                    continue
-                p1, p2 = infos[0], infos[1]
-                mine = p1 if p1.get("ouid") == ouid else p2
-                opp = p2 if mine is p1 else p1
-                my_score = mine.get("shoot", {}).get("goalTotal") if mine else "?"
-                opp_score = opp.get("shoot", {}).get("goalTotal") if opp else "?"
-                opp_name = opp.get("nickname") if opp else "?"
-                result = "무" if my_score == opp_score else ("승" if my_score > opp_score else "패")
-                lines.append(f"{result} {my_score}:{opp_score} vs {opp_name} (matchId {mid})")
-            except Exception as inner:
-                lines.append(f"{mid}: 상세 실패 ({inner})")
-        embed = discord.Embed(title=f"{nickname} 최근 경기 (최대 5)", description="\n".join(lines) or "데이터 없음", color=0x3498DB)
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "fcmatch", nickname=nickname, matchtype=matchtype)
 
 
 @tree.command(name="fctrade", description="FC 최근 거래 조회")
 @app_commands.describe(nickname="닉네임", tradetype="sell(판매)/buy(구매), 기본 sell")
 async def slash_fctrade(interaction: discord.Interaction, nickname: str, tradetype: str = "sell"):
-    await interaction.response.defer(ephemeral=True)
-    try:
-        nickname = nickname.strip()
-        tmap = {"sell": "sell", "buy": "buy", "판매": "sell", "구매": "buy"}
-        tval = tmap.get(tradetype.lower())
-        if not tval:
-            return await interaction.followup.send("tradetype은 sell(판매)/buy(구매) 중 하나", ephemeral=True)
-        ouid = await fc_get_ouid(nickname)
-        params = {"ouid": ouid, "tradetype": tval, "offset": 0, "limit": 5}
-        try:
-            data = await fc_get("/fconline/v1/user/trade", params)
-        except ValueError as exc:
-            if "OPENAPI00004" in str(exc):
-                data = await fc_get("/fconline/v1/user/trade", {"ouid": ouid, "offset": 0, "limit": 5})
-            else:
-                raise
-        rows = data.get("trades") if isinstance(data, dict) else data
-        rows = rows or []
-        lines = []
-        for r in rows[:5]:
-            item = fc_pretty_player_by_id(r.get("spid")) if r.get("spid") else "-"
-            price = r.get("value") or "-"
-            trade_type = r.get("tradeType") or tval
-            date = r.get("tradeDate") or ""
-            grade = r.get("grade") or "-"
-            lines.append(f"{date} | {trade_type} | {item} | 강화:{grade} | 가격:{price}")
-        embed = discord.Embed(
-            title=f"{nickname} 거래 기록(최근 5, {tval})",
-            description="\n".join(lines) or "데이터 없음",
-            color=0x3498DB,
-        )
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        msg = str(exc)
-        if "OPENAPI00004" in msg:
-            await interaction.followup.send("조회 실패: 닉네임을 확인하거나 거래 내역이 없는 경우일 수 있습니다. tradetype은 sell/buy만 지원하며, 없으면 자동 재시도합니다.", ephemeral=True)
-        else:
-            await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "fctrade", nickname=nickname, tradetype=tradetype)
 
 
 @tree.command(name="fcmeta", description="FC 메타데이터 요약")
 @app_commands.describe(meta_type="matchtype/season/division 중 하나")
 async def slash_fcmeta(interaction: discord.Interaction, meta_type: str = "matchtype"):
-    await interaction.response.defer(ephemeral=True)
-    meta_type = meta_type.lower()
-    endpoint_map = {
-        "matchtype": "/static/fconline/meta/matchtype.json",
-        "season": "/static/fconline/meta/seasonid.json",
-        "division": "/static/fconline/meta/division.json",
-    }
-    endpoint = endpoint_map.get(meta_type)
-    if not endpoint:
-        return await interaction.followup.send("사용법: meta_type은 matchtype/season/division 중 하나", ephemeral=True)
-    try:
-        data = await fc_get(endpoint, {})
-        if isinstance(data, list):
-            items = data[:10]
-            if meta_type == "matchtype":
-                lines = [f"{d.get('matchtype')}: {d.get('desc')}" for d in items]
-            elif meta_type == "season":
-                lines = [f"{d.get('seasonId')}: {d.get('className')}" for d in items]
-            else:
-                lines = [f"{d.get('divisionId')}: {d.get('divisionName')}" for d in items]
-        else:
-            lines = ["데이터 없음"]
-        embed = discord.Embed(title=f"FC 메타 ({meta_type})", description="\n".join(lines) or "데이터 없음", color=0x3498DB)
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "fcmeta", meta_type=meta_type)
 
 
 @tree.command(name="fcmatchdetail", description="FC 최근 경기 결과 요약")
 @app_commands.describe(nickname="닉네임", matchtype="매치타입 (기본 50)")
 async def slash_fcmatchdetail(interaction: discord.Interaction, nickname: str, matchtype: str = "50"):
-    await interaction.response.defer(ephemeral=True)
-    try:
-        ouid = await fc_get_ouid(nickname)
-        params = {"ouid": ouid, "offset": 0, "limit": 5, "matchtype": matchtype}
-        match_ids = await fc_get("/fconline/v1/user/match", params)
-        match_ids = match_ids if isinstance(match_ids, list) else []
-        lines = []
-        for mid in match_ids[:5]:
-            try:
-                detail = await fc_get("/fconline/v1/match-detail", {"matchid": mid})
-                infos = detail.get("matchInfo") or []
-                if len(infos) < 2:
-                    lines.append(f"{mid}: 상세 없음")
-                    continue
-                p1, p2 = infos[0], infos[1]
-                mine = p1 if p1.get("ouid") == ouid else p2
-                opp = p2 if mine is p1 else p1
-                my_score = mine.get("shoot", {}).get("goalTotal") if mine else "?"
-                opp_score = opp.get("shoot", {}).get("goalTotal") if opp else "?"
-                opp_name = opp.get("nickname") if opp else "?"
-                result = "무" if my_score == opp_score else ("승" if my_score > opp_score else "패")
-                lines.append(f"{result} {my_score}:{opp_score} vs {opp_name} (matchId {mid})")
-            except Exception as inner:
-                lines.append(f"{mid}: 상세 실패 ({inner})")
-        embed = discord.Embed(
-            title=f"{nickname} 최근 경기 요약",
-            description="\n".join(lines) or "데이터 없음",
-            color=0x3498DB,
-        )
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "fcmatchdetail", nickname=nickname, matchtype=matchtype)
 
 
 @tree.command(name="fcplayer", description="FC 선수 이름으로 검색")
 @app_commands.describe(name="선수 이름")
 async def slash_fcplayer(interaction: discord.Interaction, name: str):
-    await interaction.response.defer(ephemeral=True)
-    try:
-        await ensure_fc_meta()
-        matches = find_players_by_name(name, limit=5)
-        if not matches:
-            return await interaction.followup.send("검색 결과가 없습니다.", ephemeral=True)
-        lines = [fc_pretty_player(p) for p in matches]
-        embed = discord.Embed(title=f"선수 검색: {name}", description="\n".join(lines), color=0x3498DB)
-        first_spid = matches[0].get("id")
-        if first_spid:
-            embed.set_thumbnail(url=fc_player_image(first_spid))
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+    await core.run_slash(interaction, "fcplayer", name=name)
 
 
 @tree.command(name="lol", description="롤 소환사 최근 5경기 요약을 보여줍니다.")
 @app_commands.describe(summoner_name="소환사명", region="플랫폼(region) 코드, 미입력 시 기본값(LOL_DEFAULT_REGION)")
 async def slash_lol(interaction: discord.Interaction, summoner_name: str, region: str | None = None):
-    await interaction.response.defer(ephemeral=True)
-    if not RIOT_API_KEY:
-        return await interaction.followup.send("RIOT_API_KEY가 설정되지 않았습니다.", ephemeral=True)
+    await core.run_slash(interaction, "lol", summoner_name=summoner_name, region=region)
+
+
+@tree.command(name="lolstats", description="롤 소환사 최근 경기 통계(챔피언/큐별)를 보여줍니다.")
+@app_commands.describe(summoner_name="소환사명", games="집계할 경기 수(20/50/100)", region="플랫폼(region) 코드, 미입력 시 기본값(LOL_DEFAULT_REGION)")
+async def slash_lolstats(interaction: discord.Interaction, summoner_name: str, games: int = 20, region: str | None = None):
+    await core.run_slash(interaction, "lolstats", summoner_name=summoner_name, games=lol_stats_games(games), region=region)
+
+
+@tree.command(name="watch", description="관심 플레이어 등록(주기적으로 미리 조회, 새 경기 알림)")
+@app_commands.describe(game="lol / fc / maple", name="소환사명(이름#태그) / 닉네임 / 캐릭터명")
+@app_commands.choices(game=[app_commands.Choice(name=label, value=key) for key, label in GAMES.items()])
+async def slash_watch(interaction: discord.Interaction, game: str, name: str):
+    if interaction.guild is None:
+        return await interaction.response.send_message("서버에서만 사용할 수 있어요.", ephemeral=True)
+    err = check_watch_manage(interaction.user)
+    if err:
+        return await interaction.response.send_message(err, ephemeral=True)
     try:
-        summary = await fetch_lol_recent(summoner_name, region or LOL_DEFAULT_REGION)
-        embed = build_lol_embed(summary)
-        await interaction.followup.send(embed=embed, ephemeral=True)
-    except Exception as exc:
-        await interaction.followup.send(f"조회 실패: {exc}", ephemeral=True)
+        text = await watch_add(interaction.guild, interaction.user, game, name)
+    except UserError as exc:
+        text = str(exc)
+    await interaction.response.send_message(text, ephemeral=True)
+
+
+@tree.command(name="unwatch", description="관심 플레이어 해제")
+@app_commands.describe(game="lol / fc / maple", name="등록한 이름")
+@app_commands.choices(game=[app_commands.Choice(name=label, value=key) for key, label in GAMES.items()])
+async def slash_unwatch(interaction: discord.Interaction, game: str, name: str):
+    if interaction.guild is None:
+        return await interaction.response.send_message("서버에서만 사용할 수 있어요.", ephemeral=True)
+    err = check_watch_manage(interaction.user)
+    if err:
+        return await interaction.response.send_message(err, ephemeral=True)
+    try:
+        text = await watch_remove(interaction.guild, game, name)
+    except UserError as exc:
+        text = str(exc)
+    await interaction.response.send_message(text, ephemeral=True)
+
+
+@tree.command(name="watchlist", description="관심 플레이어 목록")
+async def slash_watchlist(interaction: discord.Interaction):
+    if interaction.guild is None:
+        return await interaction.response.send_message("서버에서만 사용할 수 있어요.", ephemeral=True)
+    reply = await watch_list_reply(interaction.guild)
+    await interaction.response.send_message(**reply.send_kwargs(), ephemeral=True)
+
+
+@tree.command(name="watchchannel", description="관심 플레이어 새 경기 알림 채널 지정(비우면 끄기)")
+@app_commands.describe(channel="알림을 보낼 채널, 생략하면 알림 끄기")
+async def slash_watchchannel(interaction: discord.Interaction, channel: discord.TextChannel | None = None):
+    if interaction.guild is None:
+        return await interaction.response.send_message("서버에서만 사용할 수 있어요.", ephemeral=True)
+    err = check_watch_manage(interaction.user)
+    if err:
+        return await interaction.response.send_message(err, ephemeral=True)
+    await store_call(watch_store.set_channel, interaction.guild.id, channel.id if channel else None)
+    text = f"새 경기 알림을 {channel.mention}에 보낼게요." if channel else "새 경기 알림을 껐어요."
+    await interaction.response.send_message(text, ephemeral=True)
+
+
+def record_slash_command(interaction: discord.Interaction, failed: bool = False):
+    tracer.end(interaction.extras.get("trace"), "failed" if failed else None)
+    started = interaction.extras.get("started_at")
+    if started is None or interaction.command is None:
+        return
+    name = interaction.command.qualified_name
+    metrics.COMMAND_LATENCY.observe(time.perf_counter() - started, command=name, surface="slash")
+    if failed:
+        metrics.COMMAND_ERRORS.inc(command=name, surface="slash")
+
+
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    record_slash_command(interaction)
 
 
 @tree.error
 async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+    record_slash_command(interaction, failed=True)
     try:
         if interaction.response.is_done():
             await interaction.followup.send(f"오류가 발생했어요: {error}", ephemeral=True)
@@ -2633,15 +3611,63 @@ async def on_app_command_error(interaction: discord.Interaction, error: app_comm
 
 
 async def panel_watcher():
-    """주기적으로 패널 상태를 점검해 재생/큐가 없을 때 자동 제거."""
+    """활성 패널이 있는 길드만 타이머 휠로 재점검. 평소 갱신은 재생/대기열 이벤트가 직접 요청한다."""
     await bot.wait_until_ready()
     while not bot.is_closed():
-        for guild in bot.guilds:
+        if not panel_wheel:
+            # 활성 패널이 없으면 다음 패널이 생길 때까지 대기
+            panel_wheel_wakeup.clear()
+            await panel_wheel_wakeup.wait()
+            continue
+        await asyncio.sleep(panel_wheel.tick)
+        for guild_id in panel_wheel.advance():
+            guild = bot.get_guild(guild_id)
+            if guild is None:
+                continue
             try:
                 await update_panel(guild)
             except Exception:
                 pass
-        await asyncio.sleep(10)
+
+
+@bot.event
+async def on_voice_state_update(member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+    """봇이 음성 채널에서 끊기면(강제 퇴장 포함) 재생 상태를 정리하고 패널 갱신을 요청."""
+    if bot.user is None or member.id != bot.user.id:
+        return
+    if before.channel is not None and after.channel is None:
+        current_track[member.guild.id] = None
+        await update_panel(member.guild)
+
+
+# 조회 명령 중 별칭이 아닌 별도 이름으로 등록된 것(기능 이름 -> 명령 이름)
+FEATURE_EXTRA_COMMANDS = {"lol": ("수민",)}
+
+
+def drop_unconfigured_commands() -> list[str]:
+    """API 키가 없는 기능의 프리픽스/슬래시 명령을 등록 해제(슬래시 목록과 동기화 payload에서도 빠진다)."""
+    dropped = []
+    for feat in core.features.values():
+        if not feat.requires or os.getenv(feat.requires):
+            continue
+        for name in (feat.name, *FEATURE_EXTRA_COMMANDS.get(feat.name, ())):
+            bot.remove_command(name)
+            tree.remove_command(name)
+        dropped.append(feat.name)
+    return dropped
+
+
+def record_startup(phase: str):
+    elapsed = time.perf_counter() - BOOT_STARTED
+    STARTUP_SECONDS.set(elapsed, phase=phase)
+    logger.info("시작 단계 %s: %.2f초", phase, elapsed)
+
+
+STARTUP_SECONDS = metrics.registry.gauge("bot_startup_seconds", "모듈 로드 시작부터 각 시작 단계까지 걸린 시간", ("phase",))
+_dropped = drop_unconfigured_commands()
+if _dropped:
+    logger.info("API 키가 없어 비활성화한 조회 명령: %s", ", ".join(_dropped))
+record_startup("import")
 
 
 if __name__ == "__main__":
@@ -2649,3 +3675,4 @@ if __name__ == "__main__":
     if not token:
         raise SystemExit("DISCORD_TOKEN 환경변수가 없습니다.")
     bot.run(token)
+    persister.flush_sync()
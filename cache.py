@@ -0,0 +1,133 @@
+"""캐시 저장 백엔드.
+
+응답 캐시(response_cache.py)는 항목을 (데이터, 저장 시각, ttl)로 다루고 실제 보관은 CacheBackend를 따르는
+백엔드에 맡긴다. LruCache는 프로세스 안 메모리(가장 오래 안 쓴 항목부터 버림), SqliteCache는 같은 호스트의
+여러 봇 프로세스(launcher.py 클러스터)가 함께 읽고 쓰는 SQLite(WAL) 파일이다. 공유 계층의 저장 시각은 프로세스마다
+다른 monotonic 시계 대신 벽시계(time.time)로 남기고, 데이터는 호출하는 쪽이 직렬화한 문자열(JSON)로 받는다.
+SqliteCache는 파일 I/O를 하므로 이벤트 루프가 아니라 executor 스레드에서 호출한다.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Protocol
+
+logger = logging.getLogger("musicbot.cache")
+
+Entry = tuple[Any, float, float]  # (데이터, 저장 시각, ttl)
+
+
+class CacheBackend(Protocol):
+    """캐시 계층 하나. 만료 판단(ttl/max_stale)은 쓰는 쪽이 저장 시각으로 하고, 백엔드는 보관과 정리만 맡는다."""
+
+    def __len__(self) -> int: ...
+
+    def get(self, key: Hashable) -> Entry | None: ...
+
+    def set(self, key: Hashable, entry: Entry): ...
+
+    def pop(self, key: Hashable): ...
+
+
+class LruCache:
+    def __init__(self, max_entries: int = 2000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, Entry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Entry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: Hashable, entry: Entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        self._entries.pop(key, None)
+
+
+def encode_key(key: Hashable) -> str:
+    """튜플 키를 파일에 넣을 문자열로. 같은 키는 어느 프로세스에서든 같은 문자열이 된다."""
+    return json.dumps(key, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class SqliteCache:
+    """프로세스 간 공유 캐시(SQLite WAL). 데이터는 문자열로 받아 그대로 저장하고,
+    항목은 저장 시각 + max(ttl, keep)이 지나면 정리된다.
+
+    keep은 신선 기간이 지나도 대신 돌려줄 수 있게 남겨 두는 시간(응답 캐시의 max_stale)이다.
+    쓰기 prune_every번마다 만료 항목을 지우고, max_entries를 넘으면 오래 저장된 것부터 지운다.
+    """
+
+    def __init__(self, path: str, keep: float = 0.0, max_entries: int = 50000, prune_every: int = 500):
+        self.path = path
+        self.keep = keep
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        # 다른 프로세스가 쓰는 중이면 잠깐 기다린다(기본 5초)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                ttl REAL NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires_at);
+            """
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def get(self, key: Hashable) -> Entry | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at, ttl FROM cache WHERE key = ? AND expires_at > ?", (encode_key(key), time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], row[2]
+
+    def set(self, key: Hashable, entry: Entry):
+        value, stored_at, ttl = entry
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO cache (key, value, stored_at, ttl, expires_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET value = excluded.value, stored_at = excluded.stored_at,"
+                " ttl = excluded.ttl, expires_at = excluded.expires_at",
+                (encode_key(key), value, stored_at, ttl, stored_at + max(ttl, self.keep)),
+            )
+            self._writes += 1
+            if self._writes % self.prune_every == 0:
+                self._prune()
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (encode_key(key),))
+
+    def _prune(self):
+        self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        excess = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._conn.execute("DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY stored_at LIMIT ?)", (excess,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
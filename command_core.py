@@ -0,0 +1,201 @@
+"""프리픽스/슬래시 공통 명령 코어.
+
+기능마다 인자를 받아 Reply(표시 모델)를 돌려주는 비동기 핸들러 하나만 둔다.
+쿨다운, API 키 확인, 결과 캐시(stale-while-revalidate), 오류 표시는 여기서 한 번만 처리하고
+프리픽스(!)와 슬래시(/) 어댑터는 응답을 보내는 방식만 다르다.
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Hashable
+
+import discord
+
+from metrics import COMMAND_ERRORS, FEATURE_LATENCY
+from quota import current_guild
+from response_cache import CacheHit, SwrCache
+
+logger = logging.getLogger("musicbot.core")
+
+
+class UserError(Exception):
+    """사용자에게 그대로 보여줄 안내(‘조회 실패:’ 접두어 없이)."""
+
+
+@dataclass
+class Reply:
+    """명령 결과 표시 모델. 비교 가능한 평범한 값이라 캐시 갱신 시 바뀌었는지 바로 알 수 있다."""
+
+    content: str | None = None
+    title: str | None = None
+    description: str | None = None
+    color: int | None = None
+    fields: list[tuple[str, str, bool]] = field(default_factory=list)
+    thumbnail: str | None = None
+    footer: str | None = None
+
+    def add_field(self, name: str, value: Any, inline: bool = True) -> "Reply":
+        self.fields.append((name, str(value), inline))
+        return self
+
+    def embed(self, age_note: str | None = None) -> discord.Embed | None:
+        if self.title is None and self.description is None and not self.fields:
+            return None
+        embed = discord.Embed(title=self.title, description=self.description, color=self.color)
+        for name, value, inline in self.fields:
+            embed.add_field(name=name, value=value, inline=inline)
+        if self.thumbnail:
+            embed.set_thumbnail(url=self.thumbnail)
+        footer = " · ".join(part for part in (self.footer, age_note) if part)
+        if footer:
+            embed.set_footer(text=footer)
+        return embed
+
+    def send_kwargs(self, hit: CacheHit | None = None) -> dict:
+        note = stale_note(hit)
+        kwargs: dict[str, Any] = {}
+        embed = self.embed(note)
+        if embed is not None:
+            kwargs["embed"] = embed
+        content = self.content
+        if content and note and embed is None:
+            content = f"{content}\n-# {note}"
+        if content:
+            kwargs["content"] = content
+        return kwargs
+
+
+@dataclass
+class Feature:
+    name: str
+    handler: Callable[..., Awaitable[Reply]]
+    kind: str = "cheap"  # 쿨다운 등급: cheap | heavy
+    requires: str | None = None  # 필요한 환경 변수(API 키) 이름
+    cached: bool = True  # 같은 인자의 결과를 lookup 캐시로 재사용할지
+
+
+def format_age(seconds: float) -> str:
+    if seconds < 60:
+        return f"{int(seconds)}초"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}분"
+    return f"{int(seconds // 3600)}시간"
+
+
+def stale_note(hit: CacheHit | None) -> str | None:
+    """캐시에서 바로 보여준 결과라면 조회 시점 안내 문구."""
+    if hit is None or hit.fresh:
+        return None
+    return f"{format_age(hit.age)} 전 조회 결과 · 최신 정보 확인 중"
+
+
+def cache_key(name: str, args: dict) -> Hashable:
+    norm = tuple(sorted((k, v.strip().lower() if isinstance(v, str) else v) for k, v in args.items() if v is not None))
+    return (name, norm)
+
+
+class CommandCore:
+    def __init__(self, cache: SwrCache, check_cooldown: Callable[[discord.abc.User, discord.Guild | None, str], str | None]):
+        self.cache = cache
+        self.check_cooldown = check_cooldown
+        self.features: dict[str, Feature] = {}
+
+    def feature(self, name: str, *, kind: str = "cheap", requires: str | None = None, cached: bool = True):
+        """핸들러 등록 데코레이터."""
+
+        def decorator(func: Callable[..., Awaitable[Reply]]):
+            self.features[name] = Feature(name, func, kind, requires, cached)
+            return func
+
+        return decorator
+
+    # ---- 공통 처리 ----
+    def precheck(self, name: str, user: discord.abc.User, guild: discord.Guild | None) -> str | None:
+        feat = self.features[name]
+        err = self.check_cooldown(user, guild, feat.kind)
+        if err:
+            return err
+        if feat.requires and not os.getenv(feat.requires):
+            return f"{feat.requires}가 설정되지 않았습니다."
+        return None
+
+    async def run(self, name: str, guild: discord.Guild | None, **args) -> tuple[Reply, CacheHit | None, asyncio.Task | None]:
+        """(결과, 캐시 적중 정보, 백그라운드 갱신 작업)을 반환. 실패는 예외로 올린다."""
+        feat = self.features[name]
+        current_guild.set(guild.id if guild else None)
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            if not feat.cached:
+                reply = await feat.handler(**args)
+                outcome = "off"
+                return reply, None, None
+            hit, refresh = await self.cache.lookup(cache_key(name, args), lambda: feat.handler(**args))
+            # 방금 가져온 결과는 나이가 0이다
+            outcome = "miss" if hit.age == 0.0 else ("fresh" if hit.fresh else "stale")
+            return hit.data, hit, refresh
+        finally:
+            FEATURE_LATENCY.observe(time.perf_counter() - started, feature=name, cache=outcome)
+
+    async def warm(self, name: str, ttl: float | None = None, **args) -> Reply:
+        """명령과 같은 캐시 키로 결과를 미리 가져와 둔다(백그라운드 작업용, 길드 몫이 아닌 공용 몫 사용)."""
+        feat = self.features[name]
+        current_guild.set(None)
+        return await self.cache.refresh(cache_key(name, args), lambda: feat.handler(**args), ttl)
+
+    @staticmethod
+    def failure_text(exc: Exception) -> str:
+        if isinstance(exc, UserError):
+            return str(exc)
+        return f"조회 실패: {exc}"
+
+    # ---- 어댑터 ----
+    async def run_prefix(self, ctx, name: str, **args):
+        err = self.precheck(name, ctx.author, ctx.guild)
+        if err:
+            return await ctx.send(err)
+        try:
+            reply, hit, refresh = await self.run(name, ctx.guild, **args)
+            msg = await ctx.send(**reply.send_kwargs(hit))
+        except Exception as exc:
+            COMMAND_ERRORS.inc(command=ctx.command.qualified_name if ctx.command else name, surface="prefix")
+            return await ctx.send(self.failure_text(exc))
+        self._follow(msg, refresh)
+
+    async def run_slash(self, interaction: discord.Interaction, name: str, **args):
+        err = self.precheck(name, interaction.user, interaction.guild)
+        if err:
+            return await interaction.response.send_message(err, ephemeral=True)
+        await interaction.response.defer(ephemeral=True)
+        try:
+            reply, hit, refresh = await self.run(name, interaction.guild, **args)
+            msg = await interaction.followup.send(**reply.send_kwargs(hit), ephemeral=True, wait=True)
+        except Exception as exc:
+            COMMAND_ERRORS.inc(command=interaction.command.qualified_name if interaction.command else name, surface="slash")
+            return await interaction.followup.send(self.failure_text(exc), ephemeral=True)
+        self._follow(msg, refresh)
+
+    def _follow(self, message, refresh: asyncio.Task | None):
+        if refresh is not None and message is not None:
+            asyncio.get_running_loop().create_task(edit_when_refreshed(message, refresh))
+
+
+async def edit_when_refreshed(message, refresh: asyncio.Task):
+    """백그라운드 갱신이 끝나면 보낸 메시지를 제자리에서 고친다.
+
+    결과가 같아도 오래된 캐시로 보낸 메시지의 "최신 정보 확인 중" 안내가 남지 않도록 항상 한 번 고친다.
+    """
+    try:
+        new = await refresh
+    except Exception as exc:
+        logger.info("백그라운드 갱신 실패: %s", exc)
+        return
+    kwargs = new.send_kwargs()
+    kwargs.setdefault("content", None)
+    kwargs.setdefault("embed", None)
+    try:
+        await message.edit(**kwargs)
+    except discord.HTTPException:
+        pass
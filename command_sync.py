@@ -0,0 +1,127 @@
+"""앱(슬래시) 명령 트리 동기화.
+
+명령 정의(디스코드에 보내는 payload)의 해시를 범위(전역/길드)별로 파일에 남겨 두고, 바뀐 범위만 다시 올린다.
+길드 단위 동기화는 개발 길드(dev_guild_ids)에만 쓴다: 전역 명령을 복사해 즉시 반영되게 하고,
+개발 길드에서 빠진 길드는 길드 명령을 비워 중복 표시를 없앤다. 여러 범위는 concurrency개씩 동시에 올리고
+429를 받으면 Retry-After만큼 쉬었다 다시 시도한다. 실패한 범위는 해시를 남기지 않아 다음 시작 때 다시 시도한다.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+
+import discord
+from discord import app_commands
+
+from state_store import atomic_write_text
+
+logger = logging.getLogger("musicbot.sync")
+
+GLOBAL_SCOPE = "global"
+
+
+def _retry_after(exc: Exception, default: float = 5.0) -> float:
+    if isinstance(exc, discord.RateLimited):
+        return exc.retry_after
+    response = getattr(exc, "response", None)
+    try:
+        return float(response.headers.get("Retry-After", default))
+    except (AttributeError, TypeError, ValueError):
+        return default
+
+
+class CommandSyncer:
+    def __init__(self, tree: app_commands.CommandTree, path: str, dev_guild_ids: set[int] | None = None, concurrency: int = 4, retries: int = 3):
+        self.tree = tree
+        self.path = path
+        self.dev_guild_ids = set(dev_guild_ids or ())
+        self.retries = retries
+        self._sem = asyncio.Semaphore(max(1, concurrency))
+        self._copied = False
+
+    # ---- 해시 기록 ----
+    def _load(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as exc:
+            logger.warning("명령 동기화 기록을 읽지 못했습니다(%s): %s", self.path, exc)
+            return {}
+
+    def _save(self, data: dict):
+        atomic_write_text(self.path, json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True))
+
+    def payload_hash(self, guild: discord.abc.Snowflake | None = None) -> str:
+        """tree.sync()가 보낼 payload와 같은 내용의 해시. 순서에 영향받지 않도록 (종류, 이름)으로 정렬한다."""
+        payload = [cmd.to_dict(self.tree) for cmd in self.tree.get_commands(guild=guild)]
+        payload.sort(key=lambda c: (c.get("type", 1), c["name"]))
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    # ---- 동기화 ----
+    async def sync(self, application_id: int, *, force: bool = False) -> dict[str, str]:
+        """바뀐 범위만 올리고 {범위: 결과(synced/unchanged/cleared/failed)}를 반환."""
+        if not self._copied:
+            for guild_id in self.dev_guild_ids:
+                self.tree.copy_global_to(guild=discord.Object(guild_id))
+            self._copied = True
+        loop = asyncio.get_running_loop()
+        record = await loop.run_in_executor(None, self._load)
+        if record.get("application_id") != application_id:
+            # 다른 봇 계정으로 바뀌었으면 이전 기록은 쓸모가 없다
+            record = {"application_id": application_id, "scopes": {}}
+        scopes: dict[str, str] = record.setdefault("scopes", {})
+
+        targets: dict[str, tuple[discord.Object | None, str | None]] = {GLOBAL_SCOPE: (None, self.payload_hash())}
+        for guild_id in self.dev_guild_ids:
+            guild = discord.Object(guild_id)
+            targets[str(guild_id)] = (guild, self.payload_hash(guild))
+        for scope in list(scopes):
+            if scope not in targets:
+                # 개발 길드에서 빠진 길드: 복사해 둔 길드 명령을 비운다
+                targets[scope] = (discord.Object(int(scope)), None)
+
+        results: dict[str, str] = {}
+
+        async def run(scope: str, guild: discord.Object | None, digest: str | None):
+            if digest is not None and not force and scopes.get(scope) == digest:
+                results[scope] = "unchanged"
+                return
+            if digest is None:
+                self.tree.clear_commands(guild=guild)
+            try:
+                await self._sync_scope(guild)
+            except Exception as exc:
+                logger.warning("명령 동기화 실패(%s): %s", scope, exc)
+                results[scope] = "failed"
+                return
+            if digest is None:
+                scopes.pop(scope, None)
+                results[scope] = "cleared"
+            else:
+                scopes[scope] = digest
+                results[scope] = "synced"
+
+        await asyncio.gather(*(run(scope, guild, digest) for scope, (guild, digest) in targets.items()))
+        if any(r in ("synced", "cleared") for r in results.values()):
+            try:
+                await loop.run_in_executor(None, self._save, record)
+            except OSError as exc:
+                logger.warning("명령 동기화 기록 저장 실패(%s): %s", self.path, exc)
+        return results
+
+    async def _sync_scope(self, guild: discord.Object | None):
+        async with self._sem:
+            for attempt in range(self.retries + 1):
+                try:
+                    await self.tree.sync(guild=guild)
+                    return
+                except (discord.RateLimited, discord.HTTPException) as exc:
+                    throttled = isinstance(exc, discord.RateLimited) or exc.status == 429
+                    if not throttled or attempt == self.retries:
+                        raise
+                    wait = _retry_after(exc)
+                    logger.info("명령 동기화 한도 초과, %.1f초 후 재시도(%s)", wait, guild.id if guild else GLOBAL_SCOPE)
+                    await asyncio.sleep(wait)
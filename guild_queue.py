@@ -0,0 +1,210 @@
+"""길드별 재생 대기열 자료구조.
+
+deque 대신 암시적 키 트립(implicit treap)을 사용해 인덱스 기반 삽입/삭제/이동을
+O(log n)에 처리하고, 요청자별 곡 수를 카운터로 유지해 제한 검사를 O(1)로 만든다.
+"""
+import random
+from collections import Counter
+from typing import Any, Callable, Iterable, Iterator
+
+
+class _Node:
+    __slots__ = ("item", "prio", "size", "left", "right")
+
+    def __init__(self, item: dict):
+        self.item = item
+        self.prio = random.random()
+        self.size = 1
+        self.left: "_Node | None" = None
+        self.right: "_Node | None" = None
+
+
+def _size(node: _Node | None) -> int:
+    return node.size if node else 0
+
+
+def _update(node: _Node) -> _Node:
+    node.size = 1 + _size(node.left) + _size(node.right)
+    return node
+
+
+def _split(node: _Node | None, k: int) -> tuple[_Node | None, _Node | None]:
+    """앞쪽 k개와 나머지로 분리."""
+    if node is None:
+        return None, None
+    if _size(node.left) < k:
+        left, right = _split(node.right, k - _size(node.left) - 1)
+        node.right = left
+        return _update(node), right
+    left, right = _split(node.left, k)
+    node.left = right
+    return left, _update(node)
+
+
+def _merge(a: _Node | None, b: _Node | None) -> _Node | None:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.prio > b.prio:
+        a.right = _merge(a.right, b)
+        return _update(a)
+    b.left = _merge(a, b.left)
+    return _update(b)
+
+
+class GuildQueue:
+    """인덱스 접근이 가능한 대기열. deque에서 쓰던 메서드 이름을 그대로 제공한다.
+
+    listener를 주면 변경마다 ("ins", index, item) / ("pop", index) / ("mv", src, dst) / ("clr",)
+    형태로 호출된다(상태 저널 기록용). 생성 시 넘긴 items는 기록하지 않는다.
+    """
+
+    def __init__(self, items: Iterable[dict] = (), listener: Callable[..., None] | None = None):
+        self._root: _Node | None = None
+        self._per_user: Counter = Counter()
+        for item in items:
+            self._insert(len(self), item)
+        self.listener = listener
+
+    # ---- 조회 ----
+    def __len__(self) -> int:
+        return _size(self._root)
+
+    def __bool__(self) -> bool:
+        return self._root is not None
+
+    def __iter__(self) -> Iterator[dict]:
+        return self.iter_from(0)
+
+    def __getitem__(self, index: int) -> dict:
+        index = self._normalize(index)
+        node = self._root
+        while node is not None:
+            ls = _size(node.left)
+            if index < ls:
+                node = node.left
+            elif index == ls:
+                return node.item
+            else:
+                index -= ls + 1
+                node = node.right
+        raise IndexError("queue index out of range")
+
+    def __delitem__(self, index: int):
+        self.pop(index)
+
+    def __repr__(self) -> str:
+        return f"GuildQueue(len={len(self)})"
+
+    def iter_from(self, start: int) -> Iterator[dict]:
+        """start번째부터 순서대로 순회. 앞부분을 건너뛰는 비용은 O(log n)."""
+        stack: list[_Node] = []
+        node = self._root
+        k = max(start, 0)
+        while node is not None:
+            ls = _size(node.left)
+            if k < ls:
+                stack.append(node)
+                node = node.left
+            elif k == ls:
+                stack.append(node)
+                node = None
+            else:
+                k -= ls + 1
+                node = node.right
+        while stack:
+            node = stack.pop()
+            yield node.item
+            child = node.right
+            while child is not None:
+                stack.append(child)
+                child = child.left
+
+    def page(self, start: int, count: int) -> list[dict]:
+        """start부터 최대 count개를 잘라 반환(페이지 표시용)."""
+        out = []
+        if count <= 0:
+            return out
+        for item in self.iter_from(start):
+            out.append(item)
+            if len(out) >= count:
+                break
+        return out
+
+    def count_for(self, requester_id: Any) -> int:
+        return self._per_user.get(requester_id, 0)
+
+    def to_list(self) -> list[dict]:
+        return list(self)
+
+    # ---- 변경 ----
+    def insert(self, index: int, item: dict):
+        index = self._insert(index, item)
+        if self.listener:
+            self.listener("ins", index, item)
+
+    def append(self, item: dict):
+        self.insert(len(self), item)
+
+    def appendleft(self, item: dict):
+        self.insert(0, item)
+
+    def pop(self, index: int = -1) -> dict:
+        index = self._normalize(index)
+        item = self._pop(index)
+        if self.listener:
+            self.listener("pop", index)
+        return item
+
+    def popleft(self) -> dict:
+        return self.pop(0)
+
+    def move(self, src: int, dst: int):
+        """src 위치의 항목을 꺼내 dst 위치에 다시 넣는다(0-based)."""
+        src = self._normalize(src)
+        dst = self._normalize(dst)
+        self._insert(dst, self._pop(src))
+        if self.listener:
+            self.listener("mv", src, dst)
+
+    def clear(self):
+        self._root = None
+        self._per_user.clear()
+        if self.listener:
+            self.listener("clr")
+
+    # ---- 내부 ----
+    def _insert(self, index: int, item: dict) -> int:
+        n = len(self)
+        if index < 0:
+            index += n
+        index = min(max(index, 0), n)
+        left, right = _split(self._root, index)
+        self._root = _merge(_merge(left, _Node(item)), right)
+        self._per_user[item.get("requester_id")] += 1
+        return index
+
+    def _pop(self, index: int) -> dict:
+        left, rest = _split(self._root, index)
+        mid, right = _split(rest, 1)
+        self._root = _merge(left, right)
+        item = mid.item
+        self._forget(item)
+        return item
+
+    def _normalize(self, index: int) -> int:
+        n = len(self)
+        if index < 0:
+            index += n
+        if index < 0 or index >= n:
+            raise IndexError("queue index out of range")
+        return index
+
+    def _forget(self, item: dict):
+        key = item.get("requester_id")
+        left = self._per_user[key] - 1
+        if left > 0:
+            self._per_user[key] = left
+        else:
+            self._per_user.pop(key, None)
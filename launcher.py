@@ -0,0 +1,192 @@
+"""클러스터 실행기.
+
+    python launcher.py                    # 디스코드 권장 샤드 수, CPU 수만큼 프로세스
+    python launcher.py -s 16 -c 4         # 샤드 16개를 프로세스 4개가 4개씩 맡음
+
+전체 샤드를 연속 구간으로 나눠 구간마다 bot.py 프로세스를 하나씩 띄운다(프로세스 안에서는 AutoShardedBot).
+음성 인코딩, yt-dlp, 조회 명령이 프로세스마다 따로 돌아 여러 코어를 쓴다.
+프로세스들은 같은 작업 폴더의 SQLite 파일(STATE_DB, WATCH_DB, LOL_HISTORY_DB, 응답 캐시 CACHE_DB)을 WAL로 함께 쓰고, 상태는 길드별 행이라
+길드를 맡은 프로세스만 그 행을 쓴다. 디스코드 IDENTIFY 한도(5초에 max_concurrency번) 때문에 프로세스는 앞 프로세스의
+샤드가 모두 접속할 시간만큼 간격을 두고 띄운다. 죽은 프로세스는 같은 샤드 구간으로 다시 띄운다(간격은 점점 늘림).
+Ctrl+C/SIGTERM을 받으면 모든 프로세스에 SIGINT를 한 번씩 보내 상태를 저장하고 끝나기를 기다린다.
+"""
+import argparse
+import asyncio
+import logging
+import math
+import os
+import signal
+import sys
+import time
+
+import aiohttp
+
+from sharding import format_shard_ids, shard_ranges
+
+logger = logging.getLogger("musicbot.launcher")
+
+BOT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot.py")
+DISCORD_API = "https://discord.com/api/v10"
+IDENTIFY_INTERVAL = 5.0  # 디스코드가 같은 IDENTIFY 버킷에 허용하는 간격(초)
+RESTART_BACKOFF_MAX = 60.0
+STABLE_SECONDS = 60.0  # 이만큼 살아 있었으면 재시작 간격을 처음으로 되돌림
+STOP_TIMEOUT = 30.0  # 종료 요청 후 이 시간 안에 끝나지 않으면 강제 종료
+
+
+async def fetch_gateway(token: str) -> tuple[int, int]:
+    """(권장 샤드 수, 동시 IDENTIFY 수)."""
+    async with aiohttp.ClientSession(headers={"Authorization": f"Bot {token}"}) as session:
+        async with session.get(f"{DISCORD_API}/gateway/bot", timeout=aiohttp.ClientTimeout(total=15)) as resp:
+            if resp.status != 200:
+                raise SystemExit(f"권장 샤드 수를 가져오지 못했습니다(HTTP {resp.status}): {await resp.text()}")
+            data = await resp.json()
+    return int(data["shards"]), int(data.get("session_start_limit", {}).get("max_concurrency", 1))
+
+
+def suffixed(path: str, cluster_id: int) -> str:
+    """프로세스마다 따로 써야 하는 파일 이름에 클러스터 번호를 붙인다(trace.jsonl -> trace.c0.jsonl)."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.c{cluster_id}{ext}"
+
+
+def cluster_env(cluster_id: int, shard_ids: list[int], shard_count: int, clusters: int) -> dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        {
+            "SHARD_COUNT": str(shard_count),
+            "SHARD_IDS": format_shard_ids(shard_ids),
+            "CLUSTER_ID": str(cluster_id),
+            "CLUSTER_COUNT": str(clusters),
+            "STATE_BACKEND": "sqlite",  # json/journal 파일은 프로세스끼리 덮어쓴다
+            "CACHE_DB": env.get("CACHE_DB") or "response_cache.sqlite3",  # 외부 API 응답을 프로세스끼리 공유
+        }
+    )
+    port = int(env.get("METRICS_PORT") or 0)
+    if port:
+        env["METRICS_PORT"] = str(port + cluster_id)
+    for key in ("METRICS_TEXTFILE", "TRACE_FILE"):
+        if env.get(key):
+            env[key] = suffixed(env[key], cluster_id)
+    env["PROFILE_DIR"] = os.path.join(env.get("PROFILE_DIR") or "profiles", f"c{cluster_id}")
+    return env
+
+
+class Cluster:
+    def __init__(self, cluster_id: int, shard_ids: list[int], env: dict[str, str]):
+        self.id = cluster_id
+        self.shard_ids = shard_ids
+        self.env = env
+        self.proc: asyncio.subprocess.Process | None = None
+        self.restarts = 0
+
+    @property
+    def label(self) -> str:
+        return f"클러스터 {self.id}(샤드 {format_shard_ids(self.shard_ids)})"
+
+    async def supervise(self, stopping: asyncio.Event, start_delay: float):
+        try:
+            await asyncio.wait_for(stopping.wait(), start_delay)
+            return
+        except asyncio.TimeoutError:
+            pass
+        backoff = 1.0
+        while not stopping.is_set():
+            started = time.monotonic()
+            # 자식은 따로 세션을 두어 터미널 Ctrl+C를 직접 받지 않게 한다. 종료 신호는 실행기가 한 번만 보낸다
+            # (SIGINT를 두 번 받으면 첫 신호로 시작한 정상 종료와 상태 저장이 끊길 수 있다)
+            self.proc = await asyncio.create_subprocess_exec(sys.executable, BOT_SCRIPT, env=self.env, start_new_session=True)
+            logger.info("%s 시작(pid %d)", self.label, self.proc.pid)
+            code = await self.proc.wait()
+            if stopping.is_set():
+                logger.info("%s 종료(코드 %s)", self.label, code)
+                return
+            if code == 0:
+                # 봇이 스스로 정상 종료했으면 다시 띄우지 않는다
+                logger.info("%s 정상 종료", self.label)
+                return
+            if time.monotonic() - started >= STABLE_SECONDS:
+                backoff = 1.0
+            self.restarts += 1
+            logger.warning("%s 비정상 종료(코드 %s), %.0f초 후 재시작", self.label, code, backoff)
+            try:
+                await asyncio.wait_for(stopping.wait(), backoff)
+                return
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, RESTART_BACKOFF_MAX)
+
+    def signal(self, sig: int):
+        if self.proc is not None and self.proc.returncode is None:
+            self.proc.send_signal(sig)
+
+
+async def main(args) -> int:
+    token = os.getenv("DISCORD_TOKEN")
+    if not token:
+        raise SystemExit("DISCORD_TOKEN 환경변수가 없습니다.")
+    if args.shards == "auto":
+        shard_count, max_concurrency = await fetch_gateway(token)
+    else:
+        shard_count, max_concurrency = int(args.shards), 1
+    max_concurrency = args.max_concurrency or max_concurrency
+    ranges = shard_ranges(shard_count, args.clusters)
+    clusters = [Cluster(i, ids, cluster_env(i, ids, shard_count, len(ranges))) for i, ids in enumerate(ranges)]
+    logger.info("샤드 %d개를 프로세스 %d개로 실행: %s", shard_count, len(clusters), ", ".join(c.label for c in clusters))
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def request_stop():
+        if stopping.is_set():
+            return
+        logger.info("종료 요청: 모든 클러스터에 SIGINT 전송")
+        stopping.set()
+        for cluster in clusters:
+            cluster.signal(signal.SIGINT)
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, request_stop)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    # 앞 클러스터의 샤드가 모두 IDENTIFY할 시간만큼 띄엄띄엄 시작
+    delays, delay = [], 0.0
+    for cluster in clusters:
+        delays.append(delay)
+        delay += math.ceil(len(cluster.shard_ids) / max_concurrency) * IDENTIFY_INTERVAL + args.stagger
+    tasks = [asyncio.create_task(c.supervise(stopping, d)) for c, d in zip(clusters, delays)]
+    all_done = asyncio.gather(*tasks)
+    stop_wait = asyncio.create_task(stopping.wait())
+    await asyncio.wait({all_done, stop_wait}, return_when=asyncio.FIRST_COMPLETED)
+    stop_wait.cancel()
+    if not all_done.done():
+        try:
+            await asyncio.wait_for(asyncio.shield(all_done), STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("%.0f초 안에 끝나지 않은 클러스터를 강제 종료합니다.", STOP_TIMEOUT)
+            for cluster in clusters:
+                cluster.signal(signal.SIGKILL)
+            await all_done
+    return 0 if all(c.proc is None or c.proc.returncode == 0 for c in clusters) else 1
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python launcher.py", description="샤드 구간별 bot.py 프로세스 실행기")
+    parser.add_argument("-s", "--shards", default=os.getenv("SHARD_COUNT") or "auto", help="전체 샤드 수 또는 auto(기본: SHARD_COUNT, 없으면 auto)")
+    parser.add_argument(
+        "-c", "--clusters", type=int, default=int(os.getenv("CLUSTER_COUNT") or os.cpu_count() or 1), help="프로세스 수(기본: CLUSTER_COUNT, 없으면 CPU 수)"
+    )
+    parser.add_argument("--max-concurrency", type=int, default=0, help="동시 IDENTIFY 수(기본: 디스코드가 알려준 값, 샤드 수를 지정했으면 1)")
+    parser.add_argument("--stagger", type=float, default=1.0, help="클러스터 시작 사이에 더 둘 여유 시간(초)")
+    args = parser.parse_args(argv)
+    if args.shards != "auto" and (not args.shards.isdigit() or int(args.shards) < 1):
+        parser.error("--shards는 1 이상의 숫자나 auto여야 합니다.")
+    if args.clusters < 1:
+        parser.error("--clusters는 1 이상이어야 합니다.")
+    return args
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,85 @@
+"""이벤트 루프 지연 측정과 멈춤 감시.
+
+루프 안의 작업이 interval마다 깨어나 예정보다 늦게 깬 만큼을 지연으로 기록하고 심장 박동을 남긴다.
+별도 감시 스레드는 박동이 threshold 넘게 끊기면 그 순간 루프 스레드의 스택을 떠서 로그로 남긴다.
+루프를 붙잡고 있는 코드(동기 파일 쓰기, 큰 목록 정렬 등)를 멈춘 자리에서 바로 찾을 수 있다.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from metrics import LOOP_LAG, LOOP_STALLS
+
+logger = logging.getLogger("musicbot.loopwatch")
+
+
+class LoopWatch:
+    def __init__(self, interval: float = 0.25, threshold: float = 0.2, window: int = 1200, stack_limit: int = 25):
+        # window: 백분위 계산에 쓰는 최근 측정 수(기본 interval 0.25초면 약 5분)
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_limit = stack_limit
+        self.samples: deque[float] = deque(maxlen=window)
+        self.stalls: deque[tuple[float, float, str]] = deque(maxlen=20)  # (발생 시각, 감지 시점까지 멈춘 시간, 스택)
+        self._beat = time.perf_counter()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """실행 중인 루프 안에서 호출."""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._task = self._loop.create_task(self._probe())
+        self._thread = threading.Thread(target=self._watch, name="loopwatch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def percentiles(self, qs=(0.5, 0.95, 0.99)) -> dict[tuple, float]:
+        """최근 지연의 백분위(초). 지표 게이지용으로 {(분위,): 값}."""
+        if not self.samples:
+            return {}
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return {(str(q),): ordered[min(last, int(q * len(ordered)))] for q in qs}
+
+    # ---- 내부 ----
+    async def _probe(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - started - self.interval)
+            self._beat = now
+            self.samples.append(lag)
+            LOOP_LAG.observe(lag)
+
+    def _watch(self):
+        reported = None
+        while not self._stop.wait(min(self.threshold, self.interval) / 2):
+            beat = self._beat
+            stalled = time.perf_counter() - beat - self.interval
+            if stalled < self.threshold or reported == beat:
+                continue
+            reported = beat  # 한 번 멈춘 동안에는 한 번만 기록
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = "".join(traceback.format_stack(frame, limit=self.stack_limit)) if frame else "(스택 없음)"
+            self.stalls.append((time.time(), stalled, stack))
+            logger.warning("이벤트 루프가 %.0fms 넘게 멈춤. 루프 스레드 스택:\n%s", stalled * 1000, stack)
+            loop = self._loop
+            if loop is not None and not loop.is_closed():
+                loop.call_soon_threadsafe(LOOP_STALLS.inc)
@@ -0,0 +1,173 @@
+"""롤 경기 기록 로컬 저장소(SQLite).
+
+puuid마다 경기 한 판을 한 행(챔피언/KDA/승패/큐/길이)으로 저장해 두고, 새 경기만 받아 덧붙인다.
+새 경기가 한 번에 받을 양보다 많이 쌓였으면 최신 경기부터 저장하고, 아직 못 받은 구간(gap)을 시각으로 남겨 이어서 채운다.
+최근 N경기 통계는 저장된 행을 SQL 집계(GROUP BY/SUM)로 한 번에 계산하므로 지난 경기를 다시 받지 않는다.
+"""
+import sqlite3
+import threading
+import time
+
+
+class MatchStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS lol_matches (
+                puuid TEXT NOT NULL,
+                match_id TEXT NOT NULL,
+                game_start INTEGER NOT NULL,
+                queue_id INTEGER,
+                champion TEXT,
+                kills INTEGER NOT NULL DEFAULT 0,
+                deaths INTEGER NOT NULL DEFAULT 0,
+                assists INTEGER NOT NULL DEFAULT 0,
+                win INTEGER NOT NULL DEFAULT 0,
+                duration INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (puuid, match_id)
+            );
+            CREATE INDEX IF NOT EXISTS lol_matches_recent ON lol_matches (puuid, game_start DESC);
+            CREATE TABLE IF NOT EXISTS lol_players (
+                puuid TEXT PRIMARY KEY,
+                exhausted INTEGER NOT NULL DEFAULT 0,
+                synced_at REAL,
+                gap_after INTEGER,
+                gap_before INTEGER
+            );
+            """
+        )
+        # 이전 스키마에 없던 열 추가
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(lol_players)")}
+        for column in ("gap_after", "gap_before"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE lol_players ADD COLUMN {column} INTEGER")
+
+    # ---- 동기화 상태 ----
+    def sync_state(self, puuid: str) -> dict:
+        """저장된 경기 수, 가장 최근/오래된 경기 시작 시각(ms), 과거 기록을 끝까지 받았는지,
+        아직 못 받은 구간(gap_after, gap_before: 이 두 시각 사이의 경기가 빠져 있을 수 있음, 없으면 None)."""
+        with self._lock:
+            count, newest, oldest = self._conn.execute(
+                "SELECT COUNT(*), MAX(game_start), MIN(game_start) FROM lol_matches WHERE puuid = ?", (puuid,)
+            ).fetchone()
+            row = self._conn.execute(
+                "SELECT exhausted, gap_after, gap_before FROM lol_players WHERE puuid = ?", (puuid,)
+            ).fetchone()
+        gap = (row[1], row[2]) if row and row[1] is not None else None
+        return {"count": count, "newest": newest, "oldest": oldest, "exhausted": bool(row and row[0]), "gap": gap}
+
+    def known_ids(self, puuid: str, match_ids: list[str]) -> dict[str, int]:
+        """match_ids 중 저장된 것 -> 경기 시작 시각(ms)."""
+        if not match_ids:
+            return {}
+        marks = ",".join("?" * len(match_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT match_id, game_start FROM lol_matches WHERE puuid = ? AND match_id IN ({marks})", (puuid, *match_ids)
+            ).fetchall()
+        return dict(rows)
+
+    def add(self, puuid: str, rows: list[dict], exhausted: bool | None = None, gap: tuple[int, int] | None = None):
+        """경기 행을 저장하고 동기화 상태를 갱신한다. gap은 저장 후 남은 빈 구간(없으면 None)으로 항상 덮어쓴다."""
+        params = [
+            (
+                puuid,
+                r["match_id"],
+                r["game_start"],
+                r.get("queue_id"),
+                r.get("champion"),
+                r.get("kills", 0),
+                r.get("deaths", 0),
+                r.get("assists", 0),
+                1 if r.get("win") else 0,
+                r.get("duration", 0),
+            )
+            for r in rows
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO lol_matches"
+                    " (puuid, match_id, game_start, queue_id, champion, kills, deaths, assists, win, duration)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    params,
+                )
+                self._conn.execute(
+                    "INSERT INTO lol_players (puuid, exhausted, synced_at, gap_after, gap_before) VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT(puuid) DO UPDATE SET synced_at = excluded.synced_at,"
+                    " exhausted = COALESCE(?, lol_players.exhausted),"
+                    " gap_after = excluded.gap_after, gap_before = excluded.gap_before",
+                    (
+                        puuid,
+                        1 if exhausted else 0,
+                        time.time(),
+                        *(gap or (None, None)),
+                        None if exhausted is None else int(exhausted),
+                    ),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # ---- 조회 ----
+    def recent(self, puuid: str, limit: int) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT match_id, game_start, queue_id, champion, kills, deaths, assists, win, duration"
+                " FROM lol_matches WHERE puuid = ? ORDER BY game_start DESC LIMIT ?",
+                (puuid, limit),
+            ).fetchall()
+        keys = ("match_id", "game_start", "queue_id", "champion", "kills", "deaths", "assists", "win", "duration")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def count_since(self, puuid: str, game_start: int) -> int:
+        """game_start(ms) 이후에 시작한 저장 경기 수."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM lol_matches WHERE puuid = ? AND game_start >= ?", (puuid, game_start)
+            ).fetchone()[0]
+
+    def aggregate(self, puuid: str, limit: int) -> dict:
+        """최근 limit경기 합계와 챔피언별/큐별 집계."""
+        recent = (
+            "WITH recent AS (SELECT * FROM lol_matches WHERE puuid = ? ORDER BY game_start DESC LIMIT ?) "
+        )
+        with self._lock:
+            games, wins, kills, deaths, assists, duration = self._conn.execute(
+                recent + "SELECT COUNT(*), TOTAL(win), TOTAL(kills), TOTAL(deaths), TOTAL(assists), TOTAL(duration) FROM recent",
+                (puuid, limit),
+            ).fetchone()
+            champions = self._conn.execute(
+                recent
+                + "SELECT champion, COUNT(*) AS games, TOTAL(win), TOTAL(kills), TOTAL(deaths), TOTAL(assists)"
+                " FROM recent GROUP BY champion ORDER BY games DESC, TOTAL(win) DESC",
+                (puuid, limit),
+            ).fetchall()
+            queues = self._conn.execute(
+                recent + "SELECT queue_id, COUNT(*) AS games, TOTAL(win) FROM recent GROUP BY queue_id ORDER BY games DESC",
+                (puuid, limit),
+            ).fetchall()
+        return {
+            "games": games,
+            "wins": int(wins),
+            "kills": int(kills),
+            "deaths": int(deaths),
+            "assists": int(assists),
+            "duration": int(duration),
+            "champions": [
+                {"champion": c, "games": g, "wins": int(w), "kills": int(k), "deaths": int(d), "assists": int(a)}
+                for c, g, w, k, d, a in champions
+            ],
+            "queues": [{"queue_id": q, "games": g, "wins": int(w)} for q, g, w in queues],
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,249 @@
+"""지표 수집(Prometheus 텍스트 형식).
+
+카운터/게이지/히스토그램을 라벨별로 모아 두었다가 로컬 HTTP(/metrics)나 텍스트 파일로 내보낸다.
+게이지는 값을 직접 넣거나, 내보낼 때 호출할 함수를 등록해 그때의 값을 읽는다.
+명령/외부 API/yt-dlp/디스코드 API 지표는 여기서 한 번만 정의하고 각 모듈이 가져다 쓴다.
+"""
+import asyncio
+import logging
+import math
+import os
+import tempfile
+import time
+from typing import Callable, Iterable
+
+logger = logging.getLogger("musicbot.metrics")
+
+INF_LABEL = 'le="+Inf"'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(n, "") for n in self.labelnames)
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[str]:
+        return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in sorted(self._values.items())]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), fn: Callable[[], dict[tuple, float] | float] | None = None):
+        # fn: 내보낼 때마다 호출. 라벨이 없으면 숫자 하나, 있으면 {라벨 값 튜플: 값}을 반환
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple, float] = {}
+        self.fn = fn
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def samples(self) -> list[str]:
+        values = dict(self._values)
+        if self.fn is not None:
+            try:
+                current = self.fn()
+            except Exception as exc:
+                logger.debug("게이지 %s 계산 실패: %s", self.name, exc)
+                current = {}
+            values.update(current if isinstance(current, dict) else {(): current})
+        return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in sorted(values.items())]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, list] = {}  # 라벨 -> [구간별 개수..., 합계, 전체 개수]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+
+    def time(self, **labels) -> "Timer":
+        """with 블록(비동기 함수 안에서도 사용 가능)의 걸린 시간을 기록."""
+        return Timer(self, labels)
+
+    def snapshot(self, **labels) -> tuple[int, float]:
+        """(관측 수, 합계)."""
+        series = self._series.get(self._key(labels))
+        return (series[-1], series[-2]) if series else (0, 0.0)
+
+    def samples(self) -> list[str]:
+        lines = []
+        for key, series in sorted(self._series.items()):
+            running = 0
+            for bound, count in zip(self.buckets, series):
+                running += count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {running}")
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, INF_LABEL)} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+        self.started = 0.0
+
+    def __enter__(self) -> "Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = (), fn=None) -> Gauge:
+        return self.register(Gauge(name, help, labelnames, fn))
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+
+
+registry = Registry()
+
+# ---- 공통 지표 ----
+COMMAND_LATENCY = registry.histogram(
+    "bot_command_seconds", "명령 처리 시간(호출 메시지/상호작용부터 응답까지)", ("command", "surface")
+)
+COMMAND_ERRORS = registry.counter("bot_command_errors_total", "실패한 명령 수", ("command", "surface"))
+FEATURE_LATENCY = registry.histogram(
+    "bot_lookup_seconds", "조회 기능 결과를 얻는 데 걸린 시간(캐시 포함)", ("feature", "cache")
+)
+UPSTREAM_LATENCY = registry.histogram("bot_upstream_seconds", "외부 API HTTP 호출 시간", ("api", "endpoint"))
+UPSTREAM_REQUESTS = registry.counter(
+    "bot_upstream_requests_total", "외부 API 요청 결과(ok/error/429/cache/stale/quota)", ("api", "endpoint", "outcome")
+)
+QUOTA_WAIT = registry.histogram("bot_upstream_quota_wait_seconds", "호출 한도 대기 시간", ("api",))
+YTDL_LATENCY = registry.histogram(
+    "bot_ytdl_seconds", "yt-dlp 추출 시간", ("op",), buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+)
+YTDL_ERRORS = registry.counter("bot_ytdl_errors_total", "yt-dlp 추출 실패 수", ("op",))
+DISCORD_LATENCY = registry.histogram("bot_discord_http_seconds", "디스코드 REST 호출 시간", ("method", "route"))
+DISCORD_ERRORS = registry.counter("bot_discord_http_errors_total", "디스코드 REST 호출 실패 수", ("method", "route", "status"))
+LOOP_LAG = registry.histogram(
+    "bot_event_loop_lag_seconds", "이벤트 루프 지연(예정보다 늦게 깬 시간)", buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+LOOP_STALLS = registry.counter("bot_event_loop_stalls_total", "기준 시간 넘게 이벤트 루프가 멈춘 횟수(스택 기록됨)")
+
+
+# ---- 내보내기 ----
+async def serve(host: str, port: int, reg: Registry = registry):
+    """/metrics를 제공하는 aiohttp 서버를 띄우고 runner를 반환(종료 시 runner.cleanup())."""
+    from aiohttp import web
+
+    async def handle(request):
+        return web.Response(text=reg.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("metrics on http://%s:%s/metrics", host, port)
+    return runner
+
+
+def write_textfile(path: str, text: str):
+    """node_exporter textfile 수집기용: 임시 파일에 쓰고 rename해 읽는 쪽이 반쯤 쓴 파일을 보지 않게 한다."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+async def textfile_writer(path: str, interval: float, reg: Registry = registry):
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            # 지표 값은 이벤트 루프에서만 바뀌므로 직렬화는 루프에서, 파일 쓰기만 스레드에서
+            await loop.run_in_executor(None, write_textfile, path, reg.render())
+        except Exception as exc:
+            logger.warning("지표 파일 쓰기 실패(%s): %s", path, exc)
+        await asyncio.sleep(interval)
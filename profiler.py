@@ -0,0 +1,112 @@
+"""필요할 때만 켜는 샘플링 프로파일러.
+
+켜져 있는 동안 별도 스레드가 interval마다 모든 스레드의 스택을 떠서 collapsed-stack 형식
+(`태그;바깥 함수;...;안쪽 함수 횟수`)으로 모은 뒤 파일로 쓴다. flamegraph.pl, speedscope 등에 바로 넣을 수 있다.
+이벤트 루프 스레드의 샘플은 그 순간 실행 중인 작업에 붙은 명령 이름(!play, /lol 등)으로 태그를 단다.
+꺼져 있을 때는 스레드가 없고, 명령 태그도 기록하지 않는다.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import Counter
+
+logger = logging.getLogger("musicbot.profiler")
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)})".replace(";", ":")
+
+
+class SamplingProfiler:
+    def __init__(self, out_dir: str, interval: float = 0.01, max_depth: int = 64):
+        self.out_dir = out_dir
+        self.interval = interval
+        self.max_depth = max_depth
+        self._labels: "weakref.WeakKeyDictionary[asyncio.Task, str]" = weakref.WeakKeyDictionary()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def label(self, name: str):
+        """현재 작업에 명령 이름을 붙인다(프로파일링 중에만)."""
+        if not self.running:
+            return
+        task = asyncio.current_task()
+        if task is not None:
+            self._labels[task] = name
+
+    async def run(self, seconds: float) -> tuple[str, Counter]:
+        """seconds 동안 샘플링하고 (파일 경로, 태그별 샘플 수)를 반환. 이미 실행 중이면 RuntimeError."""
+        if self.running:
+            raise RuntimeError("프로파일러가 이미 실행 중입니다.")
+        loop = asyncio.get_running_loop()
+        counts: Counter = Counter()
+        done = loop.create_future()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._sample,
+            args=(loop, threading.get_ident(), time.monotonic() + seconds, counts, done),
+            name="profiler",
+            daemon=True,
+        )
+        self._thread.start()
+        try:
+            await done
+        except asyncio.CancelledError:
+            self._stop.set()
+            raise
+        finally:
+            self._labels.clear()
+        path = await loop.run_in_executor(None, self._write, counts)
+        tags: Counter = Counter()
+        for (tag, _), n in counts.items():
+            tags[tag] += n
+        return path, tags
+
+    def stop(self):
+        self._stop.set()
+
+    # ---- 내부 ----
+    def _sample(self, loop: asyncio.AbstractEventLoop, loop_thread: int, deadline: float, counts: Counter, done: asyncio.Future):
+        try:
+            self._collect(loop, loop_thread, deadline, counts)
+        finally:
+            loop.call_soon_threadsafe(lambda: done.done() or done.set_result(None))
+
+    def _collect(self, loop: asyncio.AbstractEventLoop, loop_thread: int, deadline: float, counts: Counter):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            names.update((t.ident, t.name) for t in threading.enumerate() if t.ident not in names)
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                if tid == loop_thread:
+                    task = asyncio.current_task(loop)
+                    tag = "loop:idle" if task is None else f"loop:{self._labels.get(task) or task.get_name()}"
+                else:
+                    tag = f"thread:{names.get(tid, tid)}"
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                counts[(tag, ";".join(reversed(stack)))] += 1
+            time.sleep(self.interval)
+
+    def _write(self, counts: Counter) -> str:
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir, time.strftime("profile-%Y%m%d-%H%M%S.folded"))
+        with open(path, "w", encoding="utf-8") as f:
+            for (tag, stack), n in counts.most_common():
+                f.write(f"{tag};{stack} {n}\n")
+        logger.info("프로파일 저장: %s (샘플 %d개)", path, sum(counts.values()))
+        return path
@@ -0,0 +1,171 @@
+"""외부 API(넥슨/라이엇) 호출 한도 배분.
+
+키 하나의 전체 한도(global 토큰 버킷)와 길드별 몫(guild 토큰 버킷)을 함께 관리한다.
+토큰이 모자라면 요청은 길드별 대기열에 들어가고, 가중 공정 큐잉(start-time fair queuing)으로
+길드마다 번갈아 토큰을 받는다. 한 길드가 몰아서 호출해도 다른 길드 요청이 뒤로 밀리지 않는다.
+길드 몫은 다른 길드와 순서를 다툴 때 누구를 먼저 줄지에만 쓴다(work-conserving). 혼자 쓰는 동안에는
+전체 한도를 다 쓸 수 있고, 기다리는 길드가 모두 몫을 넘었어도 남는 한도는 태그 순으로 나눠 준다.
+"""
+import asyncio
+import contextvars
+import time
+from collections import deque
+from typing import Callable, Hashable
+
+# 현재 명령을 실행 중인 길드 ID(없으면 DM/백그라운드 작업)
+current_guild: contextvars.ContextVar[int | None] = contextvars.ContextVar("current_guild", default=None)
+
+
+class QuotaExhausted(Exception):
+    """대기 한도 안에 호출 순서가 오지 않음."""
+
+
+class UpstreamQuota:
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: float,
+        *,
+        guild_share: float = 0.5,
+        reserve: float = 0.2,
+        weights: dict[Hashable, float] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        # rate: 초당 허용 호출 수, burst: 한 번에 몰아 쓸 수 있는 최대 호출 수
+        self.name = name
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.guild_rate = rate * guild_share
+        self.guild_burst = max(1.0, self.burst * guild_share)
+        self.reserve = reserve
+        self.weights = weights or {}
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._guild_tokens: dict[Hashable, tuple[float, float]] = {}  # 길드 -> (남은 토큰, 갱신 시각)
+        self._waiting: dict[Hashable, deque[tuple[float, asyncio.Future]]] = {}  # 길드 -> (시작 태그, future)
+        self._last_finish: dict[Hashable, float] = {}
+        self._vtime = 0.0
+        self._dispatcher: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+
+    # ---- 조회 ----
+    def pending(self) -> int:
+        return sum(len(q) for q in self._waiting.values())
+
+    def budget_low(self, guild_id: Hashable | None = None) -> bool:
+        """전체 잔량이 reserve 비율 아래이거나, 다른 길드가 기다리는데 해당 길드 몫이 바닥났으면 True(캐시로 대신 응답할 때)."""
+        now = self._clock()
+        self._refill(now)
+        if now < self._blocked_until or self._tokens < self.burst * self.reserve:
+            return True
+        return self._contended(guild_id) and self._guild_level(guild_id, now) < 1
+
+    # ---- 토큰 얻기 ----
+    async def acquire(self, guild_id: Hashable | None = None, timeout: float | None = None):
+        now = self._clock()
+        self._refill(now)
+        tag = self._start_tag(guild_id)
+        if not self._waiting and self._can_grant(guild_id, now):
+            self._grant(guild_id, tag, now)
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(guild_id, deque()).append((tag, fut))
+        self._ensure_dispatcher()
+        try:
+            await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError:
+            raise QuotaExhausted(f"{self.name} 호출 대기 시간 초과") from None
+
+    def penalize(self, retry_after: float):
+        """429를 받으면 남은 토큰을 비우고 retry_after 동안 새 호출을 막는다."""
+        now = self._clock()
+        self._tokens = 0.0
+        self._updated = now
+        self._blocked_until = max(self._blocked_until, now + max(retry_after, 0.0))
+
+    # ---- 내부 ----
+    def _refill(self, now: float):
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def _guild_level(self, guild_id: Hashable | None, now: float) -> float:
+        state = self._guild_tokens.get(guild_id)
+        if state is None:
+            return self.guild_burst
+        tokens, at = state
+        return min(self.guild_burst, tokens + (now - at) * self.guild_rate)
+
+    def _contended(self, guild_id: Hashable | None) -> bool:
+        """다른 길드 요청이 기다리는 중인지."""
+        return any(gid != guild_id for gid in self._waiting)
+
+    def _can_grant(self, guild_id: Hashable | None, now: float) -> bool:
+        return now >= self._blocked_until and self._tokens >= 1
+
+    def _start_tag(self, guild_id: Hashable | None) -> float:
+        weight = self.weights.get(guild_id, 1.0)
+        start = max(self._vtime, self._last_finish.get(guild_id, 0.0))
+        self._last_finish[guild_id] = start + 1.0 / weight
+        return start
+
+    def _grant(self, guild_id: Hashable | None, tag: float, now: float):
+        self._tokens -= 1
+        # 혼자 쓰며 몫을 넘겨 받은 만큼은 빚으로 남기지 않는다(경합이 생기면 그때부터 몫대로)
+        level = max(0.0, self._guild_level(guild_id, now) - 1)
+        self._guild_tokens[guild_id] = (level, now)
+        self._vtime = max(self._vtime, tag)
+        self._prune(now)
+
+    def _prune(self, now: float):
+        # 가득 찬 길드 버킷과 현재 가상 시각보다 뒤처진 종료 태그는 없는 것과 같다
+        if len(self._guild_tokens) > 64:
+            for gid in [g for g in self._guild_tokens if self._guild_level(g, now) >= self.guild_burst]:
+                del self._guild_tokens[gid]
+        if len(self._last_finish) > 64:
+            for gid in [g for g, f in self._last_finish.items() if f <= self._vtime and g not in self._waiting]:
+                del self._last_finish[gid]
+
+    def _ensure_dispatcher(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def _dispatch(self):
+        while self._waiting:
+            now = self._clock()
+            self._refill(now)
+            for gid, q in list(self._waiting.items()):
+                while q and q[0][1].done():  # 시간 초과로 취소된 요청 정리
+                    q.popleft()
+                if not q:
+                    del self._waiting[gid]
+            if not self._waiting:
+                break
+            # 몫이 남은 길드 중 시작 태그가 가장 앞선 요청. 모두 몫을 넘었으면 한도를 놀리지 않고 태그 순으로 준다
+            heads = [(self._guild_level(gid, now) < 1, q[0][0], gid) for gid, q in self._waiting.items()]
+            _, tag, gid = min(heads, key=lambda h: (h[0], h[1]))
+            if now < self._blocked_until:
+                await self._sleep(self._blocked_until - now)
+                continue
+            if self._tokens < 1:
+                await self._sleep((1 - self._tokens) / self.rate if self.rate > 0 else 1.0)
+                continue
+            _, fut = self._waiting[gid].popleft()
+            if not self._waiting[gid]:
+                del self._waiting[gid]
+            self._grant(gid, tag, now)
+            fut.set_result(None)
+
+    async def _sleep(self, delay: float):
+        # 새 요청이 들어오면(다른 길드가 더 앞설 수 있으므로) 일찍 깬다
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), max(delay, 0.001))
+        except asyncio.TimeoutError:
+            pass
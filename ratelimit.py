@@ -0,0 +1,75 @@
+"""명령 사용 빈도 제한(토큰 버킷).
+
+사용자/길드 x 명령 등급(cheap/heavy)마다 버킷을 하나씩 둔다. 다시 가득 찬 버킷은 지워도
+동작이 같으므로 접근할 때마다 오래된 항목부터 정리하고, 키 수는 max_keys를 넘지 않는다.
+"""
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+
+class Rate:
+    """capacity개까지 모아 둘 수 있고 per초마다 1개씩 다시 차는 버킷 설정."""
+
+    __slots__ = ("capacity", "per")
+
+    def __init__(self, capacity: float, per: float):
+        self.capacity = max(1.0, float(capacity))
+        self.per = float(per)
+
+    def __repr__(self) -> str:
+        return f"Rate({self.capacity:g}/{self.per:g}s)"
+
+
+class RateLimiter:
+    def __init__(self, rates: dict[tuple[str, str], Rate], max_keys: int = 10000, clock: Callable[[], float] = time.monotonic):
+        # rates: (scope, kind) -> Rate, scope는 "user" | "guild", 없는 조합은 제한하지 않음
+        self.rates = {k: r for k, r in rates.items() if r and r.per > 0}
+        self.max_keys = max_keys
+        self._clock = clock
+        # (scope, id, kind) -> (남은 토큰, 갱신 시각, Rate). 갱신 순서대로 정렬돼 있다.
+        self._buckets: OrderedDict[tuple, tuple[float, float, Rate]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, user_id: Hashable, guild_id: Hashable | None = None, kind: str = "cheap") -> float:
+        """모든 관련 버킷에 토큰이 있으면 하나씩 쓰고 0을, 아니면 기다려야 할 초를 반환."""
+        now = self._clock()
+        self._expire(now)
+        keys = [("user", user_id, kind)]
+        if guild_id is not None:
+            keys.append(("guild", guild_id, kind))
+        wait = 0.0
+        levels = []
+        for key in keys:
+            rate = self.rates.get((key[0], kind))
+            if rate is None:
+                continue
+            level = self._level(key, rate, now)
+            if level < 1:
+                wait = max(wait, (1 - level) * rate.per)
+            levels.append((key, rate, level))
+        if wait > 0:
+            return wait
+        for key, rate, level in levels:
+            self._buckets[key] = (level - 1, now, rate)
+            self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return 0.0
+
+    def _level(self, key: tuple, rate: Rate, now: float) -> float:
+        state = self._buckets.get(key)
+        if state is None:
+            return rate.capacity
+        tokens, at, _ = state
+        return min(rate.capacity, tokens + (now - at) / rate.per)
+
+    def _expire(self, now: float):
+        # 앞쪽이 가장 오래 전에 갱신된 버킷. 가득 찬 것만 지우고 처음 만나는 덜 찬 버킷에서 멈춘다.
+        while self._buckets:
+            key, (tokens, at, rate) = next(iter(self._buckets.items()))
+            if tokens + (now - at) / rate.per < rate.capacity:
+                break
+            self._buckets.popitem(last=False)
@@ -0,0 +1,171 @@
+"""외부 API 응답 캐시.
+
+신선 기간(ttl) 안의 응답은 그대로 재사용하고, 기간이 지났어도 max_stale 이내라면
+호출 한도가 바닥났거나 업스트림이 실패할 때 대신 돌려줄 수 있도록 남겨 둔다.
+SwrCache는 여기에 stale-while-revalidate 조회(오래된 값을 먼저 주고 뒤에서 갱신)를 더한다.
+항목은 local 계층(기본: 프로세스 안 LRU)에 두고, shared(예: cache.SqliteCache)를 주면 저장할 때 executor에서 JSON으로
+바꿔 함께 쓰고 aget()에서 메모리에 없거나 신선하지 않은 항목을 그쪽에서 찾아 다른 봇 프로세스가 받아 둔 응답을 재사용한다.
+캐시한 값은 조회한 쪽과 같은 객체라 고치지 않고 읽기만 한다(그래서 복사 없이 스레드에서 직렬화해도 된다).
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple
+
+from cache import CacheBackend, LruCache
+
+logger = logging.getLogger("musicbot.cache")
+
+
+class CacheHit(NamedTuple):
+    data: Any
+    age: float  # 저장 후 지난 시간(초)
+    fresh: bool
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        ttl: float,
+        max_stale: float,
+        max_entries: int = 2000,
+        clock: Callable[[], float] = time.monotonic,
+        shared: CacheBackend | None = None,
+        local: CacheBackend | None = None,
+    ):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self._clock = clock
+        # 키 -> (데이터, 저장 시각(clock), ttl). shared는 (JSON 문자열, 벽시계 저장 시각, ttl)
+        self._entries: CacheBackend = local if local is not None else LruCache(max_entries)
+        self.shared = shared
+        self.stats = {"fresh": 0, "stale": 0, "miss": 0}  # 조회 결과별 누적 횟수(지표용)
+        self.shared_stats = {"hit": 0, "miss": 0}  # 메모리에서 못 찾아 공유 계층을 본 결과
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _local(self, key: Hashable) -> CacheHit | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        data, stored_at, ttl = entry
+        age = self._clock() - stored_at
+        if age > max(ttl, self.max_stale):
+            self._entries.pop(key)
+            return None
+        return CacheHit(data, age, age < ttl)
+
+    def _count(self, hit: CacheHit | None) -> CacheHit | None:
+        self.stats["miss" if hit is None else "fresh" if hit.fresh else "stale"] += 1
+        return hit
+
+    def get(self, key: Hashable) -> CacheHit | None:
+        return self._count(self._local(key))
+
+    async def aget(self, key: Hashable) -> CacheHit | None:
+        """get()과 같지만 메모리에 없거나 신선하지 않으면 공유 계층에서 더 새 항목을 찾아 메모리로 올린다."""
+        hit = self._local(key)
+        if self.shared is None or (hit and hit.fresh):
+            return self._count(hit)
+        try:
+            entry = await asyncio.get_running_loop().run_in_executor(None, self._read_shared, key)
+        except Exception as exc:
+            logger.warning("공유 캐시 읽기 실패: %s", exc)
+            entry = None
+        if entry is not None:
+            data, stored_at, ttl = entry
+            # 공유 계층은 벽시계로 저장하므로 나이로 바꿔 이 프로세스의 시계에 맞춘다
+            age = max(0.0, time.time() - stored_at)
+            if age <= max(ttl, self.max_stale) and (hit is None or age < hit.age):
+                self.shared_stats["hit"] += 1
+                self._entries.set(key, (data, self._clock() - age, ttl))
+                return self._count(CacheHit(data, age, age < ttl))
+        self.shared_stats["miss"] += 1
+        return self._count(hit)
+
+    def shared_hit_ratio(self) -> float:
+        total = sum(self.shared_stats.values())
+        return self.shared_stats["hit"] / total if total else 0.0
+
+    def hit_ratio(self) -> float:
+        """신선한 적중 비율(조회가 없었으면 0)."""
+        total = sum(self.stats.values())
+        return self.stats["fresh"] / total if total else 0.0
+
+    def set(self, key: Hashable, data: Any, ttl: float | None = None):
+        """data는 조회한 쪽과 같은 객체를 그대로 보관하므로 넣은 뒤에는 읽기만 한다."""
+        ttl = self.ttl if ttl is None else ttl
+        self._entries.set(key, (data, self._clock(), ttl))
+        if self.shared is None:
+            return
+        stored_at = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_shared(key, data, stored_at, ttl)
+        else:
+            # FC 선수 메타처럼 큰 응답은 직렬화만으로 루프를 오래 붙잡으므로 직렬화도 파일 쓰기와 함께 스레드에서 한다
+            loop.run_in_executor(None, self._write_shared, key, data, stored_at, ttl)
+
+    def _read_shared(self, key: Hashable) -> tuple[Any, float, float] | None:
+        entry = self.shared.get(key)
+        if entry is None:
+            return None
+        value, stored_at, ttl = entry
+        return json.loads(value), stored_at, ttl
+
+    def _write_shared(self, key: Hashable, data: Any, stored_at: float, ttl: float):
+        try:
+            value = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        except (TypeError, ValueError) as exc:
+            logger.warning("공유 캐시에 넣을 수 없는 값: %s", exc)
+            return
+        try:
+            self.shared.set(key, (value, stored_at, ttl))
+        except Exception as exc:
+            logger.warning("공유 캐시 쓰기 실패: %s", exc)
+
+
+class SwrCache(ResponseCache):
+    def __init__(self, ttl: float, max_stale: float, max_entries: int = 2000, clock: Callable[[], float] = time.monotonic):
+        super().__init__(ttl, max_stale, max_entries, clock)
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+    async def lookup(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> tuple[CacheHit, asyncio.Task | None]:
+        """(결과, 갱신 작업)을 반환. 신선하면 갱신 작업 없음, 오래됐으면 바로 반환하고 뒤에서 다시 가져온다.
+
+        캐시에 없으면 기다려서 가져온다. 같은 키의 동시 조회는 업스트림 호출 하나로 합친다.
+        """
+        hit = self.get(key)
+        if hit and hit.fresh:
+            return hit, None
+        if hit:
+            return hit, self._revalidate(key, fetch)
+        data = await asyncio.shield(self._revalidate(key, fetch))
+        return CacheHit(data, 0.0, True), None
+
+    async def refresh(self, key: Hashable, fetch: Callable[[], Awaitable[Any]], ttl: float | None = None) -> Any:
+        """캐시 상태와 관계없이 다시 가져와 저장(미리 데워 두기). ttl을 주면 그동안 신선한 값으로 취급한다."""
+        return await asyncio.shield(self._revalidate(key, fetch, ttl))
+
+    def _revalidate(self, key: Hashable, fetch: Callable[[], Awaitable[Any]], ttl: float | None = None) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._fetch(key, fetch, ttl))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return task
+
+    async def _fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]], ttl: float | None = None) -> Any:
+        data = await fetch()
+        self.set(key, data, ttl)
+        return data
+
+    def _done(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # 아무도 기다리지 않은 갱신 실패가 경고로 남지 않도록 회수
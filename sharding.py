@@ -0,0 +1,47 @@
+"""샤드 번호 계산.
+
+디스코드는 길드를 (길드 ID >> 22) % 전체 샤드 수 번 샤드에 배정한다. 클러스터 실행(launcher.py)에서는
+전체 샤드를 프로세스 수만큼 연속 구간으로 나눠 프로세스마다 한 구간을 맡기고, bot.py는 같은 계산으로
+자기 길드인지 판단해 다른 프로세스 길드의 백그라운드 작업(관심 플레이어 갱신 등)을 건너뛴다.
+"""
+
+
+def parse_shard_ids(text: str) -> list[int]:
+    """ "0-3" / "0,1,5" / "0-3,8" 형식. 비어 있으면 빈 목록(전부)."""
+    ids: list[int] = []
+    for part in text.replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            ids.extend(range(int(start), int(end) + 1))
+        else:
+            ids.append(int(part))
+    return sorted(set(ids))
+
+
+def format_shard_ids(ids: list[int]) -> str:
+    """parse_shard_ids의 역. 연속 구간은 "a-b"로 줄인다."""
+    parts = []
+    for shard_id in ids:
+        if parts and shard_id == parts[-1][1] + 1:
+            parts[-1][1] = shard_id
+        else:
+            parts.append([shard_id, shard_id])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in parts)
+
+
+def shard_ranges(shard_count: int, clusters: int) -> list[list[int]]:
+    """전체 샤드를 clusters개의 연속 구간으로 고르게 나눈다(앞 구간이 하나씩 더 가져감). 빈 구간은 만들지 않는다."""
+    clusters = max(1, min(clusters, shard_count))
+    size, extra = divmod(shard_count, clusters)
+    ranges, start = [], 0
+    for i in range(clusters):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+def shard_for_guild(guild_id: int, shard_count: int) -> int:
+    return (guild_id >> 22) % shard_count
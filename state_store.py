@@ -0,0 +1,408 @@
+"""봇 상태 저장소.
+
+백엔드는 JSON 파일 하나 / 스냅샷 + 추가 전용 저널 / 길드별 SQLite 행 중 하나를 쓴다.
+변경이 생기면 길드 단위로 dirty 표시만 하고, 실제 쓰기는 디바운스 후 executor
+스레드에서 처리한다(파일은 임시 파일 + fsync + rename으로 원자적으로 교체).
+"""
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+logger = logging.getLogger("musicbot.state")
+
+
+def atomic_write_text(path: str, text: str):
+    """같은 디렉터리에 임시 파일을 쓰고 fsync 후 교체. 중간에 죽어도 기존 파일은 온전하다."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=os.path.basename(path), dir=directory)
+    try:
+        # mkstemp는 0600으로 만들므로 기존 파일 권한(없으면 0644)을 유지
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(tmp, mode)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+    # rename 자체도 디스크에 남도록 디렉터리 fsync (지원하는 OS에서만)
+    if hasattr(os, "O_DIRECTORY"):
+        with contextlib.suppress(OSError):
+            dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+
+class JsonStateBackend:
+    """상태 전체를 JSON 파일 하나에 저장."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> dict | None:
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def write(self, data: dict):
+        atomic_write_text(self.path, json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+
+
+class StatePersister:
+    """write-behind 저장기.
+
+    mark_dirty()는 표시만 하고 즉시 반환한다. 백그라운드 태스크가 interval초 동안
+    변경을 모은 뒤 collect(dirty)로 이벤트 루프에서 스냅샷을 만들고, backend.write는
+    executor에서 실행한다.
+    """
+
+    def __init__(self, backend, collect: Callable[[set], Any], interval: float = 2.0):
+        self.backend = backend
+        self.collect = collect
+        self.interval = interval
+        self._dirty: set[Hashable] = set()
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self._flushing = False
+
+    def mark_dirty(self, key: Hashable = None):
+        """key(길드 ID)가 바뀌었음을 표시. None은 전체를 뜻한다."""
+        self._dirty.add(key)
+        self._wakeup.set()
+
+    def is_dirty(self, key: Hashable) -> bool:
+        return key in self._dirty or None in self._dirty
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while not self._closing:
+            await self._wakeup.wait()
+            # 디바운스: 이 사이에 들어온 변경은 한 번에 저장
+            await asyncio.sleep(self.interval)
+            self._wakeup.clear()
+            self._flushing = True
+            try:
+                await self.flush()
+            finally:
+                self._flushing = False
+
+    async def flush(self):
+        async with self._lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, set()
+            payload = None
+            try:
+                payload = self.collect(dirty)
+                await asyncio.get_running_loop().run_in_executor(None, self.backend.write, payload)
+            except Exception as exc:
+                logger.warning("Failed to save state: %s", exc)
+                # 다음 주기에 다시 시도
+                requeue = getattr(self.backend, "requeue", None)
+                if requeue and payload is not None:
+                    requeue(payload)
+                self._dirty |= dirty
+                self._wakeup.set()
+
+    async def close(self):
+        """백그라운드 태스크를 멈추고 남은 변경을 마지막으로 저장.
+
+        저장 중인 태스크는 취소하지 않고 그 저장이 끝나기를 기다린다. 취소하면 이미 꺼낸 dirty 키를 잃고,
+        executor의 쓰기가 아래 마지막 저장과 겹쳐 오래된 스냅샷이 새 것을 덮을 수 있다.
+        """
+        self._closing = True
+        if self._task is not None:
+            if not self._flushing:
+                self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+    def flush_sync(self):
+        """이벤트 루프가 이미 끝난 뒤(종료 경로)에 쓰는 동기 저장."""
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        try:
+            self.backend.write(self.collect(dirty))
+        except Exception as exc:
+            logger.warning("Failed to save state: %s", exc)
+
+
+def apply_op(data: dict, op: list):
+    """저널 항목 하나를 스냅샷 dict에 반영. op = [seq, 종류, 길드 ID, ...]"""
+    kind, gid = op[1], str(op[2])
+    queues = data.setdefault("queues", {})
+    if kind == "ins":
+        q = queues.setdefault(gid, [])
+        q.insert(min(op[3], len(q)), op[4])
+    elif kind == "pop":
+        q = queues.get(gid) or []
+        if 0 <= op[3] < len(q):
+            q.pop(op[3])
+    elif kind == "mv":
+        q = queues.get(gid) or []
+        if 0 <= op[3] < len(q):
+            q.insert(op[4], q.pop(op[3]))
+    elif kind == "clr":
+        queues[gid] = []
+    elif kind == "rep":
+        data.setdefault("repeat_mode", {})[gid] = op[3]
+    elif kind == "shuf":
+        data.setdefault("shuffle_mode", {})[gid] = op[3]
+    elif kind in ("panel", "tmsg"):
+        refs = data.setdefault("panels" if kind == "panel" else "track_messages", {})
+        if op[3]:
+            refs[gid] = op[3]
+        else:
+            refs.pop(gid, None)
+
+
+class JournalStateBackend:
+    """스냅샷 + 추가 전용 저널.
+
+    변경은 record()로 짧은 연산 단위(삽입/꺼내기/이동/비우기/모드 변경/메시지 ID)만 쌓고,
+    저장 시 저널 파일 끝에 덧붙인다. compact_every개가 쌓이면 스냅샷을 새로 쓰고
+    저널을 비운다. 각 연산에는 순번이 있어 스냅샷 이후 연산만 재생한다.
+    """
+
+    def __init__(self, path: str, compact_every: int = 1000):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.compact_every = compact_every
+        self._seq = 0
+        self._pending: list[list] = []
+        self._since_compact = 0
+
+    def record(self, kind: str, guild_id: int, *args):
+        self._seq += 1
+        self._since_compact += 1
+        self._pending.append([self._seq, kind, guild_id, *args])
+
+    def payload(self, full_snapshot: Callable[[], dict]) -> dict:
+        """저장할 연산을 꺼내고, 압축할 때가 됐으면 전체 스냅샷도 함께 만든다(이벤트 루프에서 호출)."""
+        ops, self._pending = self._pending, []
+        snapshot = None
+        if self._since_compact >= self.compact_every:
+            snapshot = full_snapshot()
+            snapshot["seq"] = self._seq
+            self._since_compact = 0
+        return {"ops": ops, "snapshot": snapshot}
+
+    def requeue(self, payload: dict):
+        """쓰기에 실패한 payload를 되돌려 다음 저장 때 다시 쓰게 한다."""
+        self._pending[:0] = payload.get("ops") or []
+        if payload.get("snapshot") is not None:
+            self._since_compact = self.compact_every
+
+    def load(self) -> dict | None:
+        data = None
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        base = (data or {}).get("seq", 0)
+        self._seq = base
+        replayed = 0
+        if os.path.exists(self.journal_path):
+            data = data or {}
+            valid_end = 0
+            torn = False
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("torn line")
+                        op = json.loads(line)
+                    except ValueError:
+                        torn = True
+                        break
+                    valid_end += len(line)
+                    if op[0] <= base:
+                        continue
+                    apply_op(data, op)
+                    self._seq = op[0]
+                    replayed += 1
+            if torn:
+                # 쓰다 만 마지막 줄은 잘라내 이후 기록이 이어 붙지 않게 한다
+                logger.warning("Truncating torn state journal at byte %d", valid_end)
+                with open(self.journal_path, "r+b") as f:
+                    f.truncate(valid_end)
+        self._since_compact = replayed
+        return data
+
+    def write(self, payload: dict):
+        snapshot = payload.get("snapshot")
+        ops = payload.get("ops") or []
+        if ops:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                for op in ops:
+                    f.write(json.dumps(op, ensure_ascii=False, separators=(",", ":")))
+                    f.write("\n")
+                f.flush()
+                os.fsync(f.fileno())
+        if snapshot is not None:
+            atomic_write_text(self.path, json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")))
+            # 스냅샷에 반영된 연산만 지운다(이후 연산은 아직 _pending에 있음)
+            with open(self.journal_path, "w", encoding="utf-8") as f:
+                f.flush()
+                os.fsync(f.fileno())
+
+
+class SqliteStateBackend:
+    """길드마다 한 행으로 저장하는 SQLite 백엔드(WAL).
+
+    시작 시 아무것도 읽지 않고, 길드 상태는 load_guild()로 처음 필요할 때 한 행씩 읽는다.
+    write()는 바뀐 길드의 행만 upsert한다.
+    """
+
+    lazy = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS guild_state (
+                guild_id INTEGER PRIMARY KEY,
+                queue TEXT NOT NULL DEFAULT '[]',
+                repeat_mode TEXT,
+                shuffle INTEGER NOT NULL DEFAULT 0,
+                panel_channel_id INTEGER,
+                panel_message_id INTEGER,
+                track_channel_id INTEGER,
+                track_message_id INTEGER,
+                updated_at REAL
+            )
+            """
+        )
+        # 이전 스키마에 없던 열 추가
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(guild_state)")}
+        for column in ("track_channel_id", "track_message_id"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE guild_state ADD COLUMN {column} INTEGER")
+
+    def load(self) -> dict | None:
+        return None
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM guild_state LIMIT 1").fetchone() is None
+
+    def load_guild(self, guild_id: int) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT queue, repeat_mode, shuffle, panel_channel_id, panel_message_id, track_channel_id, track_message_id"
+                " FROM guild_state WHERE guild_id = ?",
+                (guild_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "queue": json.loads(row[0] or "[]"),
+            "repeat_mode": row[1],
+            "shuffle": bool(row[2]),
+            "panel_channel_id": row[3],
+            "panel_message_id": row[4],
+            "track_channel_id": row[5],
+            "track_message_id": row[6],
+        }
+
+    def write(self, rows: dict):
+        """rows: {길드 ID: {"queue", "repeat_mode", "shuffle", "panel_*_id", "track_*_id"}}"""
+        if not rows:
+            return
+        now = time.time()
+        params = [
+            (
+                gid,
+                json.dumps(row.get("queue") or [], ensure_ascii=False, separators=(",", ":")),
+                row.get("repeat_mode"),
+                1 if row.get("shuffle") else 0,
+                row.get("panel_channel_id"),
+                row.get("panel_message_id"),
+                row.get("track_channel_id"),
+                row.get("track_message_id"),
+                now,
+            )
+            for gid, row in rows.items()
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    """
+                    INSERT INTO guild_state (guild_id, queue, repeat_mode, shuffle, panel_channel_id, panel_message_id,
+                                             track_channel_id, track_message_id, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(guild_id) DO UPDATE SET
+                        queue = excluded.queue,
+                        repeat_mode = excluded.repeat_mode,
+                        shuffle = excluded.shuffle,
+                        panel_channel_id = excluded.panel_channel_id,
+                        panel_message_id = excluded.panel_message_id,
+                        track_channel_id = excluded.track_channel_id,
+                        track_message_id = excluded.track_message_id,
+                        updated_at = excluded.updated_at
+                    """,
+                    params,
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def import_snapshot(self, data: dict):
+        """기존 JSON 상태 파일 내용을 행으로 옮긴다(최초 1회 이전용)."""
+        rows: dict[int, dict] = {}
+
+        def row(gid_str):
+            gid = int(gid_str)
+            return rows.setdefault(gid, {"queue": [], "repeat_mode": None, "shuffle": False})
+
+        for gid_str, items in (data.get("queues") or {}).items():
+            row(gid_str)["queue"] = items or []
+        for gid_str, mode in (data.get("repeat_mode") or {}).items():
+            row(gid_str)["repeat_mode"] = mode
+        for gid_str, enabled in (data.get("shuffle_mode") or {}).items():
+            row(gid_str)["shuffle"] = bool(enabled)
+        for key, prefix in (("panels", "panel"), ("track_messages", "track")):
+            for gid_str, ref in (data.get(key) or {}).items():
+                if ref:
+                    row(gid_str).update({f"{prefix}_channel_id": ref[0], f"{prefix}_message_id": ref[1]})
+        # 빈 대기열에 기본 모드뿐인 길드는 행을 만들 필요가 없다
+        rows = {
+            gid: r
+            for gid, r in rows.items()
+            if r["queue"] or r["repeat_mode"] not in (None, "off") or r["shuffle"] or r.get("panel_message_id") or r.get("track_message_id")
+        }
+        self.write(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
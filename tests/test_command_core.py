@@ -0,0 +1,40 @@
+import asyncio
+import unittest
+
+from command_core import Reply, edit_when_refreshed
+from response_cache import CacheHit
+
+
+class FakeMessage:
+    def __init__(self):
+        self.edits: list[dict] = []
+
+    async def edit(self, **kwargs):
+        self.edits.append(kwargs)
+
+
+class EditWhenRefreshedTest(unittest.IsolatedAsyncioTestCase):
+    async def test_same_reply_clears_pending_note(self):
+        reply = Reply(title="소환사", description="같은 결과")
+        sent = reply.send_kwargs(CacheHit(reply, 120.0, False))
+        self.assertIn("최신 정보 확인 중", sent["embed"].footer.text)
+
+        refresh = asyncio.get_running_loop().create_future()
+        refresh.set_result(Reply(title="소환사", description="같은 결과"))
+        message = FakeMessage()
+        await edit_when_refreshed(message, refresh)
+
+        self.assertEqual(len(message.edits), 1)
+        self.assertIsNone(message.edits[0]["embed"].footer.text)
+        self.assertIsNone(message.edits[0]["content"])
+
+    async def test_failed_refresh_leaves_message(self):
+        refresh = asyncio.get_running_loop().create_future()
+        refresh.set_exception(ValueError("실패"))
+        message = FakeMessage()
+        await edit_when_refreshed(message, refresh)
+        self.assertEqual(message.edits, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+"""해시 타이머 휠.
+
+등록된 키만 슬롯에 들어가므로 한 틱의 비용은 그 슬롯에 걸린 키 수에 비례한다.
+"""
+import math
+from typing import Any, Hashable
+
+
+class TimerWheel:
+    def __init__(self, tick: float, slots: int = 64):
+        self.tick = tick
+        self._slots: list[dict[Hashable, int]] = [{} for _ in range(slots)]  # 키 -> 남은 바퀴 수
+        self._where: dict[Hashable, int] = {}
+        self._cursor = 0
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._where
+
+    def schedule(self, key: Hashable, delay: float):
+        """delay초 뒤에 key가 만료되도록 등록. 이미 있으면 다시 잡는다."""
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay / self.tick))
+        slot = (self._cursor + ticks) % len(self._slots)
+        self._slots[slot][key] = (ticks - 1) // len(self._slots)
+        self._where[key] = slot
+
+    def cancel(self, key: Hashable):
+        slot = self._where.pop(key, None)
+        if slot is not None:
+            self._slots[slot].pop(key, None)
+
+    def advance(self) -> list[Any]:
+        """한 틱 진행하고 만료된 키 목록을 반환."""
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        bucket = self._slots[self._cursor]
+        due = []
+        for key, rounds in list(bucket.items()):
+            if rounds <= 0:
+                del bucket[key]
+                self._where.pop(key, None)
+                due.append(key)
+            else:
+                bucket[key] = rounds - 1
+        return due
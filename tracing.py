@@ -0,0 +1,223 @@
+"""명령 단위 트레이싱(span).
+
+명령 하나(상호작용/메시지 ID로 묶음)를 루트 span으로, 그 안의 단계(음성 연결, yt-dlp 추출, FFmpeg 시작,
+메시지 전송, 패널 갱신 등)를 하위 span으로 기록한다. 현재 span은 contextvar로 전달되므로 그 안에서 만든
+작업도 같은 트레이스에 붙는다. 끝난 span은 모아서 JSONL 파일이나 OTLP/HTTP(JSON) 수집기로 보내고,
+루트가 slow_ms보다 오래 걸렸으면 단계별 소요 시간을 로그로 남긴다. 꺼져 있으면 span()은 아무것도 하지 않는다.
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager, nullcontext
+
+logger = logging.getLogger("musicbot.tracing")
+
+current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "start_ns", "end", "attrs", "error", "root", "finished")
+
+    def __init__(self, name: str, trace_id: int, parent: "Span | None", attrs: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = random.getrandbits(64)
+        self.parent_id = parent.span_id if parent else None
+        self.start = time.perf_counter()
+        self.start_ns = time.time_ns()
+        self.end: float | None = None
+        self.attrs = attrs
+        self.error: str | None = None
+        self.root = parent.root if parent else self
+        self.finished: list[Span] = []  # 루트에만 쓰임: 끝난 하위 span
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": f"{self.trace_id:032x}",
+            "span_id": f"{self.span_id:016x}",
+            "parent_id": f"{self.parent_id:016x}" if self.parent_id else None,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attrs": self.attrs,
+            "error": self.error,
+        }
+
+    def to_otlp(self) -> dict:
+        out = {
+            "traceId": f"{self.trace_id:032x}",
+            "spanId": f"{self.span_id:016x}",
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.start_ns + int(self.duration * 1e9)),
+            "attributes": [{"key": k, "value": {"stringValue": str(v)}} for k, v in self.attrs.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            out["parentSpanId"] = f"{self.parent_id:016x}"
+        return out
+
+
+class Tracer:
+    def __init__(self):
+        self.file: str | None = None
+        self.otlp_endpoint: str | None = None
+        self.slow_ms: float = 0.0
+        self.service = "musicbot"
+        self.flush_interval = 2.0
+        self._pending: list[Span] = []
+        self._task: asyncio.Task | None = None
+
+    def configure(self, *, file: str | None = None, otlp_endpoint: str | None = None, slow_ms: float = 0.0, service: str = "musicbot"):
+        self.file = file or None
+        self.otlp_endpoint = otlp_endpoint or None
+        self.slow_ms = slow_ms
+        self.service = service
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.file or self.otlp_endpoint or self.slow_ms > 0)
+
+    # ---- span 만들기 ----
+    def begin(self, name: str, trace_id: int | None = None, **attrs) -> Span | None:
+        """루트 span 시작(명령 진입점). 현재 작업의 남은 부분이 이 트레이스에 붙는다. end()로 끝낸다."""
+        if not self.enabled:
+            return None
+        span = Span(name, trace_id if trace_id is not None else random.getrandbits(128), None, attrs)
+        current_span.set(span)
+        return span
+
+    def end(self, span: Span | None, error: BaseException | str | None = None):
+        if span is None or span.end is not None:
+            return
+        span.end = time.perf_counter()
+        if error is not None:
+            span.error = str(error) or type(error).__name__
+        if self.file or self.otlp_endpoint:
+            self._pending.append(span)
+        if span.root is span:
+            self._report_slow(span)
+        else:
+            span.root.finished.append(span)
+
+    def span(self, name: str, **attrs):
+        """현재 트레이스 안의 단계 하나(with 블록). 트레이스 밖이거나 꺼져 있으면 아무것도 하지 않는다."""
+        parent = current_span.get()
+        if parent is None or not self.enabled:
+            return nullcontext()
+        return self._child(name, parent, attrs)
+
+    @contextmanager
+    def _child(self, name: str, parent: Span, attrs: dict):
+        span = Span(name, parent.trace_id, parent, attrs)
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            self.end(span, exc)
+            raise
+        finally:
+            current_span.reset(token)
+            self.end(span)
+
+    def wrap(self, name: str):
+        """비동기 함수 전체를 span 하나로 감싸는 데코레이터."""
+
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return await func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    # ---- 느린 요청 분석 ----
+    def _report_slow(self, root: Span):
+        if self.slow_ms <= 0 or root.duration * 1000 < self.slow_ms:
+            return
+        logger.warning("느린 요청 %s\n%s", root.name, self.breakdown(root))
+
+    @staticmethod
+    def breakdown(root: Span) -> str:
+        """루트 아래 단계들을 시작 순서대로 들여 써서 (시작 오프셋, 소요 시간, 비중)을 보여준다."""
+        total = root.duration or 1e-9
+        children: dict[int, list[Span]] = {}
+        for span in root.finished:
+            children.setdefault(span.parent_id, []).append(span)
+        lines = [f"{root.name} {root.duration * 1000:.0f}ms trace={root.trace_id:032x}" + (f" error={root.error}" if root.error else "")]
+
+        def walk(parent_id: int, depth: int):
+            for span in sorted(children.get(parent_id, []), key=lambda s: s.start):
+                offset = (span.start - root.start) * 1000
+                lines.append(
+                    f"{'  ' * depth}- {span.name}: +{offset:.0f}ms, {span.duration * 1000:.0f}ms ({span.duration / total * 100:.0f}%)"
+                    + (f" error={span.error}" if span.error else "")
+                )
+                walk(span.span_id, depth + 1)
+
+        walk(root.span_id, 1)
+        return "\n".join(lines)
+
+    # ---- 내보내기 ----
+    def start(self):
+        """실행 중인 루프에서 호출. 끝난 span을 flush_interval마다 내보낸다."""
+        if (self.file or self.otlp_endpoint) and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._flusher())
+
+    async def flush(self):
+        spans, self._pending = self._pending, []
+        if not spans:
+            return
+        if self.file:
+            lines = "".join(json.dumps(s.to_dict(), ensure_ascii=False) + "\n" for s in spans)
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self._append, lines)
+            except OSError as exc:
+                logger.warning("트레이스 파일 쓰기 실패(%s): %s", self.file, exc)
+        if self.otlp_endpoint:
+            await self._post_otlp(spans)
+
+    def _append(self, text: str):
+        with open(self.file, "a", encoding="utf-8") as f:
+            f.write(text)
+
+    async def _post_otlp(self, spans: list[Span]):
+        import aiohttp
+
+        body = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service}}]},
+                    "scopeSpans": [{"scope": {"name": "musicbot.tracing"}, "spans": [s.to_otlp() for s in spans]}],
+                }
+            ]
+        }
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(self.otlp_endpoint, json=body, timeout=5) as resp:
+                    if resp.status >= 300:
+                        logger.warning("OTLP 전송 실패 %s: %s", resp.status, (await resp.text())[:200])
+        except Exception as exc:
+            logger.warning("OTLP 전송 실패: %s", exc)
+
+    async def _flusher(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+tracer = Tracer()
@@ -0,0 +1,185 @@
+"""길드별 관심 플레이어 목록(SQLite).
+
+길드가 등록한 롤/FC/메이플 플레이어와 새 경기 알림 채널을 저장한다. 같은 플레이어를 여러 길드가
+등록해도 갱신은 (게임, 이름)당 한 번만 하므로 목록은 그 단위로 묶어서 돌려준다.
+파일은 처음 등록할 때 만든다. 그 전의 조회는 파일을 만들지 않고 빈 결과를 돌려준다(관심 플레이어를 안 쓰는 봇은 열지 않음).
+"""
+import os
+import sqlite3
+import threading
+
+GAMES = {"lol": "롤", "fc": "FC온라인", "maple": "메이플"}
+GAME_ALIASES = {
+    "lol": "lol",
+    "롤": "lol",
+    "fc": "fc",
+    "피파": "fc",
+    "maple": "maple",
+    "ms": "maple",
+    "메이플": "maple",
+}
+
+
+def watch_key(game: str, name: str) -> tuple[str, str]:
+    """갱신 단위 키. 명령 캐시 키와 같이 이름의 대소문자/앞뒤 공백은 구분하지 않는다."""
+    return game, name.strip().lower()
+
+
+class WatchStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _db(self, create: bool = False) -> sqlite3.Connection | None:
+        """연결(잠금 안에서 호출). 파일이 없으면 create일 때만 만들고, 아니면 None."""
+        if self._conn is None:
+            if not create and not os.path.exists(self.path):
+                return None
+            self._conn = self._open()
+        return self._conn
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS watch_players (
+                guild_id INTEGER NOT NULL,
+                game TEXT NOT NULL,
+                name TEXT NOT NULL COLLATE NOCASE,
+                added_by INTEGER,
+                last_seen TEXT,
+                stopped INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (guild_id, game, name)
+            );
+            CREATE TABLE IF NOT EXISTS watch_channels (
+                guild_id INTEGER PRIMARY KEY,
+                channel_id INTEGER NOT NULL
+            );
+            """
+        )
+        # 이전 스키마에 없던 열 추가
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(watch_players)")}
+        if "stopped" not in columns:
+            conn.execute("ALTER TABLE watch_players ADD COLUMN stopped INTEGER NOT NULL DEFAULT 0")
+        return conn
+
+    # ---- 등록 ----
+    def add(self, guild_id: int, game: str, name: str, added_by: int | None = None) -> bool:
+        """새로 등록했으면 True, 이미 있으면 False."""
+        with self._lock:
+            cur = self._db(create=True).execute(
+                "INSERT OR IGNORE INTO watch_players (guild_id, game, name, added_by) VALUES (?, ?, ?, ?)",
+                (guild_id, game, name.strip(), added_by),
+            )
+        return cur.rowcount > 0
+
+    def remove(self, guild_id: int, game: str, name: str) -> bool:
+        with self._lock:
+            db = self._db()
+            if db is None:
+                return False
+            cur = db.execute(
+                "DELETE FROM watch_players WHERE guild_id = ? AND game = ? AND name = ?", (guild_id, game, name.strip())
+            )
+        return cur.rowcount > 0
+
+    def count(self, guild_id: int) -> int:
+        with self._lock:
+            db = self._db()
+            if db is None:
+                return 0
+            return db.execute("SELECT COUNT(*) FROM watch_players WHERE guild_id = ?", (guild_id,)).fetchone()[0]
+
+    def guild_players(self, guild_id: int) -> list[dict]:
+        with self._lock:
+            db = self._db()
+            if db is None:
+                return []
+            rows = db.execute(
+                "SELECT game, name, added_by, stopped FROM watch_players WHERE guild_id = ? ORDER BY game, name", (guild_id,)
+            ).fetchall()
+        return [{"game": g, "name": n, "added_by": a, "stopped": bool(st)} for g, n, a, st in rows]
+
+    def targets(self) -> dict[tuple[str, str], dict]:
+        """갱신 단위 키 -> {game, name, guilds: {길드 ID: 마지막으로 본 경기 ID}}. 갱신을 멈춘 등록은 뺀다."""
+        with self._lock:
+            db = self._db()
+            if db is None:
+                return {}
+            rows = db.execute("SELECT guild_id, game, name, last_seen FROM watch_players WHERE stopped = 0").fetchall()
+        out: dict[tuple[str, str], dict] = {}
+        for guild_id, game, name, last_seen in rows:
+            entry = out.setdefault(watch_key(game, name), {"game": game, "name": name, "guilds": {}})
+            entry["guilds"][guild_id] = last_seen
+        return out
+
+    def target(self, game: str, name: str) -> dict | None:
+        with self._lock:
+            db = self._db()
+            if db is None:
+                return None
+            rows = db.execute(
+                "SELECT guild_id, name, last_seen FROM watch_players WHERE game = ? AND name = ? AND stopped = 0", (game, name.strip())
+            ).fetchall()
+        if not rows:
+            return None
+        return {"game": game, "name": rows[0][1], "guilds": {gid: seen for gid, _, seen in rows}}
+
+    def set_last_seen(self, game: str, name: str, match_id: str, guild_ids: list[int] | None = None):
+        """guild_ids를 주면 그 길드 행만 갱신(클러스터에서 다른 프로세스가 아직 알리지 않은 길드는 건드리지 않는다)."""
+        with self._lock:
+            db = self._db()
+            if db is None:
+                return
+            if guild_ids is None:
+                db.execute("UPDATE watch_players SET last_seen = ? WHERE game = ? AND name = ?", (match_id, game, name.strip()))
+            else:
+                db.executemany(
+                    "UPDATE watch_players SET last_seen = ? WHERE game = ? AND name = ? AND guild_id = ?",
+                    [(match_id, game, name.strip(), gid) for gid in guild_ids],
+                )
+
+    def set_stopped(self, game: str, name: str, stopped: bool, guild_ids: list[int] | None = None) -> int:
+        """조회할 수 없는 플레이어의 갱신을 멈추거나(True) 다시 시작(False). 바뀐 행 수를 반환."""
+        sql = "UPDATE watch_players SET stopped = ? WHERE game = ? AND name = ? AND stopped != ?"
+        with self._lock:
+            db = self._db()
+            if db is None:
+                return 0
+            if guild_ids is None:
+                cur = db.execute(sql, (int(stopped), game, name.strip(), int(stopped)))
+            else:
+                cur = db.executemany(
+                    sql + " AND guild_id = ?", [(int(stopped), game, name.strip(), int(stopped), gid) for gid in guild_ids]
+                )
+        return cur.rowcount
+
+    # ---- 알림 채널 ----
+    def set_channel(self, guild_id: int, channel_id: int | None):
+        with self._lock:
+            db = self._db(create=channel_id is not None)
+            if db is None:
+                return
+            if channel_id is None:
+                db.execute("DELETE FROM watch_channels WHERE guild_id = ?", (guild_id,))
+            else:
+                db.execute(
+                    "INSERT INTO watch_channels (guild_id, channel_id) VALUES (?, ?)"
+                    " ON CONFLICT(guild_id) DO UPDATE SET channel_id = excluded.channel_id",
+                    (guild_id, channel_id),
+                )
+
+    def channel(self, guild_id: int) -> int | None:
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT channel_id FROM watch_channels WHERE guild_id = ?", (guild_id,)).fetchone() if db else None
+        return row[0] if row else None
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None